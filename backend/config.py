@@ -15,6 +15,10 @@ DB_PASS = os.environ.get("DB_PASS")
 
 # путь к базе данных Sqlite
 DB_PATH = os.path.join(os.path.dirname(__file__), "KIS2", "db_test.sqlite3")
+# снимок БД КИС2 (db.sqlite3) для импорта без REST API, пусто - импорт через REST API
+KIS2_SNAPSHOT_PATH = os.environ.get("KIS2_SNAPSHOT_PATH")
+# строк КИС2 в одной сохраняемой (commit) порции импорта заказов, задач и учёта шкафов
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 1000))
 
 BASE_DIR = Path(__file__).resolve().parent
 
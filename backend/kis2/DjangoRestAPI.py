@@ -5,52 +5,18 @@
 
 import requests
 import json
+from itertools import islice
 from typing import Dict, List, Set, Any
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 import re
+from datetime import timedelta
 
+from kis2.durations import parse_durations, truncate_to_minutes
+from kis2.snapshot import active_kis2_snapshot
 
-def convert_duration_to_iso8601(duration_str: Optional[str]) -> Optional[str]:
-    """
-    Преобразует строку длительности в формате '1 01:03:00' или '00:00:00' в ISO 8601 формат.
-
-    ISO 8601 формат для длительности начинается с 'P' и включает:
-    - 'nD' для дней
-    - 'T' разделитель для времени
-    - 'nH' для часов
-    - 'nM' для минут
-    - 'nS' для секунд
-
-    Например: 'P1DT1H3M0S' для '1 01:03:00' и 'PT0H0M0S' для '00:00:00'
-
-    Args:
-        duration_str: Строка длительности в формате '1 01:03:00' (дни часы:минуты:секунды)
-                      или '00:00:00' (часы:минуты:секунды)
+# Сколько длительностей разбирать одной порцией на этапе нормализации
+DURATION_BATCH_SIZE = 1000
 
-    Returns:
-        Строка длительности в формате ISO 8601 или None, если входная строка None или неверного формата
-    """
-    if not duration_str:
-        return None
-
-    # Проверяем формат с днями: '1 01:03:00'
-    day_time_pattern = re.compile(r'^(\d+)\s+(\d{2}):(\d{2}):(\d{2})$')
-    day_time_match = day_time_pattern.match(duration_str)
-
-    if day_time_match:
-        days, hours, minutes, seconds = map(int, day_time_match.groups())
-        return f"P{days}DT{hours}H{minutes}M{seconds}S"
-
-    # Проверяем формат без дней: '00:00:00'
-    time_pattern = re.compile(r'^(\d{2}):(\d{2}):(\d{2})$')
-    time_match = time_pattern.match(duration_str)
-
-    if time_match:
-        hours, minutes, seconds = map(int, time_match.groups())
-        return f"PT{hours}H{minutes}M{seconds}S"
-
-    # Если формат не соответствует ожидаемым шаблонам, возвращаем None
-    return None
 
 def _create_authenticated_session(
         base_url: str,
@@ -181,6 +147,7 @@ def _make_api_request(session: requests.Session, api_url: str, debug: bool = Fal
 def get_data_from_kis2(endpoint: str, debug: bool = False) -> Optional[List[Dict]]:
     """
     Получает данные из API КИС2 для указанного эндпоинта.
+    Если активен снимок БД КИС2 (kis2.snapshot.use_kis2_snapshot), данные читаются из него, без HTTP.
     
     Args:
         endpoint: Эндпоинт API без слеша в начале (например "Countries")
@@ -189,6 +156,10 @@ def get_data_from_kis2(endpoint: str, debug: bool = False) -> Optional[List[Dict
     Returns:
         Список словарей с данными или None в случае ошибки
     """
+    snapshot = active_kis2_snapshot()
+    if snapshot is not None:
+        return snapshot.fetch(endpoint)
+
     base_url = "https://kis2test.sibplc.ru"
     username = "admin"
     password = "djangoadmin"
@@ -210,6 +181,28 @@ def get_data_from_kis2(endpoint: str, debug: bool = False) -> Optional[List[Dict
     return data
 
 
+def iter_data_from_kis2(endpoint: str, debug: bool = False) -> Iterator[Dict]:
+    """
+    Этап получения данных: строки эндпоинта по одной.
+    Из снимка БД КИС2 строки читаются курсором порциями, ошибка чтения снимка пробрасывается.
+    Из REST API - из уже разобранного ответа, ошибка запроса - пустой поток (get_data_from_kis2 сам сообщает о ней).
+    """
+    snapshot = active_kis2_snapshot()
+    if snapshot is not None:
+        yield from snapshot.iter_rows(endpoint)
+        return
+    yield from get_data_from_kis2(endpoint, debug) or ()
+
+
+def batched(rows: Iterable, size: int) -> Iterator[List]:
+    """
+    Этап нарезки на порции: списки по size элементов (последний - сколько осталось)
+    """
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
 def get_entity_dict(entity_name: str, name_field: str = "name",
                     default_value: str = "Неизвестно", debug: bool = True) -> Dict[Any, str]:
     """
@@ -696,32 +689,10 @@ def get_order_status(status_id: Optional[int]) -> str:
         return 'Неизвестный статус'
 
 
-def create_orders_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]:
+def iter_orders_from_kis2(debug: bool = True) -> Iterator[Dict[str, Any]]:
     """
-    Получает список заказов из КИС2 через REST API и преобразует их в список словарей.
-
-    Args:
-        debug: Флаг для вывода отладочной информации
-
-    Returns:
-        Список словарей заказов со следующими ключами:
-        - 'serial': Серийный номер заказа (формат NNN-MM-YYYY)
-        - 'name': Название заказа
-        - 'customer': Название компании-заказчика
-        - 'priority': Приоритет заказа (1-10)
-        - 'status': Статус заказа текстом
-        - 'start_moment': Дата и время создания заказа
-        - 'dedline_moment': Крайний срок завершения
-        - 'end_moment': Фактический срок завершения
-        - 'works': Список названий работ по заказу
-        - 'materialsCost': Стоимость материалов
-        - 'materialsPaid': Материалы оплачены (True/False)
-        - 'productsCost': Стоимость товаров
-        - 'productsPaid': Товары оплачены (True/False)
-        - 'workCost': Стоимость работ
-        - 'workPaid': Работы оплачены (True/False)
-        - 'debt': Задолженность
-        - 'debtPaid': Задолженность оплачена (True/False)
+    Заказы из КИС2 по одному: получение -> подстановка названий заказчика и работ вместо id.
+    Ключи словарей - как у create_orders_list_dict_from_kis2.
     """
     # Получаем данные о компаниях
     companies_data = get_data_from_kis2("Company", debug)
@@ -747,16 +718,7 @@ def create_orders_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]
         if debug:
             print(f"Получено {len(works_dict)} работ")
 
-    # Получаем данные о заказах
-    orders_data = get_data_from_kis2("Order", debug)
-    if not orders_data:
-        if debug:
-            print("Не удалось получить данные о заказах")
-        return []
-
-    # Создаем список словарей заказов
-    orders_list = []
-    for order in orders_data:
+    for order in iter_data_from_kis2("Order", debug):
         # Проверяем наличие обязательного ключа
         if "serial" not in order:
             if debug:
@@ -775,8 +737,10 @@ def create_orders_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]
                 if work_id in works_dict:
                     works_list.append(works_dict[work_id])
 
-        # Формируем словарь заказа
-        order_dict = {
+        if debug:
+            print(f"Добавлен заказ: {order['serial']} - {order.get('name', 'Без названия')}")
+
+        yield {
             'serial': order["serial"],
             'name': order.get("name", ""),
             'customer': customer_name,
@@ -796,10 +760,35 @@ def create_orders_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]
             'debtPaid': order.get("debtPaid", False)
         }
 
-        orders_list.append(order_dict)
 
-        if debug:
-            print(f"Добавлен заказ: {order['serial']} - {order.get('name', 'Без названия')}")
+def create_orders_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]:
+    """
+    Получает список заказов из КИС2 через REST API и преобразует их в список словарей.
+
+    Args:
+        debug: Флаг для вывода отладочной информации
+
+    Returns:
+        Список словарей заказов со следующими ключами:
+        - 'serial': Серийный номер заказа (формат NNN-MM-YYYY)
+        - 'name': Название заказа
+        - 'customer': Название компании-заказчика
+        - 'priority': Приоритет заказа (1-10)
+        - 'status': Статус заказа текстом
+        - 'start_moment': Дата и время создания заказа
+        - 'dedline_moment': Крайний срок завершения
+        - 'end_moment': Фактический срок завершения
+        - 'works': Список названий работ по заказу
+        - 'materialsCost': Стоимость материалов
+        - 'materialsPaid': Материалы оплачены (True/False)
+        - 'productsCost': Стоимость товаров
+        - 'productsPaid': Товары оплачены (True/False)
+        - 'workCost': Стоимость работ
+        - 'workPaid': Работы оплачены (True/False)
+        - 'debt': Задолженность
+        - 'debtPaid': Задолженность оплачена (True/False)
+    """
+    orders_list = list(iter_orders_from_kis2(debug))
 
     if debug:
         print(f"Всего получено {len(orders_list)} заказов")
@@ -807,6 +796,49 @@ def create_orders_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]
     return orders_list
 
 
+def iter_box_accounting_from_kis2(debug: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Шкафы (Box_Accounting) из КИС2 по одному: получение -> подстановка ФИО вместо id людей.
+    Ключи словарей - как у create_box_accounting_list_dict_from_kis2.
+    """
+    # Получаем словари для поиска
+    persons_dict = get_persons_dict(debug)
+
+    for box in iter_data_from_kis2("Box_Accounting", debug):
+        # Проверяем наличие необходимых ключей
+        if "serial_num" not in box or "name" not in box:
+            continue
+
+        # Получаем информацию о разработчике схемы
+        scheme_developer_id = box.get("scheme_developer")
+        scheme_developer_name = persons_dict.get(scheme_developer_id, None) if scheme_developer_id else None
+
+        # Получаем информацию о сборщике
+        assembler_id = box.get("assembler")
+        assembler_name = persons_dict.get(assembler_id, None) if assembler_id else None
+
+        # Получаем информацию о программисте (может быть None)
+        programmer_id = box.get("programmer")
+        programmer_name = persons_dict.get(programmer_id, None) if programmer_id else None
+
+        # Получаем информацию о тестировщике
+        tester_id = box.get("tester")
+        tester_name = persons_dict.get(tester_id, None) if tester_id else None
+
+        if debug:
+            print(f"Добавлен шкаф: {box['name']} (S/N: {box['serial_num']})")
+
+        yield {
+            'serial_num': box["serial_num"],
+            'name': box["name"],
+            'order_serial': box.get("order"),
+            'scheme_developer': scheme_developer_name,
+            'assembler': assembler_name,
+            'programmer': programmer_name,
+            'tester': tester_name
+        }
+
+
 def create_box_accounting_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]:
     """
     Создаёт список словарей шкафов (Box_Accounting) из КИС2 через REST API.
@@ -818,91 +850,81 @@ def create_box_accounting_list_dict_from_kis2(debug: bool = True) -> List[Dict[s
         Список словарей шкафов со следующими ключами:
         - 'serial_num': Серийный номер шкафа
         - 'name': Название шкафа
-        - 'order': Заказ (серийный номер заказа)
+        - 'order_serial': Заказ (серийный номер заказа)
         - 'scheme_developer': Разработчик схемы (ФИО одной строкой)
         - 'assembler': Сборщик (ФИО одной строкой)
         - 'programmer': Программист (ФИО одной строкой, может быть None)
         - 'tester': Тестировщик (ФИО одной строкой)
     """
-    # Получаем словари для поиска
-    # orders_dict = get_entity_dict("Order", "serial", "Неизвестный заказ", debug)
-    persons_dict = get_persons_dict(debug)
+    boxes_list = list(iter_box_accounting_from_kis2(debug))
 
-    # Получаем данные о шкафах
-    boxes_data = get_data_from_kis2("Box_Accounting", debug)
-    if not boxes_data:
-        if debug:
-            print("Не удалось получить данные о шкафах")
-        return []
-
-    # Создаем список словарей шкафов
-    boxes_list = []
-    for box in boxes_data:
-        # Проверяем наличие необходимых ключей
-        if "serial_num" in box and "name" in box:
-            # Получаем информацию о заказе
-            order_serial = box.get("order")
-
-            # Получаем информацию о разработчике схемы
-            scheme_developer_id = box.get("scheme_developer")
-            scheme_developer_name = persons_dict.get(scheme_developer_id, None) if scheme_developer_id else None
-
-            # Получаем информацию о сборщике
-            assembler_id = box.get("assembler")
-            assembler_name = persons_dict.get(assembler_id, None) if assembler_id else None
+    if debug:
+        print(f"Получено {len(boxes_list)} шкафов")
 
-            # Получаем информацию о программисте (может быть None)
-            programmer_id = box.get("programmer")
-            programmer_name = persons_dict.get(programmer_id, None) if programmer_id else None
+    return boxes_list
 
-            # Получаем информацию о тестировщике
-            tester_id = box.get("tester")
-            tester_name = persons_dict.get(tester_id, None) if tester_id else None
 
-            # Собираем словарь шкафа
-            box_dict = {
-                'serial_num': box["serial_num"],
-                'name': box["name"],
-                'order_serial': order_serial,
-                'scheme_developer': scheme_developer_name,
-                'assembler': assembler_name,
-                'programmer': programmer_name,
-                'tester': tester_name
-            }
+def _map_task_ids(tasks: Iterable[Dict], persons_dict: Dict, task_statuses_dict: Dict,
+                  payment_statuses_dict: Dict, debug: bool) -> Iterator[Dict[str, Any]]:
+    """
+    Этап подстановки: ФИО исполнителя и названия статусов вместо id
+    """
+    for task in tasks:
+        # Проверяем наличие необходимого ключа name
+        if "name" not in task:
+            continue
 
-            boxes_list.append(box_dict)
+        # Получаем информацию об исполнителе
+        executor_id = task.get("executor")
+        executor_name = persons_dict.get(executor_id, None) if executor_id else None
 
-            if debug:
-                print(f"Добавлен шкаф: {box['name']} (S/N: {box['serial_num']})")
+        # Получаем информацию о статусе задачи
+        status_id = task.get("status")
+        status_name = task_statuses_dict.get(status_id, None) if status_id else None
 
-    if debug:
-        print(f"Получено {len(boxes_list)} шкафов")
+        # Получаем информацию о статусе оплаты
+        payment_status_id = task.get("payment_status_id")
+        payment_status_name = payment_statuses_dict.get(payment_status_id, None) if payment_status_id else None
 
-    return boxes_list
+        if debug:
+            print(f"Добавлена задача: {task['name']} (ID: {task.get('id')}, Исполнитель: {executor_name})")
+
+        yield {
+            'id': task.get("id"),
+            'name': task["name"],
+            'executor': executor_name,  # Используем ФИО вместо ID исполнителя
+            'order_id': task.get("order"),
+            'planned_duration': task.get("planned_duration"),
+            'actual_duration': task.get("actual_duration"),
+            'creation_moment': task.get("creation_moment"),
+            'start_moment': task.get("start_moment"),
+            'end_moment': task.get("end_moment"),
+            'status': status_name,
+            'cost': task.get("cost"),
+            'payment_status': payment_status_name,
+            'root_task_id': task.get("root_task"),
+            'parent_task_id': task.get("parent_task"),
+            'description': task.get("description")
+        }
 
 
-def create_tasks_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]:
+def _normalize_task_durations(tasks: Iterable[Dict]) -> Iterator[Dict[str, Any]]:
     """
-    Создаёт список словарей задач (Task) из КИС2 через REST API.
+    Этап нормализации: длительности задач в timedelta (порциями, см. parse_durations)
+    """
+    for tasks_batch in batched(tasks, DURATION_BATCH_SIZE):
+        planned = parse_durations(task['planned_duration'] for task in tasks_batch)
+        actual = parse_durations(task['actual_duration'] for task in tasks_batch)
+        for task, planned_duration, actual_duration in zip(tasks_batch, planned, actual):
+            task['planned_duration'] = planned_duration
+            task['actual_duration'] = actual_duration
+            yield task
 
-    Args:
-        debug: Флаг для вывода отладочной информации
 
-    Returns:
-        Список словарей задач со следующими ключами:
-        - 'name': Название задачи
-        - 'executor': Исполнитель задачи (ФИО одной строкой)
-        - 'planned_duration': Планируемая продолжительность выполнения задачи
-        - 'actual_duration': Фактическая продолжительность выполнения задачи
-        - 'creation_moment': Дата и время создания задачи
-        - 'start_moment': Дата и время начала выполнения задачи
-        - 'end_moment': Дата и время завершения выполнения задачи
-        - 'status': Статус выполнения задачи
-        - 'cost': Стоимость выполнения задачи
-        - 'payment_status': Статус оплаты за задачу
-        - 'root_task': ID корневой задачи
-        - 'parent_task': ID родительской задачи
-        - 'description': Описание задачи
+def iter_tasks_from_kis2(debug: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Задачи из КИС2 по одной: получение -> подстановка id -> нормализация длительностей.
+    Ключи словарей - как у create_tasks_list_dict_from_kis2.
     """
     # Получаем словари для поиска
     persons_dict = get_persons_dict(debug)
@@ -912,7 +934,7 @@ def create_tasks_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]
     if not task_statuses_data:
         if debug:
             print("Не удалось получить данные о статусах задач")
-        return []
+        return
 
     # Создаем словарь id:name для статусов задач
     task_statuses_dict = {status["id"]: status.get("name", "Неизвестный статус")
@@ -927,7 +949,7 @@ def create_tasks_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]
     if not payment_statuses_data:
         if debug:
             print("Не удалось получить данные о статусах оплаты")
-        return []
+        return
 
     # Создаем словарь id:name для статусов оплаты
     payment_statuses_dict = {status["id"]: status.get("name", "Неизвестный статус оплаты")
@@ -937,58 +959,35 @@ def create_tasks_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]
     if debug:
         print(f"Получено {len(payment_statuses_dict)} статусов оплаты")
 
-    # Получаем данные о задачах
-    tasks_data = get_data_from_kis2("Task", debug)
-    if not tasks_data:
-        if debug:
-            print("Не удалось получить данные о задачах")
-        return []
+    tasks = iter_data_from_kis2("Task", debug)
+    tasks = _map_task_ids(tasks, persons_dict, task_statuses_dict, payment_statuses_dict, debug)
+    yield from _normalize_task_durations(tasks)
 
-    # Создаем список словарей задач
-    tasks_list = []
-    for task in tasks_data:
-        # Проверяем наличие необходимого ключа name
-        if "name" in task:
-            # Получаем информацию об исполнителе
-            executor_id = task.get("executor")
-            executor_name = persons_dict.get(executor_id, None) if executor_id else None
-
-            # Получаем информацию о статусе задачи
-            status_id = task.get("status")
-            status_name = task_statuses_dict.get(status_id, None) if status_id else None
-
-            # Получаем информацию о статусе оплаты
-            payment_status_id = task.get("payment_status_id")
-            payment_status_name = payment_statuses_dict.get(payment_status_id, None) if payment_status_id else None
-
-            # Получаем информацию о корневой задаче
-            root_task_id = task.get("root_task")
-
-            # Получаем информацию о родительской задаче
-            parent_task_id = task.get("parent_task")
-
-            # Собираем словарь задачи
-            task_dict = {
-                'id': task.get("id"),
-                'name': task["name"],
-                'executor': executor_name,  # Используем ФИО вместо ID исполнителя
-                'order_id': task.get("order"),
-                'planned_duration': convert_duration_to_iso8601(task.get("planned_duration")),
-                'actual_duration': convert_duration_to_iso8601(task.get("actual_duration")),
-                'creation_moment': task.get("creation_moment"),
-                'start_moment': task.get("start_moment"),
-                'end_moment': task.get("end_moment"),
-                'status': status_name,
-                'cost': task.get("cost"),
-                'payment_status': payment_status_name,
-                'root_task_id': root_task_id,
-                'parent_task_id': parent_task_id,
-                'description': task.get("description")
-            }
-            tasks_list.append(task_dict)
 
-            if debug:
-                print(f"Добавлена задача: {task['name']} (ID: {task.get('id')}, Исполнитель: {executor_name})")
+def create_tasks_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]:
+    """
+    Создаёт список словарей задач (Task) из КИС2 через REST API.
+
+    Args:
+        debug: Флаг для вывода отладочной информации
+
+    Returns:
+        Список словарей задач со следующими ключами:
+        - 'name': Название задачи
+        - 'executor': Исполнитель задачи (ФИО одной строкой)
+        - 'planned_duration': Планируемая продолжительность выполнения задачи
+        - 'actual_duration': Фактическая продолжительность выполнения задачи
+        - 'creation_moment': Дата и время создания задачи
+        - 'start_moment': Дата и время начала выполнения задачи
+        - 'end_moment': Дата и время завершения выполнения задачи
+        - 'status': Статус выполнения задачи
+        - 'cost': Стоимость выполнения задачи
+        - 'payment_status': Статус оплаты за задачу
+        - 'root_task': ID корневой задачи
+        - 'parent_task': ID родительской задачи
+        - 'description': Описание задачи
+    """
+    tasks_list = list(iter_tasks_from_kis2(debug))
 
     if debug:
         print(f"Получено {len(tasks_list)} задач")
@@ -996,6 +995,38 @@ def create_tasks_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]
     return tasks_list
 
 
+def iter_order_comments_from_kis2(debug: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Комментарии к заказам из КИС2 по одному: получение -> подстановка ФИО автора вместо id.
+    Ключи словарей - как у create_order_comments_list_dict_from_kis2.
+    """
+    # Получаем словари для поиска
+    persons_dict = get_persons_dict(debug)
+
+    for comment in iter_data_from_kis2("OrderComent", debug):
+        # Проверяем наличие необходимых ключей
+        if "text" not in comment:
+            continue
+
+        # Получаем информацию об авторе комментария
+        person_id = comment.get("person")
+        person_name = persons_dict.get(person_id, None) if person_id else None
+
+        # Получаем информацию о заказе
+        order_serial = comment.get("order")
+
+        if debug:
+            text_preview = comment["text"][:50] + "..." if len(comment["text"]) > 50 else comment["text"]
+            print(f"Добавлен комментарий: '{text_preview}' (Автор: {person_name}, Заказ: {order_serial})")
+
+        yield {
+            'moment_of_creation': comment.get("moment_of_creation"),
+            'text': comment["text"],
+            'person': person_name,
+            'order_serial': order_serial
+        }
+
+
 def create_order_comments_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]:
     """
     Создаёт список словарей комментариев к заказам (OrderComent) из КИС2 через REST API.
@@ -1010,46 +1041,62 @@ def create_order_comments_list_dict_from_kis2(debug: bool = True) -> List[Dict[s
         - 'person': ФИО автора комментария (одной строкой)
         - 'order_serial': Серийный номер заказа, к которому относится комментарий
     """
-    # Получаем словари для поиска
-    persons_dict = get_persons_dict(debug)
+    comments_list = list(iter_order_comments_from_kis2(debug))
+
+    if debug:
+        print(f"Получено {len(comments_list)} комментариев к заказам")
+
+    return comments_list
 
-    # Получаем данные о комментариях
-    comments_data = get_data_from_kis2("OrderComent", debug)
-    if not comments_data:
-        if debug:
-            print("Не удалось получить данные о комментариях к заказам")
-        return []
 
-    # Создаем список словарей комментариев
-    comments_list = []
-    for comment in comments_data:
+def _map_timing_ids(timings: Iterable[Dict], persons_dict: Dict) -> Iterator[Dict[str, Any]]:
+    """
+    Этап подстановки: ФИО исполнителя вместо id
+    """
+    for timing in timings:
         # Проверяем наличие необходимых ключей
-        if "text" in comment:
-            # Получаем информацию об авторе комментария
-            person_id = comment.get("person")
-            person_name = persons_dict.get(person_id, None) if person_id else None
-
-            # Получаем информацию о заказе
-            order_serial = comment.get("order")
-
-            # Собираем словарь комментария
-            comment_dict = {
-                'moment_of_creation': comment.get("moment_of_creation"),
-                'text': comment["text"],
-                'person': person_name,
-                'order_serial': order_serial
-            }
+        if "order" not in timing or "task" not in timing:
+            continue
+        yield {
+            'order_serial': timing["order"],
+            'task_id': timing.get("task"),  # Только ID задачи
+            'executor': persons_dict.get(timing.get("executor"), "Неизвестный исполнитель"),  # ФИО строкой
+            'time': timing.get("time"),
+            'date': timing.get("date")
+        }
+
 
-            comments_list.append(comment_dict)
+def _normalize_timing_time(timings: Iterable[Dict], debug: bool) -> Iterator[Dict[str, Any]]:
+    """
+    Этап нормализации: потраченное время в timedelta с точностью до минуты (порциями, см. parse_durations)
+    """
+    for timings_batch in batched(timings, DURATION_BATCH_SIZE):
+        durations = parse_durations(timing['time'] for timing in timings_batch)
+        for timing, time_spent in zip(timings_batch, durations):
+            if time_spent is None:
+                if timing['time']:
+                    # Если формат не соответствует ожидаемому, возвращаем нулевой интервал
+                    print(f"Неподдерживаемый формат времени: {timing['time']}")
+                time_spent = timedelta(0)  # Если время не указано, возвращаем нулевой интервал
+            timing['time'] = truncate_to_minutes(time_spent)
 
             if debug:
-                text_preview = comment["text"][:50] + "..." if len(comment["text"]) > 50 else comment["text"]
-                print(f"Добавлен комментарий: '{text_preview}' (Автор: {person_name}, Заказ: {order_serial})")
+                print(f"Добавлена запись о времени: Заказ {timing['order_serial']}, "
+                      f"Задача ID: {timing['task_id']}, Исполнитель: {timing['executor']}, "
+                      f"Время: {timing['time']}, Дата: {timing['date']}")
+            yield timing
 
-    if debug:
-        print(f"Получено {len(comments_list)} комментариев к заказам")
 
-    return comments_list
+def iter_timings_from_kis2(debug: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Записи о потраченном времени из КИС2 по одной: получение -> подстановка id -> нормализация времени.
+    Ключи словарей - как у create_timings_list_dict_from_kis2.
+    """
+    # Получаем необходимые справочники
+    persons_dict = get_persons_dict(debug)  # Словарь ID:ФИО сотрудников
+
+    timings = _map_timing_ids(iter_data_from_kis2("Timing", debug), persons_dict)
+    yield from _normalize_timing_time(timings, debug)
 
 
 def create_timings_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any]]:
@@ -1062,63 +1109,10 @@ def create_timings_list_dict_from_kis2(debug: bool = True) -> List[Dict[str, Any
         - 'order_serial': Серийный номер заказа
         - 'task_id': ID задачи
         - 'executor': Исполнитель (ФИО одной строкой)
-        - 'time': Потраченное время в формате ISO 8601 (например, "PT5H30M")
+        - 'time': Потраченное время, timedelta с точностью до минуты
         - 'date': Дата тайминга
     """
-    # Получаем необходимые справочники
-    persons_dict = get_persons_dict(debug)  # Словарь ID:ФИО сотрудников
-
-    # Получаем данные о таймингах
-    timings_data = get_data_from_kis2("Timing", debug)
-    if not timings_data:
-        if debug:
-            print("Не удалось получить данные о потраченном времени")
-        return []
-
-    # Создаем список словарей таймингов
-    timings_list = []
-    for timing in timings_data:
-        # Проверяем наличие необходимых ключей
-        if "order" in timing and "task" in timing:
-            # Получаем информацию о заказе
-            order_serial = timing["order"]
-            # Вместо имени задачи используем только ID
-            task_id = timing.get("task")
-            # Получаем информацию об исполнителе
-            executor_id = timing.get("executor")
-            executor_name = persons_dict.get(executor_id, "Неизвестный исполнитель")  # Преобразуем ID в ФИО
-            # Конвертируем время в формат ISO 8601
-            time_spent = timing.get("time")
-            if time_spent:
-                # Используем регулярное выражение для извлечения часов, минут и секунд
-                match = re.match(r"(\d+):(\d+):(\d+)", time_spent)
-                if match:
-                    hours, minutes, seconds = map(int, match.groups())
-                    time_iso = f"PT{hours}H{minutes}M"
-                else:
-                    # Если формат не соответствует ожидаемому, возвращаем нулевой интервал
-                    print(f"Неподдерживаемый формат времени: {time_spent}")
-                    time_iso = "PT0H0M"
-            else:
-                time_iso = "PT0H0M"  # Если время не указано, возвращаем нулевой интервал
-
-            # Получаем дату
-            timing_date = timing.get("date")
-
-            # Собираем словарь тайминга
-            timing_dict = {
-                'order_serial': order_serial,
-                'task_id': task_id,  # Только ID задачи
-                'executor': executor_name,  # ФИО исполнителя строкой
-                'time': time_iso,  # Время в формате ISO 8601
-                'date': timing_date
-            }
-            timings_list.append(timing_dict)
-
-            if debug:
-                print(f"Добавлена запись о времени: Заказ {order_serial}, "
-                      f"Задача ID: {task_id}, Исполнитель: {executor_name}, "
-                      f"Время: {time_iso}, Дата: {timing_date}")
+    timings_list = list(iter_timings_from_kis2(debug))
 
     if debug:
         print(f"Получено {len(timings_list)} записей о потраченном времени")
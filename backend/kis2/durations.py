@@ -0,0 +1,69 @@
+# kis2/durations.py
+"""
+Разбор длительностей КИС2 в timedelta.
+
+REST API КИС2 отдаёт DurationField строкой django.utils.duration.duration_string: '1 01:03:00',
+'00:30:00', '02:00:00.500000'. Раньше строка превращалась в ISO 8601 ('P1DT1H3M0S') и при импорте
+разбиралась обратно; теперь длительность сразу становится timedelta, которую psycopg/asyncpg пишут
+в interval PostgreSQL как есть.
+
+Значений мало и они повторяются (одни и те же '01:00:00', '08:00:00'), поэтому разбор кэшируется:
+каждая уникальная строка разбирается один раз, parse_durations разбирает порцию значений без лишних проверок.
+"""
+import re
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional
+
+# Сколько разных строк длительностей держать в кэше разбора
+DURATION_CACHE_SIZE = 65536
+
+# Формат Django: '[D ]HH:MM:SS[.ffffff]'
+_DJANGO_DURATION_RE = re.compile(r"(?:(\d+) )?(\d+):(\d{2}):(\d{2})(?:\.(\d{1,6}))?")
+
+# Формат ISO 8601, который раньше давал convert_duration_to_iso8601: 'P1DT1H3M0S', 'PT5H30M'
+_ISO_DURATION_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?")
+
+
+@lru_cache(maxsize=DURATION_CACHE_SIZE)
+def _parse_duration_string(value: str) -> Optional[timedelta]:
+    match = _DJANGO_DURATION_RE.fullmatch(value)
+    if match:
+        days, hours, minutes, seconds, fraction = match.groups()
+        return timedelta(days=int(days or 0), hours=int(hours), minutes=int(minutes), seconds=int(seconds),
+                         microseconds=int(fraction.ljust(6, "0")) if fraction else 0)
+    match = _ISO_DURATION_RE.fullmatch(value)
+    if match and value not in ("P", "PT"):
+        days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+        return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
+    return None
+
+
+def parse_duration(value: Any) -> Optional[timedelta]:
+    """
+    Длительность КИС2 в timedelta: строка Django ('1 01:03:00') или ISO 8601 ('P1DT1H3M0S').
+    timedelta возвращается как есть, пустое значение и неизвестный формат - None.
+    """
+    if isinstance(value, timedelta):
+        return value
+    if not value or not isinstance(value, str):
+        return None
+    return _parse_duration_string(value)
+
+
+def parse_durations(values: Iterable[Any]) -> List[Optional[timedelta]]:
+    """
+    Пакетный вариант parse_duration: результат по позициям values.
+    Непустые строки (основной случай) идут сразу в кэш разбора, остальное - через parse_duration.
+    """
+    parse = _parse_duration_string
+    return [parse(value) if value.__class__ is str and value else parse_duration(value) for value in values]
+
+
+def truncate_to_minutes(duration: Optional[timedelta]) -> Optional[timedelta]:
+    """
+    Длительность без секунд (время в таймингах КИС2 учитывается с точностью до минуты)
+    """
+    if duration is None:
+        return None
+    return duration - timedelta(seconds=duration.seconds % 60, microseconds=duration.microseconds)
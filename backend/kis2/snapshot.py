@@ -0,0 +1,217 @@
+# kis2/snapshot.py
+"""
+Чтение данных КИС2 напрямую из снимка её БД (файл db.sqlite3), без Django REST API.
+
+Снимок открывается одним соединением на весь запуск импорта: только чтение (URI mode=ro, query_only),
+файл отображается в память через PRAGMA mmap_size. Пока снимок активен (use_kis2_snapshot),
+get_data_from_kis2 берёт данные отсюда, поэтому все create_*_from_kis2 и этапы импорта работают
+без изменений и без сети.
+
+Строки отдаются в том же виде, что и REST API КИС2: внешние ключи под именами полей сериализатора
+(customer, order, executor, ...), даты и время в ISO 8601 с 'Z', длительности строкой '1 01:03:00',
+логические поля как True/False.
+"""
+import sqlite3
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Сколько байт файла БД отображать в память (SQLite сам ограничит значение сверху)
+SNAPSHOT_MMAP_SIZE = 1024 * 1024 * 1024
+
+# Сколько строк снимка забирать из курсора за раз
+SNAPSHOT_FETCH_SIZE = 5000
+
+# Запросы по эндпоинтам REST API КИС2.
+# datetime - поля DateTimeField (в SQLite хранятся в UTC без зоны),
+# duration - DurationField (в SQLite хранятся целым числом микросекунд), bool - BooleanField (0/1).
+# Заказы, учёт шкафов и задачи идут в порядке ключа: по нему порционный импорт продолжается с контрольной точки
+SNAPSHOT_ENDPOINTS: Dict[str, Dict[str, Any]] = {
+    "Countries": {"sql": "SELECT id, name FROM main_countries"},
+    "Manufacturers": {"sql": "SELECT id, name, country_id AS country FROM main_manufacturers"},
+    "EquipmentType": {"sql": "SELECT id, name FROM main_equipmenttype"},
+    "Money": {"sql": "SELECT id, name FROM main_money"},
+    "City": {"sql": "SELECT id, name FROM main_city"},
+    "CompaniesForm": {"sql": "SELECT id, name FROM main_companiesform"},
+    "Company": {"sql": "SELECT id, name, note, form_id AS form, city_id AS city FROM main_company"},
+    "Person": {
+        "sql": "SELECT id, name, patronymic, surname, phone, email, company_id AS company FROM main_person",
+    },
+    "Work": {"sql": "SELECT id, name, description FROM main_work"},
+    "Order": {
+        "sql": 'SELECT serial, name, customer_id AS customer, priority, status, start_moment, dedline_moment, '
+               'end_moment, "materialsCost", "materialsPaid", "productsCost", "productsPaid", "workCost", '
+               '"workPaid", debt, "debtPaid" FROM main_order ORDER BY serial',
+        "datetime": ("start_moment", "dedline_moment", "end_moment"),
+        "bool": ("materialsPaid", "productsPaid", "workPaid", "debtPaid"),
+    },
+    "Box_Accounting": {
+        "sql": 'SELECT serial_num, name, order_id AS "order", scheme_developer_id AS scheme_developer, '
+               'assembler_id AS assembler, programmer_id AS programmer, tester_id AS tester '
+               'FROM main_box_accounting ORDER BY serial_num',
+    },
+    "TaskStatus": {"sql": "SELECT id, name FROM main_taskstatus"},
+    "PaymentStatus": {"sql": "SELECT id, name FROM main_paymentstatus"},
+    "Task": {
+        "sql": 'SELECT id, name, executor_id AS executor, order_id AS "order", planned_duration, actual_duration, '
+               'creation_moment, start_moment, end_moment, status_id AS status, cost, payment_status_id, '
+               'root_task_id AS root_task, parent_task_id AS parent_task, description FROM main_task '
+               'ORDER BY id',
+        "datetime": ("creation_moment", "start_moment", "end_moment"),
+        "duration": ("planned_duration", "actual_duration"),
+    },
+    "OrderComent": {
+        "sql": 'SELECT id, text, order_id AS "order", person_id AS person, moment_of_creation '
+               'FROM main_ordercoment',
+        "datetime": ("moment_of_creation",),
+    },
+    "Timing": {
+        "sql": 'SELECT id, order_id AS "order", task_id AS task, executor_id AS executor, time, date '
+               'FROM main_timing',
+        "duration": ("time",),
+    },
+    # REST API отдаёт оборудование с обоими вариантами имён внешних ключей,
+    # create_equipments_list_dict_from_kis2 и create_boxes_list_dict_from_kis2 читают разные
+    "Equipment": {
+        "sql": "SELECT id, name, model, vendore_code, description, price, relevance, price_date, "
+               "type_id, manufacturer_id, currency_id, type_id AS type, manufacturer_id AS manufacturer, "
+               "currency_id AS currency FROM main_equipment",
+        "bool": ("relevance",),
+    },
+    "BoxMaterial": {"sql": "SELECT id, name FROM main_boxmaterial"},
+    "BoxIp": {"sql": "SELECT id, name FROM main_boxip"},
+    "Box": {
+        "sql": "SELECT equipment_id AS equipment, material_id AS material, ip_id AS ip, height, width, depth "
+               "FROM main_box",
+    },
+}
+
+
+def _datetime_to_rest(value: Optional[str]) -> Optional[str]:
+    # '2020-02-15 19:27:52' -> '2020-02-15T19:27:52Z', как отдаёт DRF при USE_TZ
+    if not value:
+        return value
+    return value.replace(" ", "T") + "Z"
+
+
+def _duration_to_rest(value: Any) -> Optional[str]:
+    """
+    Микросекунды DurationField -> строка '1 01:03:00' (формат django.utils.duration.duration_string).
+    Строки (TimeField или уже готовая длительность) возвращаются как есть.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    duration = timedelta(microseconds=value)
+    hours, rest = divmod(duration.seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    result = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    if duration.days:
+        result = f"{duration.days} {result}"
+    if duration.microseconds:
+        result += f".{duration.microseconds:06d}"
+    return result
+
+
+def connect_kis2_readonly(path: str, mmap_size: int = SNAPSHOT_MMAP_SIZE) -> sqlite3.Connection:
+    """
+    Соединение с файлом БД КИС2 только на чтение, с отображением файла в память.
+    Несуществующий файл - FileNotFoundError (sqlite3.connect без mode=ro молча создал бы пустую БД).
+    """
+    db_file = Path(path).resolve()
+    if not db_file.is_file():
+        raise FileNotFoundError(f"Файл БД КИС2 не найден: {db_file}")
+    connection = sqlite3.connect(f"{db_file.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA query_only = ON")
+    connection.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    return connection
+
+
+class Kis2Snapshot:
+    """
+    Снимок БД КИС2, открытый только на чтение одним соединением
+    """
+
+    def __init__(self, path: str, mmap_size: int = SNAPSHOT_MMAP_SIZE):
+        self.path = Path(path).resolve()
+        self.connection = connect_kis2_readonly(path, mmap_size)
+
+    def fetch(self, endpoint: str) -> Optional[List[Dict]]:
+        """
+        Строки эндпоинта REST API КИС2 из снимка.
+        None - если эндпоинт неизвестен или таблицы нет в снимке (как ошибка запроса к API).
+        """
+        try:
+            return list(self._iter_rows(endpoint))
+        except (KeyError, sqlite3.Error) as e:
+            print(f"Ошибка чтения {endpoint} из снимка БД КИС2: {e!r}")
+            return None
+
+    def iter_rows(self, endpoint: str) -> Iterator[Dict]:
+        """
+        Строки эндпоинта по одной, из курсора порциями по SNAPSHOT_FETCH_SIZE.
+        Ошибка чтения (в том числе на середине потока) сообщается и пробрасывается дальше:
+        оборванный поток не должен выглядеть как полный, иначе импорт сохранит часть данных как успех.
+        """
+        try:
+            yield from self._iter_rows(endpoint)
+        except (KeyError, sqlite3.Error) as e:
+            print(f"Ошибка чтения {endpoint} из снимка БД КИС2: {e!r}")
+            raise
+
+    def _iter_rows(self, endpoint: str) -> Iterator[Dict]:
+        spec = SNAPSHOT_ENDPOINTS[endpoint]
+        works = self._order_works() if endpoint == "Order" else None
+        cursor = self.connection.execute(spec["sql"])
+        try:
+            while rows := cursor.fetchmany(SNAPSHOT_FETCH_SIZE):
+                for row in rows:
+                    row = dict(row)
+                    for field in spec.get("datetime", ()):
+                        row[field] = _datetime_to_rest(row[field])
+                    for field in spec.get("duration", ()):
+                        row[field] = _duration_to_rest(row[field])
+                    for field in spec.get("bool", ()):
+                        row[field] = bool(row[field])
+                    if works is not None:
+                        row["works"] = works.get(row["serial"], [])
+                    yield row
+        finally:
+            cursor.close()
+
+    def _order_works(self) -> Dict[str, List[int]]:
+        # Работы заказа в REST API - список id из таблицы связи many-to-many
+        works: Dict[str, List[int]] = {}
+        for order_id, work_id in self.connection.execute("SELECT order_id, work_id FROM main_order_works"):
+            works.setdefault(order_id, []).append(work_id)
+        return works
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# Снимок, из которого сейчас читает get_data_from_kis2 (None - работа через REST API)
+_active_snapshot: Optional[Kis2Snapshot] = None
+
+
+def active_kis2_snapshot() -> Optional[Kis2Snapshot]:
+    return _active_snapshot
+
+
+@contextmanager
+def use_kis2_snapshot(path: str, mmap_size: int = SNAPSHOT_MMAP_SIZE) -> Iterator[Kis2Snapshot]:
+    """
+    Переключает получение данных КИС2 на снимок БД на время блока with:
+
+        with use_kis2_snapshot("/backups/kis2/db.sqlite3"):
+            import_all_from_kis2()
+    """
+    global _active_snapshot
+    snapshot = Kis2Snapshot(path, mmap_size)
+    previous, _active_snapshot = _active_snapshot, snapshot
+    try:
+        yield snapshot
+    finally:
+        _active_snapshot = previous
+        snapshot.close()
@@ -2,15 +2,20 @@
 Тут будем доставать данные из бд Sqlite3, которая в КИС2 использована, подключаться к её серверу я пока не стал,
 тупо скопировал файл БД в папку
 когда все эти функции будут переписаны с прямого подключения на API можно буде это файл переместить в папку old
+
+Все функции читают через один общий Kis2Reader: одно соединение только на чтение, справочники (компании,
+люди, работы заказа) подставляются JOIN-ами в SQL, строки идут порциями через fetchmany.
+Замеры - utils/bench_kis2_reader.py.
 """
 # Импорт необходимых библиотек
 # from tabulate import tabulate
 # from colorama import Fore
 from colorama import init
 import sqlite3
-from typing import Set, Dict
+from typing import Any, Dict, Iterator, List, Optional, Set
 from config import DB_PATH
 from kis2.DjangoRestAPI import get_order_status
+from kis2.snapshot import SNAPSHOT_MMAP_SIZE, connect_kis2_readonly
 
 # Инициализация colorama
 init(autoreset=True)
@@ -21,6 +26,154 @@ print("путь к базе: " + db_path)
 # Инициализируем colorama
 init(autoreset=True)
 
+# Сколько строк забирать из курсора за раз
+READER_FETCH_SIZE = 5000
+
+# ФИО одной строкой без пробелов, как в get_dict_person (по этому ключу ищут людей скрипты копирования)
+_FIO_SQL = "{alias}.surname || {alias}.name || {alias}.patronymic"
+
+# Разделитель названий работ в group_concat (в названиях не встречается)
+_WORKS_SEPARATOR = "\x1f"
+
+
+class Kis2Reader:
+    """
+    Чтение БД КИС2 одним соединением только на чтение.
+
+    Справочники подставляются JOIN-ами в SQL, а не словарями в Python, строки отдаются генераторами
+    порциями через fetchmany - память не растёт с размером таблицы.
+    """
+
+    def __init__(self, path: str = DB_PATH, fetch_size: int = READER_FETCH_SIZE,
+                 mmap_size: int = SNAPSHOT_MMAP_SIZE):
+        self.connection = connect_kis2_readonly(path, mmap_size)
+        self.fetch_size = fetch_size
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "Kis2Reader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        return cursor.execute(sql, params).fetchall()
+
+    def iter_rows(self, sql: str, params: tuple = ()) -> Iterator[Dict[str, Any]]:
+        """
+        Строки запроса словарями, из курсора порциями по fetch_size
+        """
+        cursor = self.connection.cursor()
+        # Кортежи + zip быстрее, чем dict(sqlite3.Row) на каждую строку
+        cursor.row_factory = None
+        try:
+            cursor.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(self.fetch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            cursor.close()
+
+    def iter_manufacturers(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows(
+            "SELECT m.name, c.name AS country FROM main_manufacturers m "
+            "LEFT JOIN main_countries c ON c.id = m.country_id")
+
+    def iter_companies(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows(
+            "SELECT co.name, co.note, f.name AS form, ci.name AS city FROM main_company co "
+            "LEFT JOIN main_companiesform f ON f.id = co.form_id "
+            "LEFT JOIN main_city ci ON ci.id = co.city_id")
+
+    def iter_persons(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows(
+            "SELECT p.name, p.patronymic, p.surname, p.phone, p.email, c.name AS company FROM main_person p "
+            "LEFT JOIN main_company c ON c.id = p.company_id")
+
+    def iter_works(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows("SELECT name, description FROM main_work")
+
+    def iter_order_works(self, order_id: str) -> Iterator[str]:
+        for row in self.iter_rows(
+                "SELECT w.name FROM main_order_works ow JOIN main_work w ON w.id = ow.work_id "
+                "WHERE ow.order_id = ? ORDER BY ow.id", (order_id,)):
+            yield row["name"]
+
+    def iter_orders(self) -> Iterator[Dict[str, Any]]:
+        """
+        Заказы с названием заказчика и списком работ: работы собираются group_concat-ом
+        в одном запросе, а не отдельным запросом на каждый заказ
+        """
+        rows = self.iter_rows(
+            'SELECT o.serial, o.name, c.name AS customer, o.priority, o.status, o.start_moment, '
+            'o.dedline_moment, o.end_moment, o."materialsCost", o."materialsPaid", o."productsCost", '
+            'o."productsPaid", o."workCost", o."workPaid", o.debt, o."debtPaid", ow.works '
+            'FROM main_order o '
+            'LEFT JOIN main_company c ON c.id = o.customer_id '
+            'LEFT JOIN (SELECT order_id, group_concat(name, ?) AS works FROM '
+            '    (SELECT ow.order_id, w.name FROM main_order_works ow JOIN main_work w ON w.id = ow.work_id '
+            '     ORDER BY ow.id) GROUP BY order_id) ow ON ow.order_id = o.serial',
+            (_WORKS_SEPARATOR,))
+        for row in rows:
+            yield {
+                'serial': row['serial'],
+                'name': row['name'],
+                'customer': row['customer'],
+                'priority': row['priority'],
+                'status': get_order_status(row['status']),
+                'start_moment': row['start_moment'],
+                'deadline_moment': row['dedline_moment'],
+                'end_moment': row['end_moment'],
+                'works': row['works'].split(_WORKS_SEPARATOR) if row['works'] else [],
+                'materials_cost': row['materialsCost'],
+                'materialsPaid': row['materialsPaid'],
+                'products_cost': row['productsCost'],
+                'productsPaid': row['productsPaid'],
+                'work_cost': row['workCost'],
+                'workPaid': row['workPaid'],
+                'debt': row['debt'],
+                'debtPaid': row['debtPaid'],
+            }
+
+    def iter_box_accounting(self) -> Iterator[Dict[str, Any]]:
+        rows = self.iter_rows(
+            "SELECT b.serial_num, b.name, b.order_id, "
+            f"{_FIO_SQL.format(alias='sd')} AS scheme_developer, {_FIO_SQL.format(alias='a')} AS assembler, "
+            f"{_FIO_SQL.format(alias='pr')} AS programmer, {_FIO_SQL.format(alias='t')} AS tester "
+            "FROM main_box_accounting b "
+            "LEFT JOIN main_person sd ON sd.id = b.scheme_developer_id "
+            "LEFT JOIN main_person a ON a.id = b.assembler_id "
+            "LEFT JOIN main_person pr ON pr.id = b.programmer_id "
+            "LEFT JOIN main_person t ON t.id = b.tester_id")
+        for row in rows:
+            # Программиста может не быть, для него исторически 0
+            row['programmer'] = row['programmer'] or 0
+            yield row
+
+    def iter_order_comments(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows(
+            f"SELECT oc.order_id, oc.text, oc.moment_of_creation, {_FIO_SQL.format(alias='p')} AS person "
+            "FROM main_ordercoment oc LEFT JOIN main_person p ON p.id = oc.person_id")
+
+
+# Общее соединение модуля, открывается при первом обращении
+_reader: Optional[Kis2Reader] = None
+
+
+def get_reader() -> Kis2Reader:
+    global _reader
+    if _reader is None:
+        _reader = Kis2Reader(db_path)
+    return _reader
+
 
 def execute_query(query: str):
     """
@@ -34,15 +187,13 @@ def execute_query(query: str):
         В случае ошибки возвращается пустой список.
     """
     try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute(query)
-            return cur.fetchall()
-    except sqlite3.Error as e:
+        return get_reader().query(query)
+    except (sqlite3.Error, FileNotFoundError) as e:
         print(f"Ошибка при работе с базой данных: {e}")
         return []
 
 
+
 def get_set_countries() -> Set[str]:
     """
     :return: множество названий стран
@@ -72,42 +223,24 @@ def get_list_dict_manufacturers():
     Каждый словарь содержит ключ 'name'-название производителя, ключ 'country' - название страны
     Например - [{'name':'Zentec', country:'Россия'}, {'name':'Segnetics', country:'Россия'}].
     """
-    # формируем множество названий стран, чтоб потом подставить их в список
-    all_countries_dict = get_dict_countries()
     try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM main_manufacturers")
-            all_manufacturers = cur.fetchall()
-            all_manufacturers_list = []
-            for manufacturer in all_manufacturers:
-                # manufacturer[0] - это id записи о производителе
-                # manufacturer[1] - это название производителя
-                # manufacturer[2] - это id страны производителя
-                print(manufacturer)
-                all_manufacturers_list.append(
-                    {'name': manufacturer[1], 'country': all_countries_dict.get(manufacturer[2])})
-            return all_manufacturers_list
-    except sqlite3.Error as e:
+        return list(get_reader().iter_manufacturers())
+    except (sqlite3.Error, FileNotFoundError) as e:
         print(f"Ошибка при работе с базой данных: {e}")
         return []  # empty list
 
 
+
 def get_set_equipment_types():
     """
     :return: множество названий типов оборудования
     Например:{'inductance', 'bushing', 'sensors', 'diode', 'connector'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT name FROM main_equipmenttype")
-            equipment_type_set = {equipment_type[0] for equipment_type in cur.fetchall()}
-            print(f"{len(equipment_type_set)} equipment types in database sqlite3")
-            return equipment_type_set
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return set()
+    results = execute_query("SELECT name FROM main_equipmenttype")
+    equipment_type_set = {equipment_type[0] for equipment_type in results}
+    print(f"{len(equipment_type_set)} equipment types in database sqlite3")
+    return equipment_type_set
+
 
 
 def get_set_cities():
@@ -115,16 +248,11 @@ def get_set_cities():
     :return: множество названий городов
     Например:{'Москва', 'Санкт-Петербург', 'Казань', 'Новосибирск'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT name FROM main_city")
-            cities_set = {city[0] for city in cur.fetchall()}
-            print(f"{len(cities_set)} cities in database sqlite3")
-            return cities_set
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return set()
+    results = execute_query("SELECT name FROM main_city")
+    cities_set = {city[0] for city in results}
+    print(f"{len(cities_set)} cities in database sqlite3")
+    return cities_set
+
 
 
 def get_set_companies_form():
@@ -132,16 +260,11 @@ def get_set_companies_form():
     :return: множество названий форм собственности
     Например:{'ООО', 'ЗАО', 'ПАО', 'АО'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT name FROM main_companiesform")
-            companies_form_set = {company_form[0] for company_form in cur.fetchall()}
-            print(f"{len(companies_form_set)} companies form in database sqlite3")
-            return companies_form_set
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return set()  # пустое множество
+    results = execute_query("SELECT name FROM main_companiesform")
+    companies_form_set = {company_form[0] for company_form in results}
+    print(f"{len(companies_form_set)} companies form in database sqlite3")
+    return companies_form_set
+
 
 
 def get_dict_companies_form():
@@ -149,14 +272,9 @@ def get_dict_companies_form():
     :return: словарь форм компаний (в КИС3 это будут контрагенты).
     Например:{'1': 'ООО', '2': 'ЗАО', '3': 'ПАО', '4': 'АО'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT id, name FROM main_companiesform")
-            return {companiesform_id: name for companiesform_id, name in cur.fetchall()}
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return {}  # пустой словарь
+    results = execute_query("SELECT id, name FROM main_companiesform")
+    return {companiesform_id: name for companiesform_id, name in results}
+
 
 
 def get_dict_cities():
@@ -165,14 +283,9 @@ def get_dict_cities():
     Ключ - id города, значение - название города.
     Например - {1: 'Новосибирск', 2: 'Москва', 3: 'Санкт-Петербург'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT id, name FROM main_city")
-            return {city_id: name for city_id, name in cur.fetchall()}
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return {}  # пустой словарь
+    results = execute_query("SELECT id, name FROM main_city")
+    return {city_id: name for city_id, name in results}
+
 
 
 def get_list_dict_companies():
@@ -183,47 +296,23 @@ def get_list_dict_companies():
     Например - [{'name':'СИБПЛК', 'form': 'ООО', city:'Новосибирск', note:'то мы'},
     {'name':'Вентавтоматика','form': 'ООО', city:'Москва', note:'отличные ребята'}].
     """
-    # формируем необходимые словари
-    dict_companies_form = get_dict_companies_form()
-    dict_cities = get_dict_cities()
     try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM main_company")
-            all_company = cur.fetchall()
-            all_companies_list_dict = []
-            for company in all_company:
-                # company[0] - это id записи о компании
-                # company[1] - это название компании
-                # company[2] - это примечание
-                # company[3] - это id формы компании
-                # company[4] - это id города
-                all_companies_list_dict.append(
-                    {'name': company[1],
-                     'note': company[2],
-                     'form': dict_companies_form[company[3]],
-                     'city': dict_cities[company[4]]
-                     })
-            return all_companies_list_dict
-    except sqlite3.Error as e:
+        return list(get_reader().iter_companies())
+    except (sqlite3.Error, FileNotFoundError) as e:
         print(f"Ошибка при работе с базой данных: {e}")
         return []  # empty list
 
 
+
 def get_dict_companies():
     """
     :return: словарь компаний(в КИС3 это будут контрагенты).
     Ключ - id компании, значение - название компании.
     Например - {1: 'СИБПЛК', 2: 'Вентавтоматика'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT id, name FROM main_company")
-            return {company_id: name for company_id, name in cur.fetchall()}
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return {}  # пустой словарь
+    results = execute_query("SELECT id, name FROM main_company")
+    return {company_id: name for company_id, name in results}
+
 
 
 def get_set_person():
@@ -231,16 +320,11 @@ def get_set_person():
     :return: множество людей
     Например - {'Воронов Максим Владимирович','Иванов Иван Иванович', 'Петров Пётр Петрович'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT surname,name,patronymic FROM main_person")
-            person_set = {person[0] + person[1] + person[2] for person in cur.fetchall()}
-            print(f"{len(person_set)} persons in database sqlite3")
-            return person_set
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return set()
+    results = execute_query("SELECT surname, name, patronymic FROM main_person")
+    person_set = {person[0] + person[1] + person[2] for person in results}
+    print(f"{len(person_set)} persons in database sqlite3")
+    return person_set
+
 
 
 def get_list_dict_person():
@@ -259,36 +343,14 @@ def get_list_dict_person():
         },
     ]
     """
-    # формируем необходимые словари
-    dict_companies = get_dict_companies()  # словарь компаний
     try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM main_person")
-            all_person = cur.fetchall()
-            all_person_list_dict = []
-            for person in all_person:
-                # person[0] - id записи о человеке
-                # person[1] - имя
-                # person[2] - отчество
-                # person[3] - фамилия
-                # person[4] - телефон
-                # person[5] - email
-                # person[6] - company_id
-                all_person_list_dict.append({
-                    'name': person[1],
-                    'patronymic': person[2],
-                    'surname': person[3],
-                    'phone': person[4],
-                    'email': person[5],
-                    'company': dict_companies[person[6]]
-                })
-            return all_person_list_dict  # список словарей людей
-    except sqlite3.Error as e:
+        return list(get_reader().iter_persons())
+    except (sqlite3.Error, FileNotFoundError) as e:
         print(f"Ошибка при работе с базой данных: {e}")
         return []  # empty list
 
 
+
 def get_dict_person():
     """
     :return: словарь людей, ключ - id человека, значение - фамилия, имя, отчество,
@@ -297,15 +359,9 @@ def get_dict_person():
     2:'Иванов Иван Иванович',
     3:'Петров Пётр Петрович'}
     """
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT id, surname, name, patronymic FROM main_person")
-            person_dic = {person[0]: person[1] + person[2] + person[3] for person in cur.fetchall()}
-            return person_dic
-    except sqlite3.Error as e:
-        print(f"Ошибка при работе с базой данных: {e}")
-        return set()
+    results = execute_query(f"SELECT id, {_FIO_SQL.format(alias='p')} FROM main_person p")
+    return {person_id: full_name for person_id, full_name in results}
+
 
 
 def get_set_work():
@@ -341,16 +397,12 @@ def get_list_dict_work():
     Например - [{'name':'Продажа товаров', 'description':'Продаём товары',
     'name':'Сборка ША', 'description':'собираем шкаф автоматики'},
     """
-    results = execute_query("SELECT name, description FROM main_work")
-    all_work_list_dict = []
-    for work in results:
-        # work[0] - название работы
-        # work[1] - описание
-        all_work_list_dict.append({
-            'name': work[0],
-            'description': work[1],
-        })
-    return all_work_list_dict  # список словарей людей
+    try:
+        return list(get_reader().iter_works())
+    except (sqlite3.Error, FileNotFoundError) as e:
+        print(f"Ошибка при работе с базой данных: {e}")
+        return []  # empty list
+
 
 
 def get_set_orders():
@@ -371,13 +423,12 @@ def get_list_works(order_id: str):
     :return: Список работ выполняемых по заказу, в виде строк
     Например - ['Продажа товаров', 'Сборка ША']
     """
-    dict_works = get_dict_works()
-    query = f"SELECT work_id FROM main_order_works WHERE order_id = '{order_id}'"
-    results = execute_query(query)
-    works_list = []
-    for work in results:
-        works_list.append(dict_works[work[0]])
-    return works_list
+    try:
+        return list(get_reader().iter_order_works(order_id))
+    except (sqlite3.Error, FileNotFoundError) as e:
+        print(f"Ошибка при работе с базой данных: {e}")
+        return []
+
 
 
 def get_list_dict_orders():
@@ -432,48 +483,12 @@ def get_list_dict_orders():
         },
     ]
     """
-    results = execute_query(
-        "SELECT serial, name, customer_id, priority, status, start_moment, dedline_moment, end_moment, materialsCost,"
-        " materialsPaid, productsCost, productsPaid, workCost, workPaid, debt, debtPaid FROM main_order")
-    all_order_list_dict = []
-    dict_companies = get_dict_companies()
-    for order in results:
-        # order[0] - serial
-        # order[1] - name
-        # order[2] - customer_id
-        # order[3] - priority
-        # order[4] - status
-        # order[5] - start_moment
-        # order[6] - dedline_moment
-        # order[7] - end_moment
-        # order[8] - materialsCost
-        # order[9] - materialsPaid
-        # order[10] - productsCost
-        # order[11] - productsPaid
-        # order[12] - workCost
-        # order[13] - workPaid
-        # order[14] - debt
-        # order[15] - debtPaid
-        all_order_list_dict.append({
-            'serial': order[0],
-            'name': order[1],
-            'customer': dict_companies[order[2]],
-            'priority': order[3],
-            'status': get_order_status(order[4]),
-            'start_moment': order[5],
-            'deadline_moment': order[6],
-            'end_moment': order[7],
-            'works': get_list_works(order[0]),
-            'materials_cost': order[8],
-            'materialsPaid': order[9],
-            'products_cost': order[10],
-            'productsPaid': order[11],
-            'work_cost': order[12],
-            'workPaid': order[13],
-            'debt': order[14],
-            'debtPaid': order[15],
-        })
-    return all_order_list_dict  # список словарей заказов 'work_cost': get_list_works(order[0]),
+    try:
+        return list(get_reader().iter_orders())
+    except (sqlite3.Error, FileNotFoundError) as e:
+        print(f"Ошибка при работе с базой данных: {e}")
+        return []  # empty list
+
 
 
 def get_list_dict_box_accounting():
@@ -488,34 +503,12 @@ def get_list_dict_box_accounting():
         'programmer_id' - программист,
         'tester_id' - тестировщик,
     """
-    dict_person = get_dict_person()
-    results = execute_query(
-        "SELECT serial_num, name, order_id, scheme_developer_id, assembler_id, programmer_id, tester_id"
-        "  FROM main_box_accounting")
-    all_box_accounting_list_dict = []
-    for res in results:
-        # res[0] - serial_num
-        # res[1] - name
-        # res[2] - order_id
-        # res[3] - scheme_developer_id
-        # res[4] - assembler_id
-        # res[5] - programmer_id
-        # res[6] - tester_id
-        if res[5]:
-            programmer_id = dict_person[res[5]]
-        else:
-            programmer_id = 0
-        all_box_accounting_list_dict.append({
-            'serial_num': res[0],
-            'name': res[1],
-            'order_id': res[2],
-            'scheme_developer': dict_person[res[3]],
-            'assembler': dict_person[res[4]],
-            'programmer': programmer_id,
-            'tester': dict_person[res[6]],
-        })
-
-    return all_box_accounting_list_dict
+    try:
+        return list(get_reader().iter_box_accounting())
+    except (sqlite3.Error, FileNotFoundError) as e:
+        print(f"Ошибка при работе с базой данных: {e}")
+        return []
+
 
 
 def get_list_dict_order_comment():
@@ -527,23 +520,12 @@ def get_list_dict_order_comment():
         'moment_of_creation' - дата создания,
         'person_id' - автор комментария,
     """
-    dict_person = get_dict_person()
-    results = execute_query(
-        "SELECT order_id, text, moment_of_creation, person_id FROM main_ordercoment")
-    all_order_comment_list_dict = []
-    for res in results:
-        # res[0] - order_id
-        # res[1] - text
-        # res[2] - moment_of_creation
-        # res[3] - person_id
-        all_order_comment_list_dict.append({
-            'order_id': res[0],
-            'text': res[1],
-            'moment_of_creation': res[2],
-            'person': dict_person[res[3]],
-        })
-
-    return all_order_comment_list_dict
+    try:
+        return list(get_reader().iter_order_comments())
+    except (sqlite3.Error, FileNotFoundError) as e:
+        print(f"Ошибка при работе с базой данных: {e}")
+        return []
+
 
 
 def print_list(list_for_print: list):
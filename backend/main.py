@@ -6,6 +6,7 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import HTMLResponse
 from sqlalchemy import text  # Импортируем text для запроса
@@ -22,6 +23,9 @@ from routers.people_router import router as people_router
 from routers.counterparty_router import router as counterparty_router
 from routers.work_router import router as work_router
 from routers.comments_router import router as comments_router
+from routers.task_router import router as task_router
+from routers.analytics_router import router as analytics_router
+from routers.equipment_router import router as equipment_router
 
 # Импортируем фабрику сессий из вашего модуля database
 from database import async_session_maker
@@ -101,8 +105,9 @@ async def lifespan(_: FastAPI): # <-- Вот так, чтобы показать
 # --- Конец фоновой задачи ---
 
 
-# Создаем приложение FastAPI с lifespan менеджером
-app = FastAPI(root_path="/api", lifespan=lifespan)
+# Создаем приложение FastAPI с lifespan менеджером.
+# Ответы по умолчанию сериализуются orjson вместо стандартного json
+app = FastAPI(root_path="/api", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 app.include_router(comments_router)
@@ -115,6 +120,9 @@ app.include_router(order_router)
 app.include_router(people_router)
 app.include_router(counterparty_router)
 app.include_router(work_router)
+app.include_router(task_router)
+app.include_router(analytics_router)
+app.include_router(equipment_router)
 
 # Настройка CORS
 app.add_middleware(
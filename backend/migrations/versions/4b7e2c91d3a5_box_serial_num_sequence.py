@@ -0,0 +1,37 @@
+"""box serial_num sequence
+
+Revision ID: 4b7e2c91d3a5
+Revises: da2746c002ab
+Create Date: 2026-10-19 13:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91d3a5'
+down_revision: Union[str, None] = 'da2746c002ab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Последовательность могла быть создана ещё первой миграцией (SERIAL),
+    # но отставать от данных из-за импорта шкафов с явными номерами
+    op.execute("CREATE SEQUENCE IF NOT EXISTS box_accounting_serial_num_seq OWNED BY box_accounting.serial_num")
+    op.alter_column('box_accounting', 'serial_num',
+                    existing_type=sa.Integer(),
+                    server_default=sa.text("nextval('box_accounting_serial_num_seq'::regclass)"),
+                    existing_nullable=False)
+    # Выравниваем последовательность по текущему максимальному номеру
+    op.execute("SELECT setval('box_accounting_serial_num_seq', "
+               "COALESCE((SELECT MAX(serial_num) FROM box_accounting), 0) + 1, false)")
+
+
+def downgrade() -> None:
+    # Последовательность и default не удаляем: у колонки SERIAL из первой миграции они уже были,
+    # а выдача номеров через max() + 1 с ними тоже работает
+    pass
@@ -0,0 +1,49 @@
+"""foreign key indexes
+
+Revision ID: a93d5f6c1e07
+Revises: 7c15e0a4b2d8
+Create Date: 2026-10-19 16:20:47.091533
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93d5f6c1e07'
+down_revision: Union[str, None] = '7c15e0a4b2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Postgres не создаёт индексы на колонки внешних ключей сам.
+# (таблица, колонка) - по этим колонкам идут фильтры и JOIN'ы
+FK_INDEXES = (
+    ('tasks', 'order_serial'),
+    ('tasks', 'executor_uuid'),
+    ('tasks', 'parent_task_id'),
+    ('tasks', 'root_task_id'),
+    ('timings', 'order_serial'),
+    ('timings', 'task_id'),
+    ('timings', 'executor_id'),
+    ('comments_on_orders', 'order_id'),
+    ('comments_on_orders', 'person_uuid'),
+    ('people', 'counterparty_id'),
+    ('orders', 'customer_id'),
+    ('orders', 'status_id'),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не блокирует запись в таблицы, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        for table, column in FK_INDEXES:
+            op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, column in reversed(FK_INDEXES):
+            op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table,
+                          postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""order financial exposure materialized view
+
+Revision ID: f5d83a27c910
+Revises: e71b9d04c6a2
+Create Date: 2026-10-19 19:47:38.650219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5d83a27c910'
+down_revision: Union[str, None] = 'e71b9d04c6a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Неоплаченные суммы по (статус, заказчик), см. utils/financial_exposure.py
+    op.execute("""
+        CREATE MATERIALIZED VIEW order_financial_exposure AS
+        SELECT status_id,
+               customer_id,
+               COALESCE(SUM(materials_cost) FILTER (WHERE materials_paid IS NOT TRUE), 0) AS materials,
+               COALESCE(SUM(products_cost) FILTER (WHERE products_paid IS NOT TRUE), 0) AS products,
+               COALESCE(SUM(work_cost) FILTER (WHERE work_paid IS NOT TRUE), 0) AS work,
+               COALESCE(SUM(debt) FILTER (WHERE debt_paid IS NOT TRUE), 0) AS debt,
+               COUNT(*) FILTER (WHERE (materials_paid IS NOT TRUE AND materials_cost > 0)
+                                   OR (products_paid IS NOT TRUE AND products_cost > 0)
+                                   OR (work_paid IS NOT TRUE AND work_cost > 0)) AS orders_with_payables,
+               COUNT(*) FILTER (WHERE debt_paid IS NOT TRUE AND debt > 0) AS orders_with_debt
+        FROM orders
+        GROUP BY status_id, customer_id
+    """)
+    # Уникальный индекс нужен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("CREATE UNIQUE INDEX ix_order_financial_exposure_status_id_customer_id "
+               "ON order_financial_exposure (status_id, customer_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS order_financial_exposure")
@@ -3,7 +3,9 @@
 Модуль для работы с базой данных через SQLAlchemy
 """
 
-from sqlalchemy import MetaData, Integer, String, ForeignKey, Date, Boolean, Text, DateTime, Table
+from sqlalchemy import MetaData, Integer, BigInteger, String, ForeignKey, Date, Boolean, Text, DateTime, Table
+from sqlalchemy import Float
+from sqlalchemy import func, text
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import validates
 from sqlalchemy.orm import DeclarativeBase
@@ -13,6 +15,8 @@ from sqlalchemy.orm import relationship  # используется для св
 from sqlalchemy import Interval  # Импортируем Interval для работы с временными интервалами
 import uuid
 from sqlalchemy import Column
+from sqlalchemy import Index
+from sqlalchemy import Sequence
 from sqlalchemy.dialects.postgresql import UUID
 
 from typing import Optional
@@ -125,7 +129,7 @@ class Person(Base):
     surname: Mapped[str] = mapped_column(String, nullable=False)  # Фамилия
     phone: Mapped[str | None] = mapped_column(String, nullable=True)  # Телефон
     email: Mapped[str | None] = mapped_column(String, nullable=True)  # Email
-    counterparty_id: Mapped[int | None] = mapped_column(ForeignKey('counterparty.id'), nullable=True)
+    counterparty_id: Mapped[int | None] = mapped_column(ForeignKey('counterparty.id'), nullable=True, index=True)
     # Человек может не иметь принадлежности ни к одной компании
     birth_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     active: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -210,10 +214,12 @@ class Order(Base):
     # MM - месяц создания
     # YYYY - год создания
     name: Mapped[str] = mapped_column(String(64), nullable=False)  # Название
-    customer_id: Mapped[int] = mapped_column(ForeignKey('counterparty.id'), nullable=False)  # id заказчика
+    # id заказчика
+    customer_id: Mapped[int] = mapped_column(ForeignKey('counterparty.id'), nullable=False, index=True)
     customer: Mapped["Counterparty"] = relationship(back_populates="orders", foreign_keys=[customer_id])
     priority: Mapped[int | None] = mapped_column(Integer, nullable=True)  # Приоритет от 1 до 10
-    status_id: Mapped[int] = mapped_column(ForeignKey('order_statuses.id'), nullable=False)  # Статус заказа
+    # Статус заказа
+    status_id: Mapped[int] = mapped_column(ForeignKey('order_statuses.id'), nullable=False, index=True)
     status: Mapped["OrderStatus"] = relationship(back_populates="orders")
     start_moment: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # Дата и время создания
     deadline_moment: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # Дата и время дедлайна
@@ -261,17 +267,25 @@ class Order(Base):
         return f"Order(serial={self.serial!r}, name={self.name!r})"
 
 
+# Последовательность серийных номеров шкафов (см. utils/box_serials.py)
+box_serial_num_seq = Sequence('box_accounting_serial_num_seq')
+
+
 class BoxAccounting(Base):
     """Таблица учёта шкафов """
     __tablename__ = 'box_accounting'
-    serial_num: Mapped[int] = mapped_column(primary_key=True, unique=True)
+    serial_num: Mapped[int] = mapped_column(box_serial_num_seq, primary_key=True, unique=True)
     name: Mapped[str] = mapped_column(String(64), nullable=False)  # Название шкафа
-    order_id: Mapped[str] = mapped_column(ForeignKey('orders.serial'), nullable=False)  # Заказ
+    # Заказ
+    order_id: Mapped[str] = mapped_column(ForeignKey('orders.serial'), nullable=False, index=True)
     # Разработчик схемы
-    scheme_developer_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('people.uuid'), nullable=False)
-    assembler_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('people.uuid'), nullable=False)  # Сборщик
-    programmer_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey('people.uuid'), nullable=True)  # Программист
-    tester_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('people.uuid'), nullable=False)  # Тестировщик
+    scheme_developer_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('people.uuid'), nullable=False, index=True)
+    # Сборщик
+    assembler_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('people.uuid'), nullable=False, index=True)
+    # Программист
+    programmer_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey('people.uuid'), nullable=True, index=True)
+    # Тестировщик
+    tester_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('people.uuid'), nullable=False, index=True)
 
     # Определяем отношения. Пока не знаю зачем
     order = relationship("Order", back_populates="boxes")
@@ -286,11 +300,12 @@ class OrderComment(Base):
     """Таблица комментариев к заказам """
     __tablename__ = 'comments_on_orders'
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    order_id: Mapped[str] = mapped_column(ForeignKey('orders.serial'), nullable=False)  # Заказ
+    order_id: Mapped[str] = mapped_column(ForeignKey('orders.serial'), nullable=False, index=True)  # Заказ
     moment_of_creation: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.now,
                                                                    nullable=True)  # Дата и время публикации комментария
     text: Mapped[str] = mapped_column(Text, nullable=False)  # Текст комментария
-    person_uuid: Mapped[int] = mapped_column(ForeignKey('people.uuid'), nullable=False)  # Автор комментария
+    # Автор комментария
+    person_uuid: Mapped[int] = mapped_column(ForeignKey('people.uuid'), nullable=False, index=True)
 
     # relations
     order: Mapped["Order"] = relationship(back_populates="comments")
@@ -350,7 +365,7 @@ class Task(Base):
     description: Mapped[str | None] = mapped_column(String, nullable=True)
     status_id: Mapped[int] = mapped_column(ForeignKey('task_statuses.id'), nullable=True)
     payment_status_id: Mapped[int] = mapped_column(ForeignKey('payment_statuses.id'), nullable=True) #  Пока не отслеживаем
-    executor_uuid: Mapped[int] = mapped_column(ForeignKey('people.uuid'), nullable=True)
+    executor_uuid: Mapped[int] = mapped_column(ForeignKey('people.uuid'), nullable=True, index=True)
 
     # Запланированное время на выполнение задачи
     planned_duration: Mapped[Optional[timedelta]] = mapped_column(Interval, nullable=True)
@@ -379,14 +394,14 @@ class Task(Base):
     timings: Mapped[List["Timing"]] = relationship(back_populates="task")
 
     # Связь с заказами
-    order_serial: Mapped[Optional[str]] = mapped_column(ForeignKey('orders.serial'), nullable=True)
+    order_serial: Mapped[Optional[str]] = mapped_column(ForeignKey('orders.serial'), nullable=True, index=True)
     order: Mapped[Optional["Order"]] = relationship(back_populates="tasks")
 
     # Ссылка на родительскую задачу
-    parent_task_id: Mapped[Optional[int]] = mapped_column(ForeignKey('tasks.id'), nullable=True)
+    parent_task_id: Mapped[Optional[int]] = mapped_column(ForeignKey('tasks.id'), nullable=True, index=True)
 
     # Ссылка на корневую задачу
-    root_task_id: Mapped[Optional[int]] = mapped_column(ForeignKey('tasks.id'), nullable=True)
+    root_task_id: Mapped[Optional[int]] = mapped_column(ForeignKey('tasks.id'), nullable=True, index=True)
 
     # Связи с явным указанием foreign_keys
     parent_task: Mapped["Task"] = relationship(
@@ -434,6 +449,12 @@ class Equipment(Base):
     Класс "Оборудование"
     """
     __tablename__ = 'equipment'
+    __table_args__ = (
+        # Фильтры каталога (routers/equipment_router.py) вместе с keyset-порядком по id
+        Index('ix_equipment_type_id_id', 'type_id', 'id'),
+        Index('ix_equipment_manufacturer_id_id', 'manufacturer_id', 'id'),
+        Index('ix_equipment_price', 'price'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(64), nullable=False)  # Имя
@@ -470,6 +491,18 @@ class Equipment(Base):
         return f"Equipment(id={self.id!r}, name={self.name!r}, model={self.model!r})"
 
 
+# Полнотекстовый поиск по названию и описанию оборудования. Поиск в каталоге использует это же выражение,
+# иначе GIN-индекс ix_equipment_search не применяется. Константы - text(), а не параметры запроса:
+# выражение должно совпадать с индексом и в подготовленных запросах asyncpg
+EQUIPMENT_SEARCH_CONFIG = text("'russian'::regconfig")
+equipment_search_vector = func.to_tsvector(
+    EQUIPMENT_SEARCH_CONFIG,
+    func.coalesce(Equipment.__table__.c.name, text("''")).op('||')(text("' '"))
+    .op('||')(func.coalesce(Equipment.__table__.c.description, text("''")))
+)
+Index('ix_equipment_search', equipment_search_vector, postgresql_using='gin')
+
+
 class ControlCabinetMaterial(Base):
     __tablename__ = 'control_cabinet_materials'
 
@@ -499,6 +532,12 @@ class ControlCabinet(Equipment):
     Корпуса шкафов автоматики
     """
     __tablename__ = 'control_cabinets'
+    __table_args__ = (
+        # Фильтры каталога по степени защиты, материалу и габаритам корпуса
+        Index('ix_control_cabinets_ip_id', 'ip_id'),
+        Index('ix_control_cabinets_material_id', 'material_id'),
+        Index('ix_control_cabinets_dimensions', 'height', 'width', 'depth'),
+    )
     id = Column(Integer, ForeignKey('equipment.id'), primary_key=True)
 
     __mapper_args__ = {
@@ -522,9 +561,10 @@ class Timing(Base):
     __tablename__ = 'timings'
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    order_serial: Mapped[str] = mapped_column(ForeignKey('orders.serial'), nullable=False)  # Заказ
-    task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id'), nullable=False)  # Задача
-    executor_id: Mapped[Optional[int]] = mapped_column(ForeignKey('people.uuid'), nullable=True)  # Исполнитель
+    order_serial: Mapped[str] = mapped_column(ForeignKey('orders.serial'), nullable=False, index=True)  # Заказ
+    task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id'), nullable=False, index=True)  # Задача
+    # Исполнитель
+    executor_id: Mapped[Optional[int]] = mapped_column(ForeignKey('people.uuid'), nullable=True, index=True)
     time: Mapped[timedelta] = mapped_column(Interval, nullable=False)  # Потраченное время
     timing_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)  # Дата тайминга
 
@@ -540,6 +580,118 @@ class Timing(Base):
         return f"Timing(id={self.id!r}, order_serial={self.order_serial!r}, task_id={self.task_id!r})"
 
 
+class TaskRollup(Base):
+    """
+    Сводка по задаче и всем её подзадачам: время из таймингов, длительности, стоимость.
+    Пересчитывается при изменении задач и таймингов (utils/rollups.py), читается одной строкой.
+    """
+    __tablename__ = 'task_rollups'
+
+    task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True)
+    logged_time: Mapped[timedelta] = mapped_column(Interval, nullable=False)  # Время по таймингам самой задачи
+    subtree_logged_time: Mapped[timedelta] = mapped_column(Interval, nullable=False)  # Время по таймингам поддерева
+    # Сумма запланированных и фактических длительностей задач поддерева
+    subtree_planned_duration: Mapped[Optional[timedelta]] = mapped_column(Interval, nullable=True)
+    subtree_actual_duration: Mapped[Optional[timedelta]] = mapped_column(Interval, nullable=True)
+    subtree_price: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # Сумма стоимостей задач, руб
+    subtree_tasks: Mapped[int] = mapped_column(Integer, nullable=False)  # Задач в поддереве (с самой задачей)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)  # Момент последнего пересчёта
+
+
+class OrderRollup(Base):
+    """
+    Сводка по заказу: время из таймингов, длительности и стоимость задач.
+    Пересчитывается при изменении задач и таймингов (utils/rollups.py), читается одной строкой.
+    """
+    __tablename__ = 'order_rollups'
+
+    order_serial: Mapped[str] = mapped_column(ForeignKey('orders.serial', ondelete='CASCADE'), primary_key=True)
+    logged_time: Mapped[timedelta] = mapped_column(Interval, nullable=False)  # Время по таймингам заказа
+    planned_duration: Mapped[Optional[timedelta]] = mapped_column(Interval, nullable=True)  # Сумма по задачам заказа
+    actual_duration: Mapped[Optional[timedelta]] = mapped_column(Interval, nullable=True)  # Сумма по задачам заказа
+    price: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # Сумма стоимостей задач заказа, руб
+    tasks_count: Mapped[int] = mapped_column(Integer, nullable=False)  # Количество задач заказа
+    timings_count: Mapped[int] = mapped_column(Integer, nullable=False)  # Количество таймингов заказа
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)  # Момент последнего пересчёта
+
+
+class TimingDailyRollup(Base):
+    """
+    Тайминги, сложенные по дням: исполнитель + заказ + дата -> суммарное время.
+    Аналитика часов по людям, заказам и работам читает эту таблицу, а не все тайминги.
+    Пересчитывается по затронутым датам при изменении таймингов (utils/rollups.py).
+    На исполнителя, заказ и дату - одна строка (NULL считается одинаковым значением).
+    """
+    __tablename__ = 'timing_daily_rollups'
+    __table_args__ = (
+        Index('ix_timing_daily_rollups_executor_id_timing_date', 'executor_id', 'timing_date'),
+        Index('ix_timing_daily_rollups_order_serial_timing_date', 'order_serial', 'timing_date'),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    timing_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True, index=True)  # Дата таймингов
+    # Исполнитель
+    executor_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey('people.uuid', ondelete='CASCADE'),
+                                                             nullable=True)
+    # Заказ
+    order_serial: Mapped[str] = mapped_column(ForeignKey('orders.serial', ondelete='CASCADE'), nullable=False)
+    total_time: Mapped[timedelta] = mapped_column(Interval, nullable=False)  # Суммарное время за день
+    timings_count: Mapped[int] = mapped_column(Integer, nullable=False)  # Количество таймингов за день
+
+
+# Уникальный ключ сводки. NULL (тайминг без даты или без исполнителя) заменяется константой, иначе такие строки
+# не считались бы повторами; в отличие от NULLS NOT DISTINCT (PostgreSQL 15+) работает в любой версии
+Index(
+    'uq_timing_daily_rollups_date_executor_order',
+    func.coalesce(TimingDailyRollup.__table__.c.timing_date, text("'-infinity'::date")),
+    func.coalesce(TimingDailyRollup.__table__.c.executor_id, text("'00000000-0000-0000-0000-000000000000'::uuid")),
+    TimingDailyRollup.__table__.c.order_serial,
+    unique=True,
+)
+
+
+class ImportRun(Base):
+    """
+    История запусков импорта из КИС2: объёмы, время получения данных и работы с БД, скорость.
+    Пишется после каждого import_*_from_kis2 (utils/import_history.py).
+    """
+    __tablename__ = 'import_runs'
+    __table_args__ = (
+        Index('ix_import_runs_entity_started_at', 'entity', 'started_at'),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    entity: Mapped[str] = mapped_column(String(32), nullable=False)  # Что импортировалось: orders, tasks, ...
+    source: Mapped[str] = mapped_column(String(16), nullable=False)  # rest - REST API КИС2, snapshot - снимок БД
+    status: Mapped[str] = mapped_column(String(16), nullable=False)  # success или error
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    fetched: Mapped[int] = mapped_column(Integer, nullable=False)  # Строк получено из КИС2
+    added: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated: Mapped[int] = mapped_column(Integer, nullable=False)
+    unchanged: Mapped[int] = mapped_column(Integer, nullable=False)
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False)  # Получено, но не обработано импортом
+    batch_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Размер порции, None - без порций
+    fetch_seconds: Mapped[float] = mapped_column(Float, nullable=False)  # Время получения данных из КИС2, с
+    db_seconds: Mapped[float] = mapped_column(Float, nullable=False)  # Остальное время запуска: работа с БД, с
+    rows_per_second: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # fetched / общее время
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+
+class ImportCheckpoint(Base):
+    """
+    Последняя сохранённая порция незавершённого импорта из КИС2 (utils/import_checkpoints.py).
+    Обновляется в той же транзакции, что и порция; после успешного импорта строка удаляется.
+    """
+    __tablename__ = 'import_checkpoints'
+
+    entity: Mapped[str] = mapped_column(String(32), primary_key=True)  # orders, tasks, box_accounting
+    rows_done: Mapped[int] = mapped_column(Integer, nullable=False)  # Строк потока КИС2 в сохранённых порциях
+    last_key: Mapped[str] = mapped_column(String(64), nullable=False)  # Ключ последней строки сохранённой порции
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
 class User(AsyncAttrs, Base):
     __tablename__ = "users"
 
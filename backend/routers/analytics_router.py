@@ -0,0 +1,195 @@
+# routers/analytics_router.py
+"""
+Аналитика:
+- часы по таймингам: по людям, заказам и видам работ за период. Данные берутся из таблицы
+  timing_daily_rollups (тайминги, уже сложенные по исполнителю, заказу и дню), поэтому отчёт
+  за несколько лет читает тысячи строк сводки, а не все тайминги;
+- финансовая нагрузка по заказам (utils/financial_exposure.py).
+"""
+import uuid
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from loguru import logger
+from sqlalchemy import Date, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.jwt_auth import get_current_auth_user
+from database import get_async_db
+from models import TimingDailyRollup, Work, order_work
+from models import User as UserModel
+from schemas.analytics_schem import PersonHours, OrderHours, WorkHours
+from schemas.analytics_schem import ExposureAmounts, StatusExposure, CustomerExposure, FinancialExposure
+from utils.counterparty_names import customer_display_name
+from utils.financial_exposure import load_financial_exposure
+from utils.person_directory import person_directory
+from utils.projection import model_response, rows_to_dicts, ProjectionResponse
+from utils.task_tree import NO_EXECUTOR
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+# Группировка по времени: день, неделя, месяц или весь диапазон целиком
+ANALYTICS_PERIODS = ("day", "week", "month", "total")
+
+_PERIOD_QUERY = Query("total", pattern=f"^({'|'.join(ANALYTICS_PERIODS)})$",
+                      description="Группировка: day, week, month или total (за весь диапазон)")
+
+
+def _period_start(period: str):
+    """
+    Начало периода, к которому относится день сводки
+    """
+    if period == "total":
+        return None
+    if period == "day":
+        return TimingDailyRollup.timing_date
+    # period проверен по ANALYTICS_PERIODS: подставляется в SQL как есть, чтобы выражение
+    # в SELECT и GROUP BY совпадало текстуально
+    return cast(func.date_trunc(literal_column(f"'{period}'"), TimingDailyRollup.timing_date), Date)
+
+
+async def _hours(
+        session: AsyncSession,
+        current_user: UserModel,
+        key_columns: list,
+        period: str,
+        date_from: Optional[date],
+        date_to: Optional[date],
+        *where,
+        joins=()
+) -> List[dict]:
+    """
+    Часы из сводки по дням, сгруппированные по key_columns и периоду
+    """
+    if not current_user:
+        logger.warning("Unauthorized access attempt to timing analytics")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from позже date_to")
+
+    period_start = _period_start(period)
+    group_columns = list(key_columns) + ([period_start] if period_start is not None else [])
+
+    stmt = select(
+        *key_columns,
+        (period_start if period_start is not None else literal_column("NULL")).label("period_start"),
+        (func.extract("epoch", func.sum(TimingDailyRollup.total_time)) / 3600).label("hours"),
+        func.sum(TimingDailyRollup.timings_count).label("timings_count"),
+    ).select_from(TimingDailyRollup)
+    for target, onclause in joins:
+        stmt = stmt.join(target, onclause)
+    if date_from:
+        stmt = stmt.where(TimingDailyRollup.timing_date >= date_from)
+    if date_to:
+        stmt = stmt.where(TimingDailyRollup.timing_date <= date_to)
+    stmt = stmt.where(*where).group_by(*group_columns).order_by(*group_columns)
+
+    result = await session.execute(stmt)
+    rows = rows_to_dicts(result)
+    logger.info(f"User {current_user.username} got {len(rows)} timing analytics rows (period={period})")
+    return rows
+
+
+@router.get("/hours/by-person", response_model=List[PersonHours])
+async def get_hours_by_person(
+        period: str = _PERIOD_QUERY,
+        date_from: Optional[date] = Query(None, description="С даты (включительно)"),
+        date_to: Optional[date] = Query(None, description="По дату (включительно)"),
+        person_id: Optional[uuid.UUID] = Query(None, description="Только этот исполнитель"),
+        session: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+):
+    """
+    Часы по исполнителям за период (по дням, неделям, месяцам или итогом)
+    """
+    where = [TimingDailyRollup.executor_id == person_id] if person_id else []
+    rows = await _hours(session, current_user, [TimingDailyRollup.executor_id], period, date_from, date_to, *where)
+
+    executors = await person_directory.get_fio_map(session, (row["executor_id"] for row in rows))
+    for row in rows:
+        row["executor"] = executors.get(row["executor_id"], NO_EXECUTOR) if row["executor_id"] else NO_EXECUTOR
+    return ProjectionResponse(rows)
+
+
+@router.get("/hours/by-order", response_model=List[OrderHours])
+async def get_hours_by_order(
+        period: str = _PERIOD_QUERY,
+        date_from: Optional[date] = Query(None, description="С даты (включительно)"),
+        date_to: Optional[date] = Query(None, description="По дату (включительно)"),
+        order_serial: Optional[str] = Query(None, description="Только этот заказ"),
+        session: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+):
+    """
+    Часы по заказам за период (по дням, неделям, месяцам или итогом)
+    """
+    where = [TimingDailyRollup.order_serial == order_serial] if order_serial else []
+    rows = await _hours(session, current_user, [TimingDailyRollup.order_serial], period, date_from, date_to, *where)
+    return ProjectionResponse(rows)
+
+
+@router.get("/hours/by-work", response_model=List[WorkHours])
+async def get_hours_by_work(
+        period: str = _PERIOD_QUERY,
+        date_from: Optional[date] = Query(None, description="С даты (включительно)"),
+        date_to: Optional[date] = Query(None, description="По дату (включительно)"),
+        session: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+):
+    """
+    Часы по видам работ за период.
+    Тайминги привязаны к заказу, а не к работе, поэтому часы заказа с несколькими работами
+    учитываются в каждой из них.
+    """
+    rows = await _hours(
+        session, current_user, [Work.id.label("work_id"), Work.name.label("work")], period, date_from, date_to,
+        joins=(
+            (order_work, order_work.c.order_serial == TimingDailyRollup.order_serial),
+            (Work, Work.id == order_work.c.work_id),
+        )
+    )
+    return ProjectionResponse(rows)
+
+
+def _exposure_amounts(row: dict) -> dict:
+    amounts = {field: int(row[field]) for field in
+               ("materials", "products", "work", "debt", "orders_with_payables", "orders_with_debt")}
+    amounts["payables"] = amounts["materials"] + amounts["products"] + amounts["work"]
+    return amounts
+
+
+@router.get("/orders/exposure", response_model=FinancialExposure)
+async def get_financial_exposure(
+        source: str = Query("live", pattern="^(live|view)$",
+                            description="live - по таблице заказов, view - по материализованному представлению"),
+        session: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+):
+    """
+    Сколько денег нужно под открытые заказы (неоплаченные материалы, товары, работы)
+    и сколько должны заказчики - итогом, по статусам и по заказчикам. Считается одним запросом в БД.
+    """
+    if not current_user:
+        logger.warning("Unauthorized access attempt to financial exposure")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
+
+    total = ExposureAmounts()
+    by_status, by_customer = [], []
+    for row in await load_financial_exposure(session, use_view=source == "view"):
+        amounts = _exposure_amounts(row)
+        if row["by_status"] and row["by_customer"]:
+            total = ExposureAmounts(**amounts)
+        elif not row["by_status"]:
+            by_status.append(StatusExposure(status_id=row["status_id"], status=row["status"], **amounts))
+        elif amounts["payables"] or amounts["debt"]:
+            customer = customer_display_name(row["customer_name"], row["form_name"])
+            by_customer.append(CustomerExposure(customer_id=row["customer_id"], customer=customer, **amounts))
+
+    by_status.sort(key=lambda item: item.status_id)
+    by_customer.sort(key=lambda item: item.payables + item.debt, reverse=True)
+    logger.info(f"User {current_user.username} got financial exposure ({source})")
+    return model_response(FinancialExposure(source=source, total=total, by_status=by_status, by_customer=by_customer))
@@ -2,23 +2,34 @@
 """
 Все роутеры для учёта шкафов
 """
+import csv
+import io
 import uuid
+
 import models
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi import Query
+from fastapi import Query, Body, File, UploadFile
+from pydantic import ValidationError
 
 from auth.jwt_auth import get_current_auth_user
 from database import get_async_db
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import insert, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.functions import func
 from models import BoxAccounting as BoxAccountingModel
+from models import box_serial_num_seq
 from models import User as UserModel
 from loguru import logger
+from typing import Any, Dict, List, Optional, Union
 
-from schemas import PaginatedBoxAccounting, BoxAccountingResponse, BoxAccountingCreate
+from schemas import PaginatedBoxAccounting, BoxAccountingResponse, BoxAccountingCreate, BoxAccountingBatchCreate
+from schemas import BoxAccountingBulkResponse
+from utils.box_serials import allocate_box_serials, lock_box_serials
+from utils.reference_check import find_missing_references
+from utils.person_directory import person_directory
+from utils.projection import model_response, ProjectionResponse
 
 router = APIRouter(
     prefix="/box-accounting",
@@ -26,16 +37,56 @@ router = APIRouter(
 )
 
 
+# Колонки шкафа, которые нужны для ответа
+_BOX_COLUMNS = (
+    BoxAccountingModel.serial_num,
+    BoxAccountingModel.name,
+    BoxAccountingModel.order_id,
+    BoxAccountingModel.scheme_developer_id,
+    BoxAccountingModel.assembler_id,
+    BoxAccountingModel.programmer_id,
+    BoxAccountingModel.tester_id,
+)
+
+
+def _box_filters(order_id: Optional[str], person_id: Optional[uuid.UUID], search: Optional[str]) -> list:
+    """
+    Условия отбора шкафов. По order_id и людям работают индексы внешних ключей box_accounting
+    """
+    conditions = []
+    if order_id:
+        conditions.append(BoxAccountingModel.order_id == order_id)
+    if person_id:
+        # Человек в любой роли: разработчик схемы, сборщик, программист или тестировщик
+        conditions.append(or_(
+            BoxAccountingModel.scheme_developer_id == person_id,
+            BoxAccountingModel.assembler_id == person_id,
+            BoxAccountingModel.programmer_id == person_id,
+            BoxAccountingModel.tester_id == person_id,
+        ))
+    if search:
+        conditions.append(BoxAccountingModel.name.ilike(f"%{search}%"))
+    return conditions
+
+
 @router.get("/read/", response_model=PaginatedBoxAccounting)
 async def read_box_accounting(
         db: AsyncSession = Depends(get_async_db),
         current_user: UserModel = Depends(get_current_auth_user),
-        page: int = Query(1, ge=1, description="Номер страницы"),
+        page: int = Query(1, ge=1, description="Номер страницы (если не передан after_serial)"),
         size: int = Query(20, ge=1, le=100, description="Количество элементов на странице"),
+        after_serial: Optional[int] = Query(
+            None, description="Курсор: serial_num последнего шкафа предыдущей страницы (next_cursor)"
+        ),
+        order_id: Optional[str] = Query(None, description="Только шкафы заказа"),
+        person_id: Optional[uuid.UUID] = Query(None, description="Только шкафы, где человек в любой роли"),
+        search: Optional[str] = Query(None, min_length=1, max_length=64, description="Поиск по названию шкафа"),
 ):
     """
-    Получение списка учтенных шкафов.
-    Возвращает все записи учета шкафов.
+    Получение списка учтенных шкафов, от новых к старым.
+    Фильтры: по заказу, по человеку (в любой роли) и по названию.
+    Постранично по курсору after_serial (keyset по serial_num, скорость не зависит от глубины)
+    или по номеру страницы page (OFFSET, для обратной совместимости).
     Использует аутентификацию через куки.
     """
     try:
@@ -49,15 +100,10 @@ async def read_box_accounting(
 
         logger.debug(f"User {current_user.username} fetching box accounting records")
 
-        # Рассчитываем параметры пагинации
-        # offset определяет, сколько записей нужно пропустить перед началом выборки.
-        # Например, если page = 2 и size = 20, то offset = (2 - 1) * 20 = 20.
-        # Это означает, что первые 20 записей будут пропущены, и выборка начнется с 21-й записи.
-        offset = (page - 1) * size
+        conditions = _box_filters(order_id, person_id, search)
 
-        # Получаем общее количество записей в таблице BoxAccountingModel
-        # func.count() используется для подсчета количества строк в таблице.
-        count_stmt = select(func.count()).select_from(BoxAccountingModel)
+        # Получаем общее количество записей с учётом фильтров
+        count_stmt = select(func.count()).select_from(BoxAccountingModel).where(*conditions)
         total_count = await db.execute(count_stmt)
         total = total_count.scalar()
 
@@ -67,39 +113,42 @@ async def read_box_accounting(
         # Если total = 0, то total_pages устанавливается в 1, чтобы избежать деления на ноль или отрицательных значений.
         total_pages = (total + size - 1) // size if total > 0 else 1
 
-        # Получаем записи учета шкафов со связанными данными
-        # joinedload используется для загрузки связанных данных (например, scheme_developer, assembler и т.д.)
-        # Это позволяет избежать проблемы N+1 запросов к базе данных.
-        stmt = select(BoxAccountingModel).options(
-            joinedload(BoxAccountingModel.scheme_developer),
-            joinedload(BoxAccountingModel.assembler),
-            joinedload(BoxAccountingModel.programmer),
-            joinedload(BoxAccountingModel.tester),
-            joinedload(BoxAccountingModel.order)
-        ).order_by(BoxAccountingModel.serial_num.desc()).offset(offset).limit(size)  # Добавлена сортировка
-        # Применяем пагинацию: пропускаем offset записей и выбираем size записей.
+        # Получаем записи учета шкафов.
+        # Людей не джойним: ФИО разработчика, сборщика, программиста и тестировщика
+        # берутся из кэша справочника людей (см. _build_box_items)
+        # Выбираются только колонки шкафа, ORM-объекты не создаются
+        stmt = select(*_BOX_COLUMNS).where(*conditions).order_by(BoxAccountingModel.serial_num.desc())
+        if after_serial is not None:
+            # Keyset: следующая страница начинается сразу после последнего показанного номера
+            stmt = stmt.where(BoxAccountingModel.serial_num < after_serial)
+        else:
+            # offset определяет, сколько записей нужно пропустить перед началом выборки.
+            # Например, если page = 2 и size = 20, то offset = (2 - 1) * 20 = 20.
+            stmt = stmt.offset((page - 1) * size)
+        # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+        stmt = stmt.limit(size + 1)
 
         result = await db.execute(stmt)
-        boxes = result.scalars().unique().all()
+        boxes = result.all()
+
+        next_cursor = None
+        if len(boxes) > size:
+            boxes = boxes[:size]
+            next_cursor = boxes[-1].serial_num
+
+        # Формируем ответ с пагинацией (структура PaginatedBoxAccounting), сериализуется сразу orjson
+        response = ProjectionResponse({
+            "items": await _build_box_items(db, boxes),
+            "total": total,
+            "page": page,
+            "size": size,
+            "pages": total_pages,
+            "next_cursor": next_cursor,
+        })
 
         logger.info(
-            f"Successfully retrieved {len(boxes)} box accounting records for user {current_user.username}"
-        )
-
-        # Преобразование ORM-объектов в Pydantic-схему
-        box_responses = [BoxAccountingResponse.model_validate(box) for box in boxes]
-
-        # Формируем ответ с пагинацией
-        response = PaginatedBoxAccounting(
-            items=box_responses,  # Передаем преобразованные объекты
-            total=total,
-            page=page,
-            size=size,
-            pages=total_pages
-        )
-
-        logger.info(
-            f"Successfully retrieved {len(boxes)} box accounting records (page {page} of {total_pages})"
+            f"Successfully retrieved {len(boxes)} box accounting records for user {current_user.username} "
+            f"(page {page} of {total_pages}, after_serial={after_serial})"
         )
         return response
 
@@ -113,15 +162,84 @@ async def read_box_accounting(
         )
 
 
-async def _check_person_exists(db: AsyncSession, person_id: uuid.UUID) -> bool:
+async def _build_box_items(db: AsyncSession, boxes) -> List[dict]:
     """
-    Вспомогательная функция для проверки существования человека по ID.
+    Формирует словари ответа по шкафам (структура BoxAccountingResponse),
+    подставляя людей из кэша справочника людей.
+    boxes - ORM-объекты или Row-кортежи с колонками _BOX_COLUMNS.
     """
-    # Преобразуем person_id в строку или число, если модель ожидает такой тип
-    result = await db.execute(
-        select(models.Person).filter(models.Person.uuid == person_id)
+    persons = await person_directory.get_many(
+        db,
+        (person_uuid
+         for box in boxes
+         for person_uuid in (box.scheme_developer_id, box.assembler_id, box.programmer_id, box.tester_id))
     )
-    return result.scalar_one_or_none() is not None
+
+    def person_base(person_uuid):
+        person = persons.get(person_uuid)
+        if person is None:
+            return None
+        return {"uuid": person.uuid, "name": person.name, "surname": person.surname, "patronymic": person.patronymic}
+
+    return [
+        {
+            "serial_num": box.serial_num,
+            "name": box.name,
+            "order_id": box.order_id,
+            "scheme_developer": person_base(box.scheme_developer_id),
+            "assembler": person_base(box.assembler_id),
+            "programmer": person_base(box.programmer_id),
+            "tester": person_base(box.tester_id),
+        }
+        for box in boxes
+    ]
+
+
+def _box_roles(box_data: BoxAccountingCreate) -> tuple:
+    """
+    Роли людей в записи о шкафе: (название роли для сообщения, uuid)
+    """
+    return (
+        ("Scheme developer", box_data.scheme_developer_id),
+        ("Assembler", box_data.assembler_id),
+        ("Programmer", box_data.programmer_id),
+        ("Tester", box_data.tester_id),
+    )
+
+
+async def _find_missing_box_references(db: AsyncSession, boxes: List[BoxAccountingCreate]) -> dict:
+    """
+    Одним запросом ищет несуществующие заказы и людей сразу для всех записей
+    """
+    return await find_missing_references(db, {
+        "order": (models.Order.serial, [box.order_id for box in boxes]),
+        "person": (models.Person.uuid, [person_id for box in boxes for _, person_id in _box_roles(box)]),
+    })
+
+
+def _box_reference_error(box_data: BoxAccountingCreate, missing: dict) -> Optional[str]:
+    """
+    Текст ошибки для записи, ссылающейся на несуществующий заказ или человека, иначе None
+    """
+    if box_data.order_id in missing.get("order", ()):
+        return f"Order with ID {box_data.order_id} not found"
+    for role, person_id in _box_roles(box_data):
+        if person_id in missing.get("person", ()):
+            return f"{role} with ID {person_id} not found"
+    return None
+
+
+async def _validate_box_references(db: AsyncSession, box_data: BoxAccountingCreate) -> None:
+    """
+    Проверяет, что заказ и все указанные люди существуют (один запрос). Иначе - 404.
+    """
+    error = _box_reference_error(box_data, await _find_missing_box_references(db, [box_data]))
+    if error:
+        logger.warning(error)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=error
+        )
 
 
 @router.post("/create/", response_model=BoxAccountingResponse, status_code=status.HTTP_201_CREATED)
@@ -146,89 +264,264 @@ async def create_box_accounting(
 
         logger.debug(f"User {current_user.username} creating new box accounting record")
 
-        # Проверяем существование заказа
-        order_check = select(func.count()).select_from(models.Order).where(models.Order.serial == box_data.order_id)
-        order_exists = await db.execute(order_check)
-        if order_exists.scalar() == 0:
-            logger.warning(f"Order with ID {box_data.order_id} not found")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Order with ID {box_data.order_id} not found"
+        # Проверяем существование заказа и людей
+        await _validate_box_references(db, box_data)
+
+        # Создаем запись одним INSERT ... RETURNING: serial_num берётся из последовательности
+        # (атомарно, без гонки с другими запросами), повторно читать запись не нужно
+        await lock_box_serials(db)
+        result = await db.execute(
+            insert(BoxAccountingModel.__table__)
+            .values(
+                serial_num=box_serial_num_seq.next_value(),
+                name=box_data.name,
+                order_id=box_data.order_id,
+                scheme_developer_id=box_data.scheme_developer_id,
+                assembler_id=box_data.assembler_id,
+                programmer_id=box_data.programmer_id,
+                tester_id=box_data.tester_id
             )
+            .returning(*_BOX_COLUMNS)
+        )
+        new_box = result.one()
+        await db.commit()
 
-        # Проверяем существование разработчика схемы
-        if not await _check_person_exists(db, box_data.scheme_developer_id):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Scheme developer with ID {box_data.scheme_developer_id} not found"
-            )
+        logger.info(f"Automatically generated new serial_num: {new_box.serial_num}")
 
-        # Проверяем существование сборщика
-        if not await _check_person_exists(db, box_data.assembler_id):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Assembler with ID {box_data.assembler_id} not found"
-            )
+        logger.info(f"Successfully created box accounting record with serial number {new_box.serial_num}")
+
+        # Преобразуем ORM-объект в Pydantic-модель для ответа, люди - из кэша справочника
+        return model_response(
+            BoxAccountingResponse.model_validate((await _build_box_items(db, [new_box]))[0]),
+            status_code=status.HTTP_201_CREATED
+        )
+
+    except HTTPException:
+        # Пробрасываем HTTP-исключения дальше
+        raise
+    except Exception as e:
+        # Логируем необработанные исключения и отправляем обобщенный ответ
+        logger.error(f"Error creating box accounting record: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create box accounting record: {str(e)}",
+        )
 
-        # Проверяем существование программиста (если указан)
-        if box_data.programmer_id and not await _check_person_exists(db, box_data.programmer_id):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Programmer with ID {box_data.programmer_id} not found"
-            )
 
-        # Проверяем существование тестировщика
-        if not await _check_person_exists(db, box_data.tester_id):
+@router.post("/create-batch/", response_model=List[BoxAccountingResponse], status_code=status.HTTP_201_CREATED)
+async def create_box_accounting_batch(
+        batch_data: BoxAccountingBatchCreate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+):
+    """
+    Создание серии одинаковых шкафов.
+    Резервирует count последовательных серийных номеров и создает записи в одной транзакции.
+    Требует аутентификации пользователя.
+    """
+    try:
+        # Проверяем, что пользователь авторизован
+        if not current_user:
+            logger.warning("Unauthorized access attempt to create box accounting batch")
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Tester with ID {box_data.tester_id} not found"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Authentication required",
             )
 
-        # Получаем максимальный существующий serial_num
-        max_serial_query = select(func.max(BoxAccountingModel.serial_num))
-        result = await db.execute(max_serial_query)
-        max_serial = result.scalar()
+        logger.debug(f"User {current_user.username} creating batch of {batch_data.count} box accounting records")
+
+        # Проверяем существование заказа и людей
+        await _validate_box_references(db, batch_data)
+
+        # Резервируем номера подряд и создаем записи
+        serial_nums = await allocate_box_serials(db, batch_data.count)
+        new_boxes = [
+            BoxAccountingModel(
+                serial_num=serial_num,
+                name=batch_data.name,
+                order_id=batch_data.order_id,
+                scheme_developer_id=batch_data.scheme_developer_id,
+                assembler_id=batch_data.assembler_id,
+                programmer_id=batch_data.programmer_id,
+                tester_id=batch_data.tester_id
+            )
+            for serial_num in serial_nums
+        ]
+        db.add_all(new_boxes)
+        await db.commit()
 
-        # Генерируем новый serial_num (max + 1 или 1, если записей ещё нет)
-        new_serial_num = 1 if max_serial is None else max_serial + 1
+        logger.info(
+            f"Successfully created {len(new_boxes)} box accounting records "
+            f"with serial numbers {serial_nums[0]}-{serial_nums[-1]}"
+        )
 
-        logger.info(f"Automatically generating new serial_num: {new_serial_num}")
+        return ProjectionResponse(await _build_box_items(db, new_boxes), status_code=status.HTTP_201_CREATED)
 
-        # Создаем новую запись о шкафе с автоматически сгенерированным serial_num
-        new_box = BoxAccountingModel(
-            serial_num=new_serial_num,
-            name=box_data.name,
-            order_id=box_data.order_id,
-            scheme_developer_id=box_data.scheme_developer_id,
-            assembler_id=box_data.assembler_id,
-            programmer_id=box_data.programmer_id,
-            tester_id=box_data.tester_id
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating box accounting batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create box accounting batch: {str(e)}",
         )
 
-        # Добавляем запись в базу данных
-        db.add(new_box)
+
+# Максимальное количество записей в одном запросе массового создания шкафов
+BOX_BULK_MAX_ROWS = 1000
+
+# Колонки CSV для массового создания шкафов
+BOX_BULK_CSV_COLUMNS = list(BoxAccountingCreate.model_fields)
+
+
+def _parse_bulk_rows(raw_rows: List[dict]) -> List[Union[BoxAccountingCreate, str]]:
+    """
+    Проверяет каждую строку по схеме BoxAccountingCreate.
+    Возвращает для каждой строки либо запись, либо текст ошибки.
+    """
+    parsed = []
+    for raw_row in raw_rows:
+        try:
+            parsed.append(BoxAccountingCreate.model_validate(raw_row))
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            parsed.append(f"{location}: {error['msg']}" if location else error["msg"])
+    return parsed
+
+
+async def _bulk_create_boxes(db: AsyncSession, rows: List[Union[BoxAccountingCreate, str]]) -> dict:
+    """
+    Массовое создание шкафов:
+    - ссылки на заказы и людей всех строк проверяются одним запросом;
+    - серийные номера для всех корректных строк выдаются подряд одним запросом;
+    - вставка одним executemany и один commit.
+    Строки с ошибками пропускаются, по каждой строке возвращается результат (структура BoxAccountingBulkResponse).
+    """
+    results = [
+        {"index": index, "serial_num": None, "error": row if isinstance(row, str) else None}
+        for index, row in enumerate(rows)
+    ]
+    valid_rows = [(index, row) for index, row in enumerate(rows) if not isinstance(row, str)]
+
+    missing = await _find_missing_box_references(db, [row for _, row in valid_rows]) if valid_rows else {}
+    to_insert = []
+    for index, row in valid_rows:
+        error = _box_reference_error(row, missing)
+        if error:
+            results[index]["error"] = error
+        else:
+            to_insert.append((index, row))
+
+    if to_insert:
+        serial_nums = await allocate_box_serials(db, len(to_insert))
+        values = []
+        for serial_num, (index, row) in zip(serial_nums, to_insert):
+            results[index]["serial_num"] = serial_num
+            values.append({"serial_num": serial_num, **row.model_dump()})
+        await db.execute(insert(BoxAccountingModel.__table__), values)
         await db.commit()
-        await db.refresh(new_box)
 
-        # Загружаем связанные данные для ответа
-        await db.refresh(new_box, ["scheme_developer", "assembler", "programmer", "tester", "order"])
+    return {"created": len(to_insert), "failed": len(rows) - len(to_insert), "rows": results}
 
-        logger.info(f"Successfully created box accounting record with serial number {new_box.serial_num}")
 
-        # Преобразуем ORM-объект в Pydantic-модель для ответа
-        return BoxAccountingResponse.model_validate(new_box)
+def _check_bulk_size(rows_count: int) -> None:
+    if rows_count > BOX_BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many rows: {rows_count}, maximum is {BOX_BULK_MAX_ROWS}"
+        )
+
 
-    except HTTPException:
-        # Пробрасываем HTTP-исключения дальше
-        raise
+@router.post("/bulk-create/", response_model=BoxAccountingBulkResponse)
+async def bulk_create_box_accounting(
+        boxes: List[Dict[str, Any]] = Body(..., description="Список записей с полями BoxAccountingCreate"),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+):
+    """
+    Массовое создание записей о шкафах из JSON-списка (до BOX_BULK_MAX_ROWS строк).
+    Каждая строка проверяется отдельно, строки с ошибками не создаются.
+    Возвращает результат по каждой строке: выданный серийный номер или текст ошибки.
+    Требует аутентификации пользователя.
+    """
+    if not current_user:
+        logger.warning("Unauthorized access attempt to bulk create box accounting records")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+        )
+    _check_bulk_size(len(boxes))
+
+    logger.debug(f"User {current_user.username} bulk creating {len(boxes)} box accounting records")
+    try:
+        result = await _bulk_create_boxes(db, _parse_bulk_rows(boxes))
     except Exception as e:
-        # Логируем необработанные исключения и отправляем обобщенный ответ
-        logger.error(f"Error creating box accounting record: {str(e)}")
+        logger.error(f"Error bulk creating box accounting records: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create box accounting record: {str(e)}",
+            detail=f"Failed to bulk create box accounting records: {str(e)}",
+        )
+
+    logger.info(f"Bulk created {result['created']} box accounting records, {result['failed']} failed")
+    return ProjectionResponse(result)
+
+
+@router.post("/bulk-create/csv/", response_model=BoxAccountingBulkResponse)
+async def bulk_create_box_accounting_csv(
+        file: UploadFile = File(..., description="CSV с колонками " + ", ".join(BOX_BULK_CSV_COLUMNS)),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+):
+    """
+    Массовое создание записей о шкафах из CSV-файла (UTF-8, разделитель "," или ";").
+    Первая строка - заголовок с именами колонок, пустой programmer_id - программиста нет.
+    Возвращает результат по каждой строке данных (index считается с 0 без учета заголовка).
+    Требует аутентификации пользователя.
+    """
+    if not current_user:
+        logger.warning("Unauthorized access attempt to bulk create box accounting records from CSV")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+        )
+
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8 encoded")
+
+    first_line = content.split("\n", 1)[0]
+    delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+    reader = csv.DictReader(io.StringIO(content), delimiter=delimiter)
+    missing_columns = set(BOX_BULK_CSV_COLUMNS) - set(reader.fieldnames or []) - {"programmer_id"}
+    if missing_columns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV columns missing: {', '.join(sorted(missing_columns))}"
         )
 
+    # Пустые ячейки - это отсутствующие значения
+    raw_rows = [
+        {key: (value.strip() or None) if isinstance(value, str) else value
+         for key, value in row.items() if key in BOX_BULK_CSV_COLUMNS}
+        for row in reader
+    ]
+    _check_bulk_size(len(raw_rows))
+
+    logger.debug(f"User {current_user.username} bulk creating {len(raw_rows)} box accounting records from CSV")
+    try:
+        result = await _bulk_create_boxes(db, _parse_bulk_rows(raw_rows))
+    except Exception as e:
+        logger.error(f"Error bulk creating box accounting records from CSV: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to bulk create box accounting records: {str(e)}",
+        )
+
+    logger.info(f"Bulk created {result['created']} box accounting records from CSV, {result['failed']} failed")
+    return ProjectionResponse(result)
+
 
 @router.get("/max-serial-num/", response_model=int)
 async def get_max_serial_num(
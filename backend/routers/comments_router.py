@@ -6,8 +6,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 # Убедитесь, что select импортирован правильно, если он используется где-то еще
 # from sqlalchemy.future import select
-from models import OrderComment, Person, Order # Импортируем Person и Order для проверки существования
+from models import OrderComment, Order # Импортируем Order для проверки существования
 from database import get_async_db
+from utils.person_directory import person_directory
 from pydantic import BaseModel, ConfigDict
 
 router = APIRouter()
@@ -53,8 +54,8 @@ async def create_comment(
     - **person_uuid**: UUID автора комментария.
     """
     # Опционально: Проверка существования пользователя (Person)
-    # Это может потребовать дополнительного запроса к БД
-    author = await session.get(Person, comment_data.person_uuid)
+    # Проверяем по кэшу справочника людей, к БД обращаемся только при промахе
+    author = await person_directory.get(session, comment_data.person_uuid)
     if not author:
         raise HTTPException(status_code=404, detail=f"Person with UUID {comment_data.person_uuid} not found")
 
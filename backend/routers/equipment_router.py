@@ -0,0 +1,161 @@
+# routers/equipment_router.py
+"""
+Каталог оборудования: поиск с фильтрами и постраничной выдачей
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.jwt_auth import get_current_auth_user
+from database import get_async_db
+from models import Equipment, ControlCabinet, EquipmentType, Manufacturer, Currency, Ip, ControlCabinetMaterial
+from models import EQUIPMENT_SEARCH_CONFIG, equipment_search_vector
+from models import User as UserModel
+from schemas.equipment_schem import EquipmentCatalogPage
+from utils.projection import ProjectionResponse, rows_to_dicts
+
+router = APIRouter(
+    prefix="/equipment",
+    tags=["equipment"],
+)
+
+# Таблицы наследования: общие поля оборудования и поля корпусов шкафов
+_equipment = Equipment.__table__
+_cabinets = ControlCabinet.__table__
+
+# Колонки позиции каталога (структура EquipmentCatalogItem)
+_CATALOG_COLUMNS = (
+    _equipment.c.id,
+    _equipment.c.name,
+    _equipment.c.model,
+    _equipment.c.vendor_code,
+    _equipment.c.description,
+    _equipment.c.discriminator,
+    _equipment.c.type_id,
+    EquipmentType.name.label("type_name"),
+    _equipment.c.manufacturer_id,
+    Manufacturer.name.label("manufacturer_name"),
+    _equipment.c.price,
+    _equipment.c.currency_id,
+    Currency.name.label("currency_name"),
+    _equipment.c.relevance,
+    _equipment.c.price_date,
+    _cabinets.c.height,
+    _cabinets.c.width,
+    _cabinets.c.depth,
+    _cabinets.c.ip_id,
+    Ip.name.label("ip_name"),
+    _cabinets.c.material_id,
+    ControlCabinetMaterial.name.label("material_name"),
+)
+
+
+def _range_conditions(column, min_value: Optional[int], max_value: Optional[int], name: str) -> list:
+    """
+    Условия диапазона min_value <= column <= max_value, любая граница может быть не задана
+    """
+    if min_value is not None and max_value is not None and min_value > max_value:
+        raise HTTPException(status_code=400, detail=f"{name}: минимум больше максимума")
+    conditions = []
+    if min_value is not None:
+        conditions.append(column >= min_value)
+    if max_value is not None:
+        conditions.append(column <= max_value)
+    return conditions
+
+
+@router.get("/catalog", response_model=EquipmentCatalogPage)
+async def search_equipment_catalog(
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserModel = Depends(get_current_auth_user),
+        search: Optional[str] = Query(None, min_length=2, max_length=100,
+                                      description="Полнотекстовый поиск по названию и описанию"),
+        type_id: Optional[int] = Query(None, description="Тип оборудования"),
+        manufacturer_id: Optional[int] = Query(None, description="Производитель"),
+        price_min: Optional[int] = Query(None, ge=0),
+        price_max: Optional[int] = Query(None, ge=0),
+        relevance: Optional[bool] = Query(None, description="Только актуальное (true) или неактуальное (false)"),
+        height_min: Optional[int] = Query(None, ge=0),
+        height_max: Optional[int] = Query(None, ge=0),
+        width_min: Optional[int] = Query(None, ge=0),
+        width_max: Optional[int] = Query(None, ge=0),
+        depth_min: Optional[int] = Query(None, ge=0),
+        depth_max: Optional[int] = Query(None, ge=0),
+        ip_id: Optional[int] = Query(None, description="Степень защиты корпуса шкафа"),
+        material_id: Optional[int] = Query(None, description="Материал корпуса шкафа"),
+        after_id: Optional[int] = Query(None, description="Курсор: id последней позиции предыдущей страницы"),
+        limit: int = Query(50, ge=1, le=200, description="Количество позиций на странице"),
+):
+    """
+    Поиск по каталогу оборудования, упорядоченному по id.
+    Фильтры по габаритам, степени защиты и материалу оставляют только корпуса шкафов.
+    Постранично по курсору after_id (keyset, скорость не зависит от глубины), общее количество не считается.
+    Поиск идёт по GIN-индексу ix_equipment_search, фильтры - по индексам equipment и control_cabinets.
+    Требует аутентификации пользователя.
+    """
+    if not current_user:
+        logger.warning("Unauthorized access attempt to equipment catalog")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+        )
+
+    conditions = _range_conditions(_equipment.c.price, price_min, price_max, "Цена")
+    if type_id is not None:
+        conditions.append(_equipment.c.type_id == type_id)
+    if manufacturer_id is not None:
+        conditions.append(_equipment.c.manufacturer_id == manufacturer_id)
+    if relevance is not None:
+        conditions.append(_equipment.c.relevance == relevance)
+    if search:
+        conditions.append(equipment_search_vector.op("@@")(func.websearch_to_tsquery(EQUIPMENT_SEARCH_CONFIG, search)))
+
+    cabinet_conditions = (
+        _range_conditions(_cabinets.c.height, height_min, height_max, "Высота")
+        + _range_conditions(_cabinets.c.width, width_min, width_max, "Ширина")
+        + _range_conditions(_cabinets.c.depth, depth_min, depth_max, "Глубина")
+    )
+    if ip_id is not None:
+        cabinet_conditions.append(_cabinets.c.ip_id == ip_id)
+    if material_id is not None:
+        cabinet_conditions.append(_cabinets.c.material_id == material_id)
+
+    stmt = select(*_CATALOG_COLUMNS).select_from(_equipment)
+    if cabinet_conditions:
+        # Фильтр по полям корпуса: обычный JOIN, остальное оборудование отсекается сразу
+        stmt = stmt.join(_cabinets, _cabinets.c.id == _equipment.c.id)
+    else:
+        stmt = stmt.outerjoin(_cabinets, _cabinets.c.id == _equipment.c.id)
+    stmt = (
+        stmt.outerjoin(EquipmentType, EquipmentType.id == _equipment.c.type_id)
+        .outerjoin(Manufacturer, Manufacturer.id == _equipment.c.manufacturer_id)
+        .outerjoin(Currency, Currency.id == _equipment.c.currency_id)
+        .outerjoin(Ip, Ip.id == _cabinets.c.ip_id)
+        .outerjoin(ControlCabinetMaterial, ControlCabinetMaterial.id == _cabinets.c.material_id)
+        .where(*conditions, *cabinet_conditions)
+    )
+    if after_id is not None:
+        # Keyset: следующая страница начинается сразу после последнего показанного id
+        stmt = stmt.where(_equipment.c.id > after_id)
+    # Берём на одну позицию больше, чтобы понять, есть ли следующая страница
+    stmt = stmt.order_by(_equipment.c.id).limit(limit + 1)
+
+    try:
+        items = rows_to_dicts(await db.execute(stmt))
+    except Exception as e:
+        logger.error(f"Error searching equipment catalog: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search equipment catalog",
+        )
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]["id"]
+
+    logger.debug(f"User {current_user.username} found {len(items)} catalog items (after_id={after_id})")
+    return ProjectionResponse({"items": items, "next_cursor": next_cursor})
@@ -4,13 +4,16 @@
 """
 
 from fastapi import APIRouter
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from models import *
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from loguru import logger
 
 from database import get_async_db
+from utils.projection import fetch_projection, model_columns, ProjectionResponse
+from utils.export_stream import export_response, EXPORT_FORMATS
 from models import User as UserModel
 from auth.jwt_auth import get_current_auth_user
 
@@ -40,19 +43,11 @@ async def _fetch_list(
     logger.debug(f"User {current_user.username} requesting all {list_name}")
 
     try:
-        # Выполняем запрос для получения всех записей
-        query = select(model)
-        result = await db.execute(query)
-        items = result.scalars().all()
-
-        # Преобразуем результат в список словарей
-        items_list = [
-            {field: getattr(item, field) for field in fields}
-            for item in items
-        ]
+        # Выбираем только нужные колонки, без построения ORM-объектов
+        items_list = await fetch_projection(db, model_columns(model, fields))
 
         logger.info(f"Successfully retrieved {len(items_list)} {list_name} for user {current_user.username}")
-        return {list_name: items_list}
+        return ProjectionResponse({list_name: items_list})
 
     except Exception as e:
         logger.error(f"Error fetching {list_name}: {str(e)}")
@@ -61,6 +56,35 @@ async def _fetch_list(
             detail=f"Failed to fetch {list_name}: {str(e)}"
         )
 
+def _stream_list(
+        current_user: UserModel,
+        list_name: str,
+        stmt,
+        export_format: str
+):
+    """
+    Общая функция для потоковой выгрузки больших списков (заказы, задачи, тайминги и т.д.).
+    Строки читаются серверным курсором и отдаются частями в формате json, ndjson или csv.
+    """
+    if not current_user:
+        logger.warning(f"Unauthorized access attempt to {list_name} list")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+        )
+
+    logger.debug(f"User {current_user.username} streaming all {list_name} as {export_format}")
+    return export_response(stmt, list_name, export_format)
+
+
+# Параметр формата выгрузки для потоковых эндпоинтов
+_EXPORT_FORMAT_QUERY = Query(
+    "json",
+    alias="format",
+    pattern="^(" + "|".join(EXPORT_FORMATS) + ")$",
+    description="Формат выгрузки: json (по умолчанию), ndjson или csv"
+)
+
 
 @router.get("/countries")
 async def get_all_countries(
@@ -318,134 +342,111 @@ async def get_all_order_statuses(
 
 @router.get("/orders")
 async def get_all_orders(
-        db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_auth_user)
+        current_user: UserModel = Depends(get_current_auth_user),
+        export_format: str = _EXPORT_FORMAT_QUERY
 ):
     """
     Функция для получения всех заказов.
     Требует аутентификации пользователя.
+    Выгрузка потоковая, формат задаётся параметром format.
     """
-    try:
-        # Проверяем, что пользователь авторизован
-        if not current_user:
-            logger.warning("Unauthorized access attempt to orders list")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
-            )
-
-        logger.debug(f"User {current_user.username} requesting all orders")
-
-        query = select(Order)
-        result = await db.execute(query)
-        orders = result.scalars().all()
-
-        orders_list = [
-            {
-                "serial": order.serial,
-                "name": order.name,
-                "customer_id": order.customer_id,
-                "priority": order.priority,
-                "status_id": order.status_id,
-                "start_moment": order.start_moment,
-                "deadline_moment": order.deadline_moment,
-                "end_moment": order.end_moment,
-                "materials_cost": order.materials_cost,
-                "materials_paid": order.materials_paid,
-                "products_cost": order.products_cost,
-                "products_paid": order.products_paid,
-                "work_cost": order.work_cost,
-                "work_paid": order.work_paid,
-                "debt": order.debt,
-                "debt_paid": order.debt_paid
-            }
-            for order in orders
-        ]
-
-        logger.info(f"Successfully retrieved {len(orders_list)} orders for user {current_user.username}")
-        return {"orders": orders_list}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error fetching orders: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch orders: {str(e)}"
-        )
+    stmt = select(
+        Order.serial, Order.name, Order.customer_id, Order.priority, Order.status_id,
+        Order.start_moment, Order.deadline_moment, Order.end_moment,
+        Order.materials_cost, Order.materials_paid, Order.products_cost, Order.products_paid,
+        Order.work_cost, Order.work_paid, Order.debt, Order.debt_paid
+    )
+    return _stream_list(current_user, "orders", stmt, export_format)
 
 
 @router.get("/box_accounting")
 async def get_all_box_accounting(
-        db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_auth_user)
+        current_user: UserModel = Depends(get_current_auth_user),
+        export_format: str = _EXPORT_FORMAT_QUERY
 ):
     """
     Функция для получения всех записей учета шкафов.
     Требует аутентификации пользователя.
-    """
-    return await _fetch_list(
-        db=db,
-        current_user=current_user,
-        model=BoxAccounting,
-        list_name="boxes",
-        fields=["serial_num",
-                "name",
-                "order_id",
-                "scheme_developer_id",
-                "assembler_id",
-                "programmer_id",
-                "tester_id"
-                ]
+    Выгрузка потоковая, формат задаётся параметром format.
+    """
+    stmt = select(
+        BoxAccounting.serial_num,
+        BoxAccounting.name,
+        BoxAccounting.order_id,
+        BoxAccounting.scheme_developer_id,
+        BoxAccounting.assembler_id,
+        BoxAccounting.programmer_id,
+        BoxAccounting.tester_id
     )
+    return _stream_list(current_user, "boxes", stmt, export_format)
 
 
 @router.get("/order_comments")
 async def get_all_order_comments(
-        db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_auth_user)
+        current_user: UserModel = Depends(get_current_auth_user),
+        export_format: str = _EXPORT_FORMAT_QUERY
 ):
     """
     Функция для получения всех комментариев к заказам.
     Требует аутентификации пользователя.
-    """
-    try:
-        # Проверяем, что пользователь авторизован
-        if not current_user:
-            logger.warning("Unauthorized access attempt to order comments list")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
-            )
-
-        logger.debug(f"User {current_user.username} requesting all order comments")
+    Выгрузка потоковая, формат задаётся параметром format.
+    """
+    stmt = select(
+        OrderComment.id,
+        OrderComment.order_id,
+        OrderComment.moment_of_creation,
+        OrderComment.text,
+        OrderComment.person_uuid
+    )
+    return _stream_list(current_user, "order_comments", stmt, export_format)
 
-        query = select(OrderComment)
-        result = await db.execute(query)
-        comments = result.scalars().all()
 
-        comments_list = [
-            {
-                "id": comment.id,
-                "order_id": comment.order_id,
-                "moment_of_creation": comment.moment_of_creation.isoformat() if comment.moment_of_creation else None,
-                "text": comment.text,
-                "person_uuid": comment.person_uuid
-            }
-            for comment in comments
-        ]
+def _control_cabinets_select():
+    """
+    Все корпуса шкафов одним запросом, число запросов не зависит от количества шкафов.
+    ControlCabinet - наследник Equipment (joined-table), поэтому SELECT по нему сразу соединяет equipment
+    и control_cabinets. Материал, IP, производитель и валюта подгружаются JOIN-ами того же запроса,
+    а не отдельным запросом на каждый шкаф при обращении к связи.
+    """
+    return (
+        select(ControlCabinet)
+        .options(
+            joinedload(ControlCabinet.material, innerjoin=True),
+            joinedload(ControlCabinet.ip, innerjoin=True),
+            joinedload(ControlCabinet.manufacturer),
+            joinedload(ControlCabinet.currency),
+        )
+        .order_by(ControlCabinet.id)
+    )
 
-        logger.info(f"Successfully retrieved {len(comments_list)} order comments for user {current_user.username}")
-        return {"order_comments": comments_list}
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error fetching order comments: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch order comments: {str(e)}"
-        )
+def _control_cabinet_item(cabinet: ControlCabinet) -> dict:
+    """
+    Шкаф управления для ответа /get_all/control_cabinets, связи должны быть уже загружены
+    """
+    return {
+        "id": cabinet.id,
+        "name": cabinet.name,
+        "model": cabinet.model,
+        "vendor_code": cabinet.vendor_code,
+        "description": cabinet.description,
+        "type_id": cabinet.type_id,
+        "manufacturer_id": cabinet.manufacturer_id,
+        "manufacturer_name": cabinet.manufacturer.name if cabinet.manufacturer else None,
+        "equipment_type_id": cabinet.type_id,
+        "price": cabinet.price,
+        "currency_id": cabinet.currency_id,
+        "currency_name": cabinet.currency.name if cabinet.currency else None,
+        "relevance": cabinet.relevance,
+        "price_date": cabinet.price_date,
+        "material_id": cabinet.material_id,
+        "material_name": cabinet.material.name,
+        "ip_id": cabinet.ip_id,
+        "ip_name": cabinet.ip.name,
+        "height": cabinet.height,
+        "width": cabinet.width,
+        "depth": cabinet.depth
+    }
 
 
 @router.get("/control_cabinets")
@@ -468,36 +469,14 @@ async def get_all_control_cabinets(
 
         logger.debug(f"User {current_user.username} requesting all control cabinets")
 
-        # Выполняем запрос для получения всех шкафов управления
-        query = select(ControlCabinet)
-        result = await db.execute(query)
+        # Выполняем запрос для получения всех шкафов управления вместе со связями
+        result = await db.execute(_control_cabinets_select())
 
         # Получаем все записи
         cabinets = result.scalars().all()
 
         # Преобразуем результат в список словарей
-        cabinets_list = [
-            {
-                "id": cabinet.id,
-                "name": cabinet.name,
-                "model": cabinet.model,
-                "vendor_code": cabinet.vendor_code,
-                "description": cabinet.description,
-                "type_id": cabinet.type_id,
-                "manufacturer_id": cabinet.manufacturer_id,
-                "equipment_type_id": cabinet.type_id,
-                "price": cabinet.price,
-                "currency_id": cabinet.currency_id,
-                "relevance": cabinet.relevance,
-                "price_date": cabinet.price_date,
-                "material_id": cabinet.material_id,
-                "ip_id": cabinet.ip_id,
-                "height": cabinet.height,
-                "width": cabinet.width,
-                "depth": cabinet.depth
-            }
-            for cabinet in cabinets
-        ]
+        cabinets_list = [_control_cabinet_item(cabinet) for cabinet in cabinets]
 
         logger.info(f"Successfully retrieved {len(cabinets_list)} control cabinets for user {current_user.username}")
         return {"control_cabinets": cabinets_list}
@@ -514,115 +493,51 @@ async def get_all_control_cabinets(
 
 @router.get("/tasks")
 async def get_all_tasks(
-        db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_auth_user)
+        current_user: UserModel = Depends(get_current_auth_user),
+        export_format: str = _EXPORT_FORMAT_QUERY
 ):
     """
     Функция для получения всех задач.
     Требует аутентификации пользователя.
-    """
-    try:
-        # Проверяем, что пользователь авторизован
-        if not current_user:
-            logger.warning("Unauthorized access attempt to tasks list")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
-            )
-
-        logger.debug(f"User {current_user.username} requesting all tasks")
-
-        # Выполняем запрос для получения всех задач
-        query = select(Task).order_by(Task.id.desc())
-        result = await db.execute(query)
-
-        # Получаем все записи
-        tasks = result.scalars().all()
-
-        # Преобразуем результат в список словарей
-        tasks_list = [
-            {
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "status_id": task.status_id,
-                "payment_status_id": task.payment_status_id,
-                "executor_id": task.executor_id,
-                "planned_duration": str(task.planned_duration) if task.planned_duration else None,
-                "actual_duration": str(task.actual_duration) if task.actual_duration else None,
-                "creation_moment": task.creation_moment.isoformat() if task.creation_moment else None,
-                "start_moment": task.start_moment.isoformat() if task.start_moment else None,
-                "deadline_moment": task.deadline_moment.isoformat() if task.deadline_moment else None,
-                "end_moment": task.end_moment.isoformat() if task.end_moment else None,
-                "price": task.price,
-                "order_serial": task.order_serial,
-                "parent_task_id": task.parent_task_id,
-                "root_task_id": task.root_task_id
-            }
-            for task in tasks
-        ]
-
-        logger.info(f"Successfully retrieved {len(tasks_list)} tasks for user {current_user.username}")
-        return {"tasks": tasks_list}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error fetching tasks: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch tasks: {str(e)}"
-        )
+    Выгрузка потоковая, формат задаётся параметром format.
+    """
+    stmt = select(
+        Task.id,
+        Task.name,
+        Task.description,
+        Task.status_id,
+        Task.payment_status_id,
+        Task.executor_uuid.label("executor_id"),
+        Task.planned_duration,
+        Task.actual_duration,
+        Task.creation_moment,
+        Task.start_moment,
+        Task.deadline_moment,
+        Task.end_moment,
+        Task.price,
+        Task.order_serial,
+        Task.parent_task_id,
+        Task.root_task_id
+    ).order_by(Task.id.desc())
+    return _stream_list(current_user, "tasks", stmt, export_format)
 
 
 @router.get("/timings")
 async def get_all_timings(
-        db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_auth_user)
+        current_user: UserModel = Depends(get_current_auth_user),
+        export_format: str = _EXPORT_FORMAT_QUERY
 ):
     """
     Функция для получения всех тайминговых записей.
     Требует аутентификации пользователя.
-    """
-    try:
-        # Проверяем, что пользователь авторизован
-        if not current_user:
-            logger.warning("Unauthorized access attempt to timings list")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
-            )
-
-        logger.debug(f"User {current_user.username} requesting all timings")
-
-        # Выполняем запрос для получения всех тайминговых записей
-        query = select(Timing)
-        result = await db.execute(query)
-
-        # Получаем все записи
-        timings = result.scalars().all()
-
-        # Преобразуем результат в список словарей
-        timings_list = [
-            {
-                "id": timing.id,
-                "order_serial": timing.order_serial,
-                "task_id": timing.task_id,
-                "executor_id": timing.executor_id,
-                "time": str(timing.time) if timing.time else None,  # Преобразуем timedelta в строку
-                "timing_date": timing.timing_date.isoformat() if timing.timing_date else None
-            }
-            for timing in timings
-        ]
-
-        logger.info(f"Successfully retrieved {len(timings_list)} timings for user {current_user.username}")
-        return {"timings": timings_list}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error fetching timings: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch timings: {str(e)}"
-        )
+    Выгрузка потоковая, формат задаётся параметром format.
+    """
+    stmt = select(
+        Timing.id,
+        Timing.order_serial,
+        Timing.task_id,
+        Timing.executor_id,
+        Timing.time,
+        Timing.timing_date
+    )
+    return _stream_list(current_user, "timings", stmt, export_format)
@@ -2,10 +2,17 @@
 """
 Тут функции - роутеры для импорта данных
 """
-from fastapi import APIRouter, HTTPException
-from typing import Callable
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Callable, List, Optional
 import logging
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import ImportRun
+from schemas.import_schem import ImportRunRead
+
 # Импортируем функцию для импорта стран
 from utils.import_data import *
 
@@ -25,7 +32,7 @@ router = APIRouter(
 """
 
 # **Словарь с СИНХРОННЫМИ функциями импорта**
-IMPORT_FUNCTIONS: Dict[str, Callable[[], Dict[str, Any]]] = {
+IMPORT_FUNCTIONS: Dict[str, Callable[..., Dict[str, Any]]] = {
     "countries": import_countries_from_kis2,
     "cities": import_cities_from_kis2,
     "currencies": import_currency_from_kis2,
@@ -45,22 +52,47 @@ IMPORT_FUNCTIONS: Dict[str, Callable[[], Dict[str, Any]]] = {
 }
 
 
+@router.get("/runs", response_model=List[ImportRunRead])
+async def read_import_runs(
+        entity: Optional[str] = Query(None, description="Только запуски этой сущности, например orders"),
+        limit: int = Query(50, ge=1, le=1000),
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    История запусков импорта из КИС2, новые сверху: объёмы, время получения данных и работы с БД, строк в секунду.
+    """
+    if entity is not None and entity not in IMPORT_FUNCTIONS:
+        raise HTTPException(status_code=400, detail=f"Неизвестная сущность для импорта: {entity}")
+
+    stmt = select(ImportRun).order_by(ImportRun.started_at.desc()).limit(limit)
+    if entity is not None:
+        stmt = stmt.where(ImportRun.entity == entity)
+    return (await session.execute(stmt)).scalars().all()
+
+
 @router.post("/{entity}", response_model=Dict[str, Any])
-def import_data(entity: str):
+def import_data(entity: str, dry_run: bool = False, chunk_size: Optional[int] = Query(None, ge=1)):
     """
     Универсальный асинхронный эндпоинт для импорта данных.
 
     :param entity: Тип данных для импорта (например, "countries" или "manufacturers")
+    :param dry_run: Пробный импорт: отчёт added/updated/unchanged/orphaned/skipped без записи в БД
+    :param chunk_size: Строк в сохраняемой порции (orders, box_accounting, tasks), по умолчанию IMPORT_CHUNK_SIZE
     :return: JSONResponse с результатом импорта
     """
 
     if entity not in IMPORT_FUNCTIONS:
         raise HTTPException(status_code=400, detail=f"Неизвестная сущность для импорта: {entity}")
+    import_function = IMPORT_FUNCTIONS[entity]
+    if chunk_size is not None and import_function not in CHUNKED_IMPORTS:
+        raise HTTPException(status_code=400, detail=f"Импорт {entity} не сохраняется порциями")
 
     try:
         # Вызываем нужную функцию импорта по имени
-        import_function = IMPORT_FUNCTIONS[entity]
-        result = import_function()
+        if import_function in CHUNKED_IMPORTS:
+            result = import_function(dry_run=dry_run, chunk_size=chunk_size)
+        else:
+            result = import_function(dry_run=dry_run)
         return result
 
     except Exception as e:
@@ -2,23 +2,31 @@
 from fastapi import APIRouter, Depends, Query, Body
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, cast, Integer
+from sqlalchemy import select, func, cast, Integer, insert, delete
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 
 from database import get_async_db
 
 # Импортируем модели SQLAlchemy
-from models import Order, Counterparty, Person, OrderStatus, Work
+from models import Order, Counterparty, CounterpartyForm, OrderStatus, Work, OrderComment, Task, Timing, order_work
+from models import OrderRollup
 
 from schemas.order_schem import OrderSerial, OrderRead, PaginatedOrderResponse, OrderCommentSchema, OrderResponse, \
     OrderCreate, OrderUpdate
 from schemas.order_schem import OrderDetailResponse  # Импортируем новую схему
+from schemas.order_schem import OrderCommentsPage, OrderTasksPage, OrderTimingsPage, OrderRollupSchema
 
 # Импортируем другие необходимые схемы, если они используются в OrderDetailResponse
 from schemas.work_schem import WorkSchema
 from schemas.task_schem import TaskSchema
 from schemas.timing_schem import TimingSchema
+from utils.counterparty_names import customer_display_name
+from utils.financial_exposure import mark_orders_changed
+from utils.person_directory import person_directory
+from utils.projection import model_columns, model_response, rows_to_dicts, ProjectionResponse
+from utils.reference_check import find_missing_references
+from utils.rollups import refresh_order_rollups
 from datetime import datetime
 
 from fastapi import status
@@ -113,6 +121,129 @@ async def get_order_serials(
     return [OrderSerial(serial=serial[0]) for serial in serials]
 
 
+# Колонки заказа, которые отдаются в OrderRead (customer и works формируются отдельно)
+_ORDER_READ_COLUMNS = (
+    Order.serial, Order.name, Order.customer_id, Order.priority, Order.status_id,
+    Order.start_moment, Order.deadline_moment, Order.end_moment,
+    Order.materials_cost, Order.materials_paid, Order.products_cost, Order.products_paid,
+    Order.work_cost, Order.work_paid, Order.debt, Order.debt_paid,
+)
+
+# Колонки работы, которые отдаются в WorkSchema
+_WORK_COLUMNS = model_columns(Work, WorkSchema.model_fields)
+
+
+def _order_read_select(order_table=None):
+    """
+    SELECT колонок OrderRead с именем заказчика и формы через JOIN.
+    order_table - таблица/CTE с колонками заказа (по умолчанию сама таблица orders)
+    """
+    if order_table is None:
+        columns = _ORDER_READ_COLUMNS
+        customer_id = Order.customer_id
+    else:
+        columns = [order_table.c[column.key] for column in _ORDER_READ_COLUMNS]
+        customer_id = order_table.c.customer_id
+    query = select(*columns, Counterparty.name.label("customer_name"),
+                   CounterpartyForm.name.label("customer_form_name"))
+    if order_table is not None:
+        query = query.select_from(order_table)
+    return (
+        query
+        .outerjoin(Counterparty, customer_id == Counterparty.id)
+        .outerjoin(CounterpartyForm, Counterparty.form_id == CounterpartyForm.id)
+    )
+
+
+def _order_read_data(row, works: list) -> dict:
+    """
+    Словарь со структурой OrderRead из строки _order_read_select()
+    """
+    order_data = {column.key: row._mapping[column.key] for column in _ORDER_READ_COLUMNS}
+    order_data["customer"] = customer_display_name(row.customer_name, row.customer_form_name)
+    order_data["works"] = works
+    return order_data
+
+
+async def _validate_order_references(
+        session: AsyncSession,
+        customer_id: Optional[int] = None,
+        status_id: Optional[int] = None,
+        work_ids: Optional[List[int]] = None
+) -> None:
+    """
+    Проверяет одним запросом, что контрагент, статус и работы существуют. Иначе - 404.
+    """
+    missing = await find_missing_references(session, {
+        "customer": (Counterparty.id, [customer_id]),
+        "status": (OrderStatus.id, [status_id]),
+        "works": (Work.id, work_ids or []),
+    })
+    if "customer" in missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Контрагент с ID {customer_id} не найден"
+        )
+    if "status" in missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Статус заказа с ID {status_id} не найден"
+        )
+    if "works" in missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Работы с ID {missing['works']} не найдены"
+        )
+
+
+async def _insert_order_works(session: AsyncSession, serial: str, work_ids: List[int]) -> list:
+    """
+    Привязывает работы к заказу одним INSERT ... RETURNING и сразу возвращает их (поля WorkSchema)
+    """
+    if not work_ids:
+        return []
+    inserted = (
+        insert(order_work)
+        .values([{"order_serial": serial, "work_id": work_id} for work_id in sorted(set(work_ids))])
+        .returning(order_work.c.work_id)
+        .cte("inserted_works")
+    )
+    result = await session.execute(
+        select(*_WORK_COLUMNS).join(inserted, inserted.c.work_id == Work.id).order_by(Work.id)
+    )
+    return rows_to_dicts(result)
+
+
+async def _load_order_read(session: AsyncSession, serial: str) -> dict:
+    """
+    Данные заказа со структурой OrderRead: одна проекция с заказчиком и один запрос работ
+    """
+    result = await session.execute(_order_read_select().where(Order.serial == serial))
+    row = result.one()
+    works_by_order = await _get_works_by_order(session, [serial])
+    return _order_read_data(row, works_by_order[serial])
+
+
+async def _get_works_by_order(session: AsyncSession, serials: List[str]) -> dict:
+    """
+    Возвращает словарь {серийный номер заказа: [работа, ...]} для переданных заказов одним запросом.
+    Работы - словари с полями WorkSchema
+    """
+    works_by_order = {serial: [] for serial in serials}
+    if not serials:
+        return works_by_order
+
+    result = await session.execute(
+        select(order_work.c.order_serial, *_WORK_COLUMNS)
+        .join(Work, Work.id == order_work.c.work_id)
+        .where(order_work.c.order_serial.in_(serials))
+        .order_by(Work.id)
+    )
+    for row in result:
+        works_by_order[row.order_serial].append({column.key: row._mapping[column.key] for column in _WORK_COLUMNS})
+    return works_by_order
+
+
 @router.get("/read", response_model=PaginatedOrderResponse)
 async def read_orders(
         skip: int = Query(0, ge=0, description="Number of items to skip"),
@@ -143,18 +274,15 @@ async def read_orders(
       - 'desc' - по убыванию (для serial: новые заказы сначала; для priority: высокий приоритет сначала)
     """
 
-    # Запрос с жадной загрузкой связей
-    query = select(Order).options(
-        selectinload(Order.customer).selectinload(Counterparty.form),
-        selectinload(Order.works)
-    )
+    # Проекция: только колонки, нужные OrderRead, заказчик и его форма - через JOIN в том же запросе,
+    # без построения ORM-объектов Order/Counterparty/CounterpartyForm
+    query = _order_read_select()
 
     # Запрос для подсчета
     count_query = select(func.count(Order.serial))
 
     # --- Применение JOIN для ФИЛЬТРАЦИИ ---
     if search_customer:
-        query = query.join(Order.customer)
         count_query = count_query.join(Order.customer)
 
     # --- Применение фильтров и поиска ---
@@ -236,55 +364,103 @@ async def read_orders(
 
     # --- Выполнение основного запроса ---
     result = await session.execute(query)
-    orders_orm = result.scalars().unique().all()
-
-    # --- Ручное формирование списка данных для ответа ---
-    orders_data_list = []
-    for order in orders_orm:
-        # Формируем строку customer с проверками
-        customer_display_name = "Контрагент не указан"
-        if order.customer:
-            if order.customer.form:
-                customer_display_name = f"{order.customer.form.name} {order.customer.name}"
-            else:
-                customer_display_name = order.customer.name
-
-        # Создаем словарь для Pydantic модели OrderRead
-        order_data = {
-            "serial": order.serial,
-            "name": order.name,
-            "customer": customer_display_name,
-            "customer_id": order.customer_id,
-            "priority": order.priority,
-            "status_id": order.status_id,
-            "start_moment": order.start_moment,
-            "deadline_moment": order.deadline_moment,
-            "end_moment": order.end_moment,
-            "materials_cost": order.materials_cost,
-            "materials_paid": order.materials_paid,
-            "products_cost": order.products_cost,
-            "products_paid": order.products_paid,
-            "work_cost": order.work_cost,
-            "work_paid": order.work_paid,
-            "debt": order.debt,
-            "debt_paid": order.debt_paid,
-            "works": order.works,
-        }
+    rows = result.all()
 
-        orders_data_list.append(OrderRead.model_validate(order_data))
+    # Работы всех заказов страницы - одним запросом
+    works_by_order = await _get_works_by_order(session, [row.serial for row in rows])
 
-    # --- Возврат результата ---
-    return PaginatedOrderResponse(
-        total=total,
-        limit=limit,
-        skip=skip,
-        data=orders_data_list
-    )
+    # --- Ручное формирование списка данных для ответа (структура OrderRead) ---
+    orders_data_list = [_order_read_data(row, works_by_order[row.serial]) for row in rows]
+
+    # --- Возврат результата (структура PaginatedOrderResponse), сериализуется сразу orjson ---
+    return ProjectionResponse({
+        "total": total,
+        "limit": limit,
+        "skip": skip,
+        "data": orders_data_list,
+    })
+
+
+# Разделы детальной информации о заказе, которые можно запросить через параметр include
+ORDER_DETAIL_SECTIONS = ("works", "comments", "tasks", "timings")
+
+
+def _parse_include(include: Optional[str]) -> set[str]:
+    """
+    Разбирает параметр include (список разделов через запятую).
+    Если параметр не передан - возвращаются все разделы.
+    """
+    if include is None:
+        return set(ORDER_DETAIL_SECTIONS)
+
+    sections = {section.strip() for section in include.split(",") if section.strip()}
+    unknown_sections = sections - set(ORDER_DETAIL_SECTIONS)
+    if unknown_sections:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные разделы: {', '.join(sorted(unknown_sections))}. "
+                   f"Допустимые: {', '.join(ORDER_DETAIL_SECTIONS)}"
+        )
+    return sections
+
+
+async def _format_comments(session: AsyncSession, comments) -> List[OrderCommentSchema]:
+    """
+    Формирует список комментариев с ФИО автора
+    """
+    # ФИО берём из кэша справочника людей, без запросов к таблице people
+    authors_map = await person_directory.get_fio_map(session, (comment.person_uuid for comment in comments))
+    return [
+        OrderCommentSchema(
+            id=comment.id,
+            moment_of_creation=comment.moment_of_creation,
+            text=comment.text,
+            person=authors_map.get(comment.person_uuid, "Автор не найден")  # Имя по умолчанию
+        )
+        for comment in comments
+    ]
+
+
+async def _format_tasks(session: AsyncSession, tasks) -> List[TaskSchema]:
+    """
+    Формирует список задач с ФИО исполнителя
+    """
+    executors_map = await person_directory.get_fio_map(session, (task.executor_uuid for task in tasks))
+    formatted_tasks = []
+    for task in tasks:
+        executor_name = executors_map.get(task.executor_uuid,
+                                          "Исполнитель не назначен") if task.executor_uuid else "Исполнитель не назначен"
+
+        # Создаем словарь с данными задачи, включая ФИО исполнителя
+        task_dict = {
+            "id": task.id,
+            "name": task.name,
+            "description": task.description,
+            "status_id": task.status_id,
+            "payment_status_id": task.payment_status_id,
+            "executor": executor_name,  # Подставляем ФИО исполнителя
+            "planned_duration": task.planned_duration,
+            "actual_duration": task.actual_duration,
+            "creation_moment": task.creation_moment,
+            "start_moment": task.start_moment,
+            "deadline_moment": task.deadline_moment,
+            "end_moment": task.end_moment,
+            "price": task.price,
+            "parent_task_id": task.parent_task_id,
+            "root_task_id": task.root_task_id
+        }
+        formatted_tasks.append(TaskSchema.model_validate(task_dict))
+    return formatted_tasks
 
 
 @router.get("/detail/{serial}", response_model=OrderDetailResponse)
 async def get_order_detail(
         serial: str,
+        include: Optional[str] = Query(
+            None,
+            description="Разделы через запятую: works, comments, tasks, timings. "
+                        "По умолчанию - все. Пустая строка - только шапка заказа"
+        ),
         session: AsyncSession = Depends(get_async_db)
 ):
     """
@@ -294,18 +470,26 @@ async def get_order_detail(
 
     Параметры:
     - serial: серийный номер заказа
+    - include: какие разделы загружать. Незапрошенные разделы возвращаются пустыми списками,
+      их можно догрузить постранично через /order/{serial}/comments, /tasks, /timings
 
     Возвращает: детальную информацию о заказе со всеми связями
     """
-    # Запрос с жадной загрузкой всех необходимых связей, КРОМЕ Person для комментариев и исполнителей задач
-    # Мы загрузим Person для комментариев и исполнителей задач отдельными запросами после получения заказа
-    query = select(Order).where(Order.serial == serial).options(
-        selectinload(Order.customer).selectinload(Counterparty.form),
-        selectinload(Order.works),
-        selectinload(Order.comments),  # Загружаем комментарии как есть
-        selectinload(Order.tasks),
-        selectinload(Order.timings)
-    )
+    sections = _parse_include(include)
+
+    # Жадно загружаем только запрошенные разделы.
+    # ФИО авторов комментариев и исполнителей задач берутся из кэша справочника людей
+    options = [selectinload(Order.customer).selectinload(Counterparty.form)]
+    if "works" in sections:
+        options.append(selectinload(Order.works))
+    if "comments" in sections:
+        options.append(selectinload(Order.comments))
+    if "tasks" in sections:
+        options.append(selectinload(Order.tasks))
+    if "timings" in sections:
+        options.append(selectinload(Order.timings))
+
+    query = select(Order).where(Order.serial == serial).options(*options)
 
     # Выполняем запрос
     result = await session.execute(query)
@@ -316,98 +500,22 @@ async def get_order_detail(
 
     # --- Формирование данных для ответа ---
 
-    # 1. Формируем customer_display_name
-    customer_display_name = "Контрагент не указан"
-    if order.customer:
-        if order.customer.form:
-            customer_display_name = f"{order.customer.form.name} {order.customer.name}"
-        else:
-            customer_display_name = order.customer.name
-
-    # 2. Обработка комментариев для получения ФИО автора
-    formatted_comments = []
-    if order.comments:
-        # Собираем уникальные UUID авторов комментариев
-        author_uuids = {comment.person_uuid for comment in order.comments if comment.person_uuid}
-
-        authors_map = {}
-        if author_uuids:
-            # Загружаем данные авторов одним запросом
-            person_query = select(Person).where(Person.uuid.in_(author_uuids))
-            person_results = await session.execute(person_query)
-            # Создаем словарь {uuid: "Фамилия Имя Отчество"}
-            for person in person_results.scalars():
-                fio = f"{person.surname} {person.name}"
-                if person.patronymic:
-                    fio += f" {person.patronymic}"
-                authors_map[person.uuid] = fio
-
-        # Формируем список комментариев с ФИО автора
-        for comment in order.comments:
-            author_name = authors_map.get(comment.person_uuid, "Автор не найден")  # Имя по умолчанию
-            formatted_comments.append(
-                OrderCommentSchema(
-                    id=comment.id,
-                    moment_of_creation=comment.moment_of_creation,
-                    text=comment.text,
-                    person=author_name  # Подставляем ФИО
-                )
-            )
+    # 1. Формируем строку заказчика
+    customer = order.customer
+    customer_name = customer_display_name(customer.name if customer else None,
+                                          customer.form.name if customer and customer.form else None)
 
-    # 3. Обработка задач для получения ФИО исполнителя
-    formatted_tasks = []
-    if order.tasks:
-        # Собираем уникальные UUID исполнителей задач
-        executor_uuids = {task.executor_uuid for task in order.tasks if task.executor_uuid}
-
-        executors_map = {}
-        if executor_uuids:
-            # Загружаем данные исполнителей одним запросом
-            person_query = select(Person).where(Person.uuid.in_(executor_uuids))
-            person_results = await session.execute(person_query)
-            # Создаем словарь {uuid: "Фамилия Имя Отчество"}
-            for person in person_results.scalars():
-                fio = f"{person.surname} {person.name}"
-                if person.patronymic:
-                    fio += f" {person.patronymic}"
-                executors_map[person.uuid] = fio
-
-        # Формируем список задач с ФИО исполнителя
-        for task in order.tasks:
-            executor_name = executors_map.get(task.executor_uuid,
-                                              "Исполнитель не назначен") if task.executor_uuid else "Исполнитель не назначен"
-
-            # Создаем словарь с данными задачи, включая ФИО исполнителя
-            task_dict = {
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "status_id": task.status_id,
-                "payment_status_id": task.payment_status_id,
-                "executor": executor_name,  # Подставляем ФИО исполнителя
-                "planned_duration": task.planned_duration,
-                "actual_duration": task.actual_duration,
-                "creation_moment": task.creation_moment,
-                "start_moment": task.start_moment,
-                "deadline_moment": task.deadline_moment,
-                "end_moment": task.end_moment,
-                "price": task.price,
-                "parent_task_id": task.parent_task_id,
-                "root_task_id": task.root_task_id
-            }
-
-            # Добавляем задачу в список
-            formatted_tasks.append(TaskSchema.model_validate(task_dict))
-
-    # 4. Подготовка остальных данных
-    works_data = [WorkSchema.model_validate(w) for w in order.works]
-    timings_data = [TimingSchema.model_validate(ti) for ti in order.timings]
-
-    # 5. Создаем словарь данных для основного ответа
+    # 2. Подготовка запрошенных разделов
+    works_data = [WorkSchema.model_validate(w) for w in order.works] if "works" in sections else []
+    formatted_comments = await _format_comments(session, order.comments) if "comments" in sections else []
+    formatted_tasks = await _format_tasks(session, order.tasks) if "tasks" in sections else []
+    timings_data = [TimingSchema.model_validate(ti) for ti in order.timings] if "timings" in sections else []
+
+    # 3. Создаем словарь данных для основного ответа
     order_data = {
         "serial": order.serial,
         "name": order.name,
-        "customer": customer_display_name,
+        "customer": customer_name,
         "customer_id": order.customer_id,
         "priority": order.priority,
         "status_id": order.status_id,
@@ -428,9 +536,117 @@ async def get_order_detail(
         "timings": timings_data
     }
 
-    # 6. Создаем и возвращаем объект Pydantic response_model
-    # Pydantic сам проверит соответствие словаря order_data схеме OrderDetailResponse
-    return OrderDetailResponse.model_validate(order_data)
+    # 4. Создаем и возвращаем объект Pydantic response_model
+    # Pydantic сам проверит соответствие словаря order_data схеме OrderDetailResponse,
+    # повторной проверки по response_model не будет
+    return model_response(OrderDetailResponse.model_validate(order_data))
+
+
+async def _fetch_order_section_page(
+        session: AsyncSession,
+        model: type,
+        order_column,
+        serial: str,
+        after_id: Optional[int],
+        limit: int
+) -> tuple[list, Optional[int]]:
+    """
+    Keyset-пагинация по id для разделов заказа (задачи, тайминги, комментарии).
+    Вместо OFFSET используется условие id > after_id, поэтому глубина страницы не влияет на скорость.
+
+    Возвращает: (элементы страницы, курсор следующей страницы или None)
+    """
+    query = select(model).where(order_column == serial)
+    if after_id is not None:
+        query = query.where(model.id > after_id)
+    # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+    query = query.order_by(model.id).limit(limit + 1)
+
+    result = await session.execute(query)
+    items = list(result.scalars().all())
+
+    # Пустая первая страница - проверяем, что заказ вообще существует
+    if not items and after_id is None:
+        order_exists = await session.execute(select(Order.serial).where(Order.serial == serial))
+        if order_exists.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail=f"Заказ с номером {serial} не найден")
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1].id
+    return items, next_cursor
+
+
+@router.get("/{serial}/comments", response_model=OrderCommentsPage)
+async def get_order_comments(
+        serial: str,
+        after_id: Optional[int] = Query(None, description="Курсор: id последнего комментария предыдущей страницы"),
+        limit: int = Query(50, ge=1, le=500, description="Количество комментариев на странице"),
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Постраничное получение комментариев к заказу (с ФИО автора), упорядоченных по id.
+    """
+    comments, next_cursor = await _fetch_order_section_page(
+        session, OrderComment, OrderComment.order_id, serial, after_id, limit
+    )
+    return model_response(OrderCommentsPage(items=await _format_comments(session, comments), next_cursor=next_cursor))
+
+
+@router.get("/{serial}/tasks", response_model=OrderTasksPage)
+async def get_order_tasks(
+        serial: str,
+        after_id: Optional[int] = Query(None, description="Курсор: id последней задачи предыдущей страницы"),
+        limit: int = Query(50, ge=1, le=500, description="Количество задач на странице"),
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Постраничное получение задач заказа (с ФИО исполнителя), упорядоченных по id.
+    """
+    tasks, next_cursor = await _fetch_order_section_page(
+        session, Task, Task.order_serial, serial, after_id, limit
+    )
+    return model_response(OrderTasksPage(items=await _format_tasks(session, tasks), next_cursor=next_cursor))
+
+
+@router.get("/{serial}/timings", response_model=OrderTimingsPage)
+async def get_order_timings(
+        serial: str,
+        after_id: Optional[int] = Query(None, description="Курсор: id последнего тайминга предыдущей страницы"),
+        limit: int = Query(100, ge=1, le=1000, description="Количество таймингов на странице"),
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Постраничное получение таймингов заказа, упорядоченных по id.
+    """
+    timings, next_cursor = await _fetch_order_section_page(
+        session, Timing, Timing.order_serial, serial, after_id, limit
+    )
+    return model_response(OrderTimingsPage(
+        items=[TimingSchema.model_validate(timing) for timing in timings],
+        next_cursor=next_cursor
+    ))
+
+
+@router.get("/{serial}/rollup", response_model=OrderRollupSchema)
+async def get_order_rollup(
+        serial: str,
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Сводка по заказу: время по таймингам, длительности и стоимость задач - одна строка order_rollups.
+    Если сводки ещё нет (данные до её появления), она считается и сохраняется.
+    """
+    rollup = await session.get(OrderRollup, serial)
+    if rollup is None:
+        order_exists = await session.execute(select(Order.serial).where(Order.serial == serial))
+        if order_exists.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail=f"Заказ с номером {serial} не найден")
+        await session.run_sync(refresh_order_rollups, [serial])
+        await session.commit()
+        rollup = await session.get(OrderRollup, serial)
+    return model_response(OrderRollupSchema.model_validate(rollup))
 
 
 @router.post("/create", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
@@ -446,25 +662,10 @@ async def create_order(
 
     Возвращает: созданный заказ с полной информацией
     """
-    # Проверяем существование контрагента
-    counterparty_query = select(Counterparty).where(Counterparty.id == order_data.customer_id)
-    result = await session.execute(counterparty_query)
-    customer = result.scalar_one_or_none()
-    if not customer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Контрагент с ID {order_data.customer_id} не найден"
-        )
-
-    # Проверяем существование статуса заказа
-    status_query = select(OrderStatus).where(OrderStatus.id == order_data.status_id)
-    result = await session.execute(status_query)
-    order_status = result.scalar_one_or_none()
-    if not order_status:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Статус заказа с ID {order_data.status_id} не найден"
-        )
+    # Проверяем существование контрагента, статуса и работ одним запросом
+    await _validate_order_references(
+        session, order_data.customer_id, order_data.status_id, order_data.work_ids
+    )
 
     # Генерируем серийный номер заказа в формате NNN-MM-YYYY
     serial = await generate_order_serial(session)
@@ -473,89 +674,45 @@ async def create_order(
         # Удаляем информацию о часовом поясе
         order_data.deadline_moment = order_data.deadline_moment.replace(tzinfo=None)
 
-    # Создаем новый объект Order
-    new_order = Order(
-        serial=serial,
-        name=order_data.name,
-        customer_id=order_data.customer_id,
-        priority=order_data.priority,
-        status_id=order_data.status_id,
-        start_moment=order_data.start_moment or datetime.now(),
-        deadline_moment=order_data.deadline_moment,
-        end_moment=order_data.end_moment,
-        materials_cost=order_data.materials_cost,
-        materials_paid=order_data.materials_paid or False,
-        products_cost=order_data.products_cost,
-        products_paid=order_data.products_paid or False,
-        work_cost=order_data.work_cost,
-        work_paid=order_data.work_paid or False,
-        debt=order_data.debt,
-        debt_paid=order_data.debt_paid or False
+    # Вставляем заказ через INSERT ... RETURNING в CTE и тем же запросом получаем заказчика,
+    # поэтому перечитывать заказ и его связи после commit не нужно
+    inserted_order = (
+        insert(Order.__table__)
+        .values(
+            serial=serial,
+            name=order_data.name,
+            customer_id=order_data.customer_id,
+            priority=order_data.priority,
+            status_id=order_data.status_id,
+            start_moment=order_data.start_moment or datetime.now(),
+            deadline_moment=order_data.deadline_moment,
+            end_moment=order_data.end_moment,
+            materials_cost=order_data.materials_cost,
+            materials_paid=order_data.materials_paid or False,
+            products_cost=order_data.products_cost,
+            products_paid=order_data.products_paid or False,
+            work_cost=order_data.work_cost,
+            work_paid=order_data.work_paid or False,
+            debt=order_data.debt,
+            debt_paid=order_data.debt_paid or False
+        )
+        .returning(*Order.__table__.c)
+        .cte("inserted_order")
     )
+    result = await session.execute(_order_read_select(inserted_order))
+    order_row = result.one()
+    # Core INSERT не вызывает событий ORM - представление финансовой нагрузки обновится при commit
+    mark_orders_changed(session)
 
     # Добавляем связанные работы, если они указаны
-    if order_data.work_ids:
-        # Проверяем существование всех работ
-        works_query = select(Work).where(Work.id.in_(order_data.work_ids))
-        result = await session.execute(works_query)
-        works = result.scalars().all()
-
-        # Проверяем, что все запрошенные работы существуют
-        found_work_ids = {work.id for work in works}
-        missing_work_ids = set(order_data.work_ids) - found_work_ids
-        if missing_work_ids:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Работы с ID {missing_work_ids} не найдены"
-            )
-
-        # Связываем работы с заказом
-        new_order.works = list(works)
-
-    # Сохраняем новый заказ
-    session.add(new_order)
-    await session.flush()  # Сохраняем заказ, но не коммитим транзакцию
+    works = await _insert_order_works(session, serial, order_data.work_ids)
 
     await session.commit()
 
-    # Явно обновляем объект заказа и загружаем необходимые для ответа связи
-    # attribute_names гарантирует, что эти связи будут загружены одним запросом (или несколькими эффективными)
-    await session.refresh(new_order, attribute_names=["customer", "works"])
-
-    # Если customer был загружен, то явно загружаем его связь 'form'
-    if new_order.customer:
-        await session.refresh(new_order.customer, attribute_names=["form"])
-
-    # Теперь формирование имени безопасно, так как данные уже загружены
-    customer_display_name = "Контрагент не указан"
-    if new_order.customer:
-        if new_order.customer.form:  # Доступ к .form теперь безопасен
-            customer_display_name = f"{new_order.customer.form.name} {new_order.customer.name}"
-        else:
-            customer_display_name = new_order.customer.name
-
     # Создаем ответ с полной информацией о созданном заказе
-    # Доступ к new_order.works также безопасен
-    return OrderResponse(
-        serial=new_order.serial,
-        name=new_order.name,
-        customer=customer_display_name,  # Передаем строку, как ожидает OrderResponse -> OrderRead
-        customer_id = new_order.customer_id,
-        priority=new_order.priority,
-        status_id=new_order.status_id,
-        start_moment=new_order.start_moment,
-        deadline_moment=new_order.deadline_moment,
-        end_moment=new_order.end_moment,
-        materials_cost=new_order.materials_cost,
-        materials_paid=new_order.materials_paid,
-        products_cost=new_order.products_cost,
-        products_paid=new_order.products_paid,
-        work_cost=new_order.work_cost,
-        work_paid=new_order.work_paid,
-        debt=new_order.debt,
-        debt_paid=new_order.debt_paid,
-        # Используем model_validate (Pydantic V2) / from_orm (Pydantic V1)
-        works=[WorkSchema.model_validate(work) for work in new_order.works],
+    return model_response(
+        OrderResponse.model_validate(_order_read_data(order_row, works)),
+        status_code=status.HTTP_201_CREATED
     )
 
 
@@ -579,9 +736,7 @@ async def edit_order(
     Возвращает: обновленный заказ с полной информацией
     """
     # Проверяем существование заказа
-    order_query = select(Order).where(Order.serial == serial).options(
-        selectinload(Order.works)
-    )
+    order_query = select(Order).where(Order.serial == serial)
     result = await session.execute(order_query)
     order = result.scalar_one_or_none()
 
@@ -591,28 +746,13 @@ async def edit_order(
             detail=f"Заказ с номером {serial} не найден"
         )
 
-    # Проверяем существование контрагента, если он меняется
+    # Проверяем существование контрагента, статуса и работ (если они меняются) одним запросом
+    await _validate_order_references(
+        session, order_data.customer_id, order_data.status_id, order_data.work_ids
+    )
     if order_data.customer_id:
-        counterparty_query = select(Counterparty).where(Counterparty.id == order_data.customer_id)
-        result = await session.execute(counterparty_query)
-        customer = result.scalar_one_or_none()
-        if not customer:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Контрагент с ID {order_data.customer_id} не найден"
-            )
         order.customer_id = order_data.customer_id
-
-    # Проверяем существование статуса заказа, если он меняется
     if order_data.status_id:
-        status_query = select(OrderStatus).where(OrderStatus.id == order_data.status_id)
-        result = await session.execute(status_query)
-        order_status = result.scalar_one_or_none()
-        if not order_status:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Статус заказа с ID {order_data.status_id} не найден"
-            )
         order.status_id = order_data.status_id
 
     # Обновляем остальные поля, если они предоставлены
@@ -655,65 +795,18 @@ async def edit_order(
     if order_data.debt_paid is not None:
         order.debt_paid = order_data.debt_paid
 
-    # Обновляем связанные работы, если они указаны
-    if order_data.work_ids is not None:
-        # Проверяем существование всех работ
-        works_query = select(Work).where(Work.id.in_(order_data.work_ids))
-        result = await session.execute(works_query)
-        works = result.scalars().all()
-
-        # Проверяем, что все запрошенные работы существуют
-        found_work_ids = {work.id for work in works}
-        missing_work_ids = set(order_data.work_ids) - found_work_ids
-        if missing_work_ids:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Работы с ID {missing_work_ids} не найдены"
-            )
-
-        # Заменяем список работ
-        order.works = list(works)
-
     # Сохраняем изменения
     session.add(order)
-    await session.commit()
-
-    # Явно обновляем объект заказа для получения свежих данных
-    await session.refresh(order, attribute_names=["customer", "works"])
+    await session.flush()
 
-    # Если customer был загружен, то явно загружаем его связь 'form'
-    if order.customer:
-        await session.refresh(order.customer, attribute_names=["form"])
-
-    # Формируем имя для отображения клиента
-    customer_display_name = "Контрагент не указан"
-    if order.customer:
-        if order.customer.form:
-            customer_display_name = f"{order.customer.form.name} {order.customer.name}"
-        else:
-            customer_display_name = order.customer.name
+    # Обновляем связанные работы, если они указаны: заменяем список целиком
+    if order_data.work_ids is not None:
+        await session.execute(delete(order_work).where(order_work.c.order_serial == serial))
+        await _insert_order_works(session, serial, order_data.work_ids)
 
-    # Преобразуем ORM модель в словарь с обычными значениями
-    order_dict = {
-        "serial": order.serial,
-        "name": order.name,
-        "customer": customer_display_name,  # Это уже строка, не Mapped
-        "customer_id": order.customer_id,  # Добавьте это поле
-        "priority": order.priority,
-        "status_id": order.status_id,
-        "start_moment": order.start_moment,
-        "deadline_moment": order.deadline_moment,
-        "end_moment": order.end_moment,
-        "materials_cost": order.materials_cost,
-        "materials_paid": order.materials_paid,
-        "products_cost": order.products_cost,
-        "products_paid": order.products_paid,
-        "work_cost": order.work_cost,
-        "work_paid": order.work_paid,
-        "debt": order.debt,
-        "debt_paid": order.debt_paid,
-        "works": [WorkSchema.model_validate(work) for work in order.works],
-    }
+    # Данные для ответа - одной проекцией с заказчиком, без refresh связей
+    order_dict = await _load_order_read(session, serial)
+    await session.commit()
 
     # Затем используем model_validate для создания Pydantic модели
-    return OrderResponse.model_validate(order_dict)
+    return model_response(OrderResponse.model_validate(order_dict))
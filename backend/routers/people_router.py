@@ -11,6 +11,7 @@ from uuid import UUID
 from database import get_async_db
 from models import Person
 from schemas.person_schem import PersonCanBe, PersonResponse
+from utils.projection import model_columns, rows_to_dicts, ProjectionResponse
 
 router = APIRouter(
     prefix="/person",
@@ -43,7 +44,8 @@ async def get_people(
 
     Возвращает: список объектов Person
     """
-    query = select(Person)
+    # Выбираем только колонки схемы PersonCanBe, без построения ORM-объектов
+    query = select(*model_columns(Person, PersonCanBe.model_fields))
 
     # Применяем фильтр "можно использовать хотя бы в одной роли"
     if can_be_any is True:
@@ -78,9 +80,8 @@ async def get_people(
 
     # Выполняем запрос
     result = await session.execute(query)
-    people = result.scalars().all()
 
-    return people
+    return ProjectionResponse(rows_to_dicts(result))
 
 
 @router.get("/{uuid}", response_model=PersonResponse)
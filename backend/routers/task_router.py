@@ -0,0 +1,71 @@
+# routers/task_router.py
+"""
+Роутеры для задач: дерево подзадач задачи и дерево задач заказа, сводки по задачам
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import Order, Task, TaskRollup
+from schemas.task_schem import TaskTreeNode, OrderTaskTree, TaskRollupSchema
+from utils.projection import model_response
+from utils.rollups import refresh_task_rollups
+from utils.task_tree import load_task_tree, order_task_roots_condition
+
+router = APIRouter(
+    prefix="/task",
+    tags=["task"],
+)
+
+
+@router.get("/tree/order/{serial}", response_model=OrderTaskTree)
+async def get_order_task_tree(
+        serial: str,
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Все задачи заказа деревом: задачи верхнего уровня с вложенными подзадачами.
+    Всё дерево выбирается одним рекурсивным запросом.
+    """
+    tasks = await load_task_tree(session, order_task_roots_condition(serial))
+    if not tasks:
+        order_exists = await session.execute(select(Order.serial).where(Order.serial == serial))
+        if order_exists.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail=f"Заказ с номером {serial} не найден")
+    return model_response(OrderTaskTree(order_serial=serial, tasks=tasks))
+
+
+@router.get("/tree/{root_id}", response_model=TaskTreeNode)
+async def get_task_tree(
+        root_id: int,
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Задача со всеми подзадачами на любую глубину (вложенно).
+    Всё поддерево выбирается одним рекурсивным запросом.
+    """
+    roots = await load_task_tree(session, Task.id == root_id)
+    if not roots:
+        raise HTTPException(status_code=404, detail=f"Задача с id {root_id} не найдена")
+    return model_response(TaskTreeNode.model_validate(roots[0]))
+
+
+@router.get("/{task_id}/rollup", response_model=TaskRollupSchema)
+async def get_task_rollup(
+        task_id: int,
+        session: AsyncSession = Depends(get_async_db)
+):
+    """
+    Сводка по задаче и всем её подзадачам: время по таймингам, длительности и стоимость -
+    одна строка task_rollups. Если сводки ещё нет (данные до её появления), она считается и сохраняется.
+    """
+    rollup = await session.get(TaskRollup, task_id)
+    if rollup is None:
+        task_exists = await session.execute(select(Task.id).where(Task.id == task_id))
+        if task_exists.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail=f"Задача с id {task_id} не найдена")
+        await session.run_sync(refresh_task_rollups, [task_id])
+        await session.commit()
+        rollup = await session.get(TaskRollup, task_id)
+    return model_response(TaskRollupSchema.model_validate(rollup))
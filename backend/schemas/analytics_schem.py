@@ -0,0 +1,59 @@
+# schemas/analytics_schem.py
+"""
+Схемы для аналитики часов по таймингам
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+import uuid
+
+
+# Общие поля строки аналитики: период и часы за него
+class HoursRow(BaseModel):
+    period_start: Optional[date] = None  # Начало дня/недели/месяца, None - за весь диапазон
+    hours: float  # Суммарное время, часы
+    timings_count: int  # Количество таймингов
+
+
+class PersonHours(HoursRow):
+    executor_id: Optional[uuid.UUID] = None
+    executor: str  # ФИО исполнителя
+
+
+class OrderHours(HoursRow):
+    order_serial: str
+
+
+# Часы по виду работ: все часы заказов, в которых есть эта работа
+class WorkHours(HoursRow):
+    work_id: int
+    work: str  # Название работы
+
+
+# Неоплаченные суммы, руб: материалы, товары и работы - по открытым заказам, долг заказчиков - по всем
+class ExposureAmounts(BaseModel):
+    materials: int = 0
+    products: int = 0
+    work: int = 0
+    payables: int = 0  # Всего нужно заплатить: материалы + товары + работы
+    debt: int = 0  # Должны нам заказчики
+    orders_with_payables: int = 0  # Открытых заказов с неоплаченными материалами, товарами или работами
+    orders_with_debt: int = 0  # Заказов с неоплаченным долгом
+
+
+class StatusExposure(ExposureAmounts):
+    status_id: int
+    status: str
+
+
+class CustomerExposure(ExposureAmounts):
+    customer_id: int
+    customer: str  # Заказчик: 'Форма Название'
+
+
+class FinancialExposure(BaseModel):
+    source: str  # live - посчитано по таблице заказов, view - по материализованному представлению
+    total: ExposureAmounts
+    by_status: List[StatusExposure] = []
+    by_customer: List[CustomerExposure] = []  # По убыванию payables + debt
@@ -2,7 +2,7 @@
 """
 Все схемы для учета шкафов
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 import uuid
 
@@ -35,6 +35,31 @@ class BoxAccountingCreate(BaseModel):
     tester_id: uuid.UUID
 
 
+class BoxAccountingBatchCreate(BoxAccountingCreate):
+    """
+    Серия одинаковых шкафов: count записей с последовательными серийными номерами
+    """
+    count: int = Field(..., ge=1, le=100, description="Количество шкафов в серии")
+
+
+class BoxAccountingBulkRowResult(BaseModel):
+    """
+    Результат по одной строке массового создания шкафов
+    """
+    index: int  # Номер строки во входных данных (с 0)
+    serial_num: Optional[int] = None  # Выданный серийный номер, если строка создана
+    error: Optional[str] = None  # Причина отказа, если строка не создана
+
+
+class BoxAccountingBulkResponse(BaseModel):
+    """
+    Ответ массового создания шкафов
+    """
+    created: int
+    failed: int
+    rows: List[BoxAccountingBulkRowResult]
+
+
 class BoxAccountingResponse(BoxAccountingBase):
     scheme_developer: PersonBase
     assembler: PersonBase
@@ -57,6 +82,9 @@ class PaginatedBoxAccounting(BaseModel):
     page: int  # Текущая страница
     size: int  # Количество элементов на странице
     pages: int  # Общее количество страниц
+    # Курсор следующей страницы (serial_num последнего шкафа), передаётся как after_serial.
+    # None - если страниц больше нет
+    next_cursor: Optional[int] = None
 
     class Config:
         """
@@ -0,0 +1,42 @@
+# schemas/equipment_schem.py
+"""
+Схемы каталога оборудования
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+
+# Позиция каталога: оборудование и, для корпусов шкафов, их габариты, степень защиты и материал
+class EquipmentCatalogItem(BaseModel):
+    id: int
+    name: str
+    model: Optional[str] = None
+    vendor_code: Optional[str] = None  # Артикул
+    description: Optional[str] = None
+    discriminator: Optional[str] = None  # equipment или control_cabinet
+    type_id: Optional[int] = None
+    type_name: Optional[str] = None
+    manufacturer_id: Optional[int] = None
+    manufacturer_name: Optional[str] = None
+    price: Optional[int] = None
+    currency_id: Optional[int] = None
+    currency_name: Optional[str] = None
+    relevance: Optional[bool] = None
+    price_date: Optional[date] = None
+    # Только у корпусов шкафов, у остального оборудования None
+    height: Optional[int] = None
+    width: Optional[int] = None
+    depth: Optional[int] = None
+    ip_id: Optional[int] = None
+    ip_name: Optional[str] = None
+    material_id: Optional[int] = None
+    material_name: Optional[str] = None
+
+
+# Страница каталога (keyset по id).
+# next_cursor - id последней позиции страницы, передаётся как after_id, None - если страниц больше нет
+class EquipmentCatalogPage(BaseModel):
+    items: List[EquipmentCatalogItem] = []
+    next_cursor: Optional[int] = None
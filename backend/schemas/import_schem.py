@@ -0,0 +1,30 @@
+# schemas/import_schem.py
+"""
+Схемы для истории импорта из КИС2
+"""
+
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+
+# Один запуск import_*_from_kis2 (таблица import_runs)
+class ImportRunRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    entity: str
+    source: str  # rest - REST API КИС2, snapshot - снимок БД КИС2
+    status: str
+    started_at: datetime
+    finished_at: datetime
+    fetched: int  # Строк получено из КИС2
+    added: int
+    updated: int
+    unchanged: int
+    skipped: int
+    batch_size: Optional[int] = None
+    fetch_seconds: float  # Получение данных из КИС2, с
+    db_seconds: float  # Работа с БД КИС3, с
+    rows_per_second: Optional[float] = None
+    error: Optional[str] = None
@@ -9,7 +9,7 @@ from typing import Optional
 from typing import List
 from pydantic import ConfigDict
 from schemas.work_schem import WorkSchema
-from datetime import datetime
+from datetime import datetime, timedelta
 from schemas.task_schem import TaskSchema
 from schemas.timing_schem import TimingSchema
 
@@ -131,6 +131,39 @@ class OrderDetailResponse(OrderRead):
     timings: List[TimingSchema] = []  # Указываем тип явно
 
 
+# Схемы для постраничной (keyset) выдачи разделов заказа.
+# next_cursor - id последнего элемента страницы, передаётся как after_id для следующей страницы,
+# None - если страниц больше нет
+class OrderCommentsPage(BaseModel):
+    items: List[OrderCommentSchema] = []
+    next_cursor: Optional[int] = None
+
+
+class OrderTasksPage(BaseModel):
+    items: List[TaskSchema] = []
+    next_cursor: Optional[int] = None
+
+
+class OrderTimingsPage(BaseModel):
+    items: List[TimingSchema] = []
+    next_cursor: Optional[int] = None
+
+
+# Сводка по заказу (таблица order_rollups)
+class OrderRollupSchema(BaseModel):
+    order_serial: str
+    logged_time: timedelta  # Время по всем таймингам заказа
+    planned_duration: Optional[timedelta] = None  # Сумма запланированных длительностей задач
+    actual_duration: Optional[timedelta] = None  # Сумма фактических длительностей задач
+    price: Optional[int] = None  # Сумма стоимостей задач, руб
+    tasks_count: int
+    timings_count: int
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class OrderCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=64, description="Название заказа")
     customer_id: int = Field(..., description="ID заказчика")
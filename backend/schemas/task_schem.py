@@ -4,7 +4,7 @@
 """
 
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, timedelta
 import uuid
 
@@ -29,3 +29,29 @@ class TaskSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Задача с вложенными подзадачами (дерево задач)
+class TaskTreeNode(TaskSchema):
+    subtasks: List["TaskTreeNode"] = []
+
+
+# Дерево задач заказа: задачи верхнего уровня с подзадачами
+class OrderTaskTree(BaseModel):
+    order_serial: str
+    tasks: List[TaskTreeNode] = []
+
+
+# Сводка по задаче и её подзадачам (таблица task_rollups)
+class TaskRollupSchema(BaseModel):
+    task_id: int
+    logged_time: timedelta  # Время по таймингам самой задачи
+    subtree_logged_time: timedelta  # Время по таймингам задачи и всех подзадач
+    subtree_planned_duration: Optional[timedelta] = None
+    subtree_actual_duration: Optional[timedelta] = None
+    subtree_price: Optional[int] = None
+    subtree_tasks: int
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
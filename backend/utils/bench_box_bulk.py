@@ -0,0 +1,92 @@
+# utils/bench_box_bulk.py
+"""
+Бенчмарк создания шкафов: по одному через /box-accounting/create/ против массового /bulk-create/.
+
+Эндпоинты вызываются напрямую как функции (без HTTP и JWT), на БД из .env.
+Для записей берутся первый заказ и первый человек из БД. Созданные шкафы в конце удаляются,
+но номера из последовательности расходуются - запускать на тестовой БД.
+
+Запуск из папки backend:
+    python utils/bench_box_bulk.py --rows 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson  # noqa: E402
+from colorama import init, Fore  # noqa: E402
+from sqlalchemy import delete, select  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from database import async_engine, async_session_maker  # noqa: E402
+from models import BoxAccounting, Order, Person  # noqa: E402
+from routers.box_accountig_router import create_box_accounting, _bulk_create_boxes  # noqa: E402
+from schemas import BoxAccountingCreate  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+# Пользователь для вызова эндпоинтов напрямую
+_BENCH_USER = SimpleNamespace(username="bench")
+
+
+async def _sample_box() -> BoxAccountingCreate:
+    async with async_session_maker() as session:
+        order_serial = (await session.execute(select(Order.serial).limit(1))).scalar()
+        person_uuid = (await session.execute(select(Person.uuid).limit(1))).scalar()
+    if order_serial is None or person_uuid is None:
+        raise SystemExit("В БД нужен хотя бы один заказ и один человек")
+    return BoxAccountingCreate(name="Бенчмарк", order_id=order_serial, scheme_developer_id=person_uuid,
+                               assembler_id=person_uuid, tester_id=person_uuid)
+
+
+async def _one_by_one(box: BoxAccountingCreate, rows: int) -> list:
+    serial_nums = []
+    for _ in range(rows):
+        async with async_session_maker() as session:
+            response = await create_box_accounting(box, session, _BENCH_USER)
+            serial_nums.append(orjson.loads(response.body)["serial_num"])
+    return serial_nums
+
+
+async def _bulk(box: BoxAccountingCreate, rows: int) -> list:
+    async with async_session_maker() as session:
+        result = await _bulk_create_boxes(session, [box] * rows)
+    return [row["serial_num"] for row in result["rows"]]
+
+
+async def _cleanup(serial_nums: list) -> None:
+    async with async_session_maker() as session:
+        await session.execute(delete(BoxAccounting).where(BoxAccounting.serial_num.in_(serial_nums)))
+        await session.commit()
+
+
+async def main(rows: int) -> None:
+    # Логирование SQL сильно искажает замеры
+    async_engine.echo = False
+    box = await _sample_box()
+
+    table = []
+    for name, run in (("По одному (/create/)", _one_by_one), ("Массово (/bulk-create/)", _bulk)):
+        started = time.perf_counter()
+        serial_nums = await run(box, rows)
+        elapsed = time.perf_counter() - started
+        await _cleanup(serial_nums)
+        table.append([name, rows, f"{elapsed:.2f}", f"{rows / elapsed:,.0f}"])
+
+    print(Fore.CYAN + f"Создание {rows} шкафов")
+    print(tabulate(table, headers=["Способ", "Строк", "Время, с", "Строк в секунду"]))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк массового создания шкафов")
+    parser.add_argument("--rows", type=int, default=1000, help="Количество шкафов")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,137 @@
+# utils/bench_durations.py
+"""
+Бенчмарк разбора длительностей КИС2 ('1 01:03:00') в timedelta.
+
+"Было"  - строка переводится в ISO 8601 регулярными выражениями (convert_duration_to_iso8601),
+          при импорте ISO 8601 разбирается обратно split-ами (parse_iso_duration).
+"Стало" - kis2.durations: parse_duration без кэша, parse_duration с кэшем и пакетный parse_durations.
+
+БД не нужна, значения генерируются. Запуск из папки backend:
+    python utils/bench_durations.py --values 1000000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import timedelta
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from kis2.DjangoRestAPI import batched  # noqa: E402
+from kis2.durations import parse_duration, parse_durations, _parse_duration_string  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+
+# Прежний способ: строка Django -> ISO 8601 -> timedelta
+
+def _legacy_to_iso8601(duration_str):
+    if not duration_str:
+        return None
+    day_time_match = re.compile(r'^(\d+)\s+(\d{2}):(\d{2}):(\d{2})$').match(duration_str)
+    if day_time_match:
+        days, hours, minutes, seconds = map(int, day_time_match.groups())
+        return f"P{days}DT{hours}H{minutes}M{seconds}S"
+    time_match = re.compile(r'^(\d{2}):(\d{2}):(\d{2})$').match(duration_str)
+    if time_match:
+        hours, minutes, seconds = map(int, time_match.groups())
+        return f"PT{hours}H{minutes}M{seconds}S"
+    return None
+
+
+def _legacy_parse_iso(duration_str):
+    if not duration_str or not duration_str.startswith('P'):
+        return None
+    days = hours = minutes = seconds = 0
+    duration_str = duration_str[1:]
+    if 'T' in duration_str:
+        days_part, time_part = duration_str.split('T')
+    else:
+        days_part, time_part = duration_str, ''
+    if 'D' in days_part:
+        days = int(days_part.split('D')[0])
+    if 'H' in time_part:
+        hours_part = time_part.split('H')[0]
+        hours = int(hours_part[-2:]) if hours_part else 0
+        time_part = time_part.split('H')[1]
+    if 'M' in time_part:
+        minutes_part = time_part.split('M')[0]
+        minutes = int(minutes_part[-2:]) if minutes_part else 0
+        time_part = time_part.split('M')[1]
+    if 'S' in time_part:
+        seconds = int(time_part.split('S')[0])
+    return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _legacy(values: list) -> list:
+    return [_legacy_parse_iso(_legacy_to_iso8601(value)) for value in values]
+
+
+def _uncached(values: list) -> list:
+    parse = _parse_duration_string.__wrapped__
+    return [parse(value) if value else None for value in values]
+
+
+def _cached(values: list) -> list:
+    _parse_duration_string.cache_clear()
+    return [parse_duration(value) for value in values]
+
+
+def _batch(values: list) -> list:
+    _parse_duration_string.cache_clear()
+    result = []
+    for values_batch in batched(values, 1000):
+        result.extend(parse_durations(values_batch))
+    return result
+
+
+def _generate(count: int, unique: bool) -> list:
+    rnd = random.Random(42)
+    if unique:
+        # Худший случай для кэша: почти все значения разные
+        return [f"{i // 86400 % 30} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}" if i % 3 else
+                f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}" for i in range(count)]
+    # Как в КИС2: плановые часы и время в таймингах кратны 5 минутам
+    values = []
+    for _ in range(count):
+        hours, minutes = rnd.randint(0, 47), rnd.choice(range(0, 60, 5))
+        days, hours = divmod(hours, 24)
+        values.append(f"{days} {hours:02d}:{minutes:02d}:00" if days else f"{hours:02d}:{minutes:02d}:00")
+    return values
+
+
+def main(count: int, unique: bool) -> None:
+    values = _generate(count, unique)
+    print(Fore.CYAN + f"Разбор {count:,} длительностей ({len(set(values)):,} уникальных)")
+
+    expected = None
+    table = []
+    for name, run in (("Было: строка -> ISO 8601 -> timedelta", _legacy),
+                      ("parse_duration без кэша", _uncached),
+                      ("parse_duration с кэшем", _cached),
+                      ("parse_durations порциями по 1000", _batch)):
+        started = time.perf_counter()
+        result = run(values)
+        elapsed = time.perf_counter() - started
+        if expected is None:
+            expected, legacy_time = result, elapsed
+        elif result != expected:
+            raise SystemExit(f"{name}: результат отличается от прежнего способа")
+        table.append([name, f"{elapsed:.2f}", f"{count / elapsed:,.0f}", f"{legacy_time / elapsed:.1f}x"])
+
+    print(tabulate(table, headers=["Способ", "Время, с", "Значений в секунду", "Ускорение"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора длительностей КИС2")
+    parser.add_argument("--values", type=int, default=1_000_000, help="Количество длительностей")
+    parser.add_argument("--unique", action="store_true", help="Почти все значения разные (худший случай для кэша)")
+    args = parser.parse_args()
+    main(args.values, args.unique)
@@ -0,0 +1,130 @@
+# utils/bench_import_parallel.py
+"""
+Бенчмарк параллельного полного импорта из КИС2: import_all_from_kis2 с workers=1 (этапы друг за другом)
+против пула процессов, где независимые этапы одной волны IMPORT_WAVES идут одновременно.
+
+По умолчанию замеряется настоящий импорт с записью в БД - тот путь, который ускоряет пул процессов.
+Перед каждым прогоном схема public пересоздаётся и миграции накатываются заново, чтобы все прогоны
+импортировали в пустую БД. Поэтому БД из .env должна быть одноразовой: её имя нужно подтвердить
+параметром --confirm-db. С --dry-run замеряется пробный импорт (только чтение, БД не пересоздаётся).
+Нужны PostgreSQL КИС3 (из .env) и снимок БД КИС2.
+
+Ускорение заметно только на машине с несколькими ядрами: при одном доступном ядре бенчмарк предупреждает,
+что замер показывает лишь накладные расходы пула. В конце печатается строка итогов для описания изменений.
+
+Запуск из папки backend:
+    DB_NAME=kis3_bench python utils/bench_import_parallel.py --snapshot /backups/kis2/db.sqlite3 \\
+        --confirm-db kis3_bench --workers 1 4
+    python utils/bench_import_parallel.py --snapshot /backups/kis2/db.sqlite3 --dry-run
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+# Добавляем родительскую директорию в путь поиска модулей
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from colorama import init, Fore  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from config import DB_NAME, KIS2_SNAPSHOT_PATH  # noqa: E402
+from database import sync_engine  # noqa: E402
+from kis2.snapshot import use_kis2_snapshot  # noqa: E402
+from utils.import_data import IMPORT_WAVES, import_all_from_kis2  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+
+def _available_cpus() -> int:
+    """
+    Ядра, на которых может выполняться процесс (в контейнере их бывает меньше, чем os.cpu_count())
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _reset_database() -> None:
+    """
+    Пересоздаёт схему public одноразовой БД и накатывает все миграции
+    """
+    with sync_engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    sync_engine.dispose()
+    alembic_config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    alembic_config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(alembic_config, "head")
+
+
+def main(snapshot_path: str, workers_list: list, repeat: int, dry_run: bool) -> None:
+    cpus = _available_cpus()
+    mode = "пробный импорт" if dry_run else f"импорт с записью в БД {DB_NAME}"
+    print(Fore.CYAN + f"Полный {mode} из снимка {snapshot_path}, доступно ядер: {cpus}")
+    if cpus < 2:
+        print(Fore.YELLOW + "Доступно одно ядро: этапы не могут идти одновременно, "
+                            "замер покажет только накладные расходы пула, а не ускорение")
+    elif max(workers_list) > cpus:
+        print(Fore.YELLOW + f"Процессов больше, чем ядер ({max(workers_list)} > {cpus}): "
+                            "лишние процессы делят ядра и ускорения не добавляют")
+
+    table = []
+    failed_stages = set()
+    sequential_time = None
+    with use_kis2_snapshot(snapshot_path):
+        for workers in workers_list:
+            best = None
+            for _ in range(repeat):
+                if not dry_run:
+                    _reset_database()
+                # Построчный вывод этапов импорта в замер не попадает
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = import_all_from_kis2(dry_run=dry_run, workers=workers)
+                if "timing" not in result:
+                    raise SystemExit(result.get("message", "Импорт не выполнен"))
+                failed_stages.update(name for name, details in result["details"].items()
+                                     if details.get("status") == "error")
+                if best is None or result["timing"]["wall_seconds"] < best["wall_seconds"]:
+                    best = result["timing"]
+            if sequential_time is None:
+                sequential_time = best["wall_seconds"]
+            table.append([workers, f"{best['wall_seconds']:.2f}", f"{best['stages_seconds']:.2f}",
+                          best["parallelism"], f"{sequential_time / best['wall_seconds']:.2f}x"])
+
+    print(tabulate(table, headers=["Процессов", "Время, с", "Сумма этапов, с", "Этапов одновременно",
+                                   f"Ускорение к {workers_list[0]}"]))
+    if failed_stages:
+        print(Fore.YELLOW + f"Этапы с ошибкой (их время в замере неполное): {', '.join(sorted(failed_stages))}")
+
+    # Итоги одной строкой на размер пула - для описания изменений
+    for workers, wall_seconds, _, _, speedup in table[1:]:
+        print(Fore.GREEN + f"{mode}, workers={workers}: {wall_seconds} с против {table[0][1]} с "
+                           f"при workers={workers_list[0]} - {speedup} (ядер: {cpus}, повторов: {repeat}, лучший)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк параллельного импорта из КИС2")
+    parser.add_argument("--snapshot", default=KIS2_SNAPSHOT_PATH, help="Файл db.sqlite3 КИС2")
+    # Больше процессов, чем этапов в самой широкой волне, одновременно не работает
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, min(_available_cpus(), max(len(wave) for wave in IMPORT_WAVES))}),
+                        help="Размеры пула процессов, первый - база для ускорения")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов на каждый размер пула, берётся лучший")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Замерять пробный импорт (только чтение) вместо импорта с записью")
+    parser.add_argument("--confirm-db",
+                        help="Имя БД из .env: подтверждение, что её можно пересоздавать перед каждым прогоном")
+    args = parser.parse_args()
+    if not args.snapshot:
+        parser.error("нужен --snapshot или KIS2_SNAPSHOT_PATH в .env")
+    if not args.dry_run and args.confirm_db != DB_NAME:
+        parser.error(f"импорт с записью пересоздаёт БД {DB_NAME}: подтвердите --confirm-db {DB_NAME} "
+                     "(только для одноразовой БД) или используйте --dry-run")
+    main(args.snapshot, args.workers, args.repeat, args.dry_run)
@@ -0,0 +1,211 @@
+# utils/bench_kis2_reader.py
+"""
+Бенчмарк чтения БД КИС2: прежний способ (своё соединение на каждую функцию, справочники словарями
+в Python, работы заказа отдельным запросом на каждый заказ) против Kis2Reader (одно соединение
+только на чтение, JOIN-ы в SQL, fetchmany).
+
+Синтетическая БД КИС2 создаётся во временной папке, PostgreSQL не нужен.
+
+Запуск из папки backend:
+    python utils/bench_kis2_reader.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from kis2.DjangoRestAPI import get_order_status  # noqa: E402
+from kis2.work_with_DB import Kis2Reader  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+_SCHEMA = """
+CREATE TABLE main_countries (id integer PRIMARY KEY, name varchar(16) NOT NULL);
+CREATE TABLE main_companiesform (id integer PRIMARY KEY, name varchar(8) NOT NULL);
+CREATE TABLE main_city (id integer PRIMARY KEY, name varchar(32) NOT NULL UNIQUE);
+CREATE TABLE main_company (id integer PRIMARY KEY, name varchar(64) NOT NULL UNIQUE, note varchar(255),
+    form_id bigint REFERENCES main_companiesform (id), city_id bigint REFERENCES main_city (id));
+CREATE TABLE main_person (id integer PRIMARY KEY, name varchar(32), patronymic varchar(32), surname varchar(32),
+    phone varchar(16), email varchar(32), company_id bigint REFERENCES main_company (id));
+CREATE TABLE main_work (id integer PRIMARY KEY, name varchar(100) NOT NULL, description text NOT NULL);
+CREATE TABLE main_order (name varchar(64), serial varchar(16) NOT NULL PRIMARY KEY, priority integer,
+    status integer, customer_id bigint REFERENCES main_company (id), dedline_moment datetime,
+    end_moment datetime, start_moment datetime, "materialsCost" integer NOT NULL, "materialsPaid" bool NOT NULL,
+    "productsCost" integer NOT NULL, "productsPaid" bool NOT NULL, "workCost" integer NOT NULL,
+    "workPaid" bool NOT NULL, debt integer NOT NULL, "debtPaid" bool NOT NULL);
+CREATE TABLE main_order_works (id integer PRIMARY KEY, order_id varchar(16) NOT NULL REFERENCES main_order (serial),
+    work_id bigint NOT NULL REFERENCES main_work (id));
+CREATE INDEX main_order_works_order_id ON main_order_works (order_id);
+CREATE TABLE main_box_accounting (serial_num integer PRIMARY KEY, order_id varchar(16) NOT NULL,
+    assembler_id bigint NOT NULL, programmer_id bigint, scheme_developer_id bigint NOT NULL,
+    tester_id bigint NOT NULL, name varchar(64) NOT NULL);
+CREATE TABLE main_ordercoment (id integer PRIMARY KEY, text text NOT NULL, order_id varchar(16),
+    person_id bigint, moment_of_creation datetime NOT NULL);
+"""
+
+
+def _build_database(path: str, rows: int) -> dict:
+    """
+    Синтетическая БД КИС2 примерно на rows строк во всех таблицах
+    """
+    rnd = random.Random(42)
+    counts = {
+        "companies": max(rows // 1000, 1),
+        "persons": max(rows // 100, 1),
+        "orders": max(rows // 10, 1),
+        "order_works": rows // 5,
+        "box_accounting": rows // 5,
+    }
+    counts["order_comments"] = max(rows - sum(counts.values()), 0)
+    moment = "2024-05-18 16:49:55"
+
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    conn.executemany("INSERT INTO main_countries VALUES (?, ?)", [(i, f"Страна {i}") for i in range(1, 21)])
+    conn.executemany("INSERT INTO main_companiesform VALUES (?, ?)", [(i, f"Ф{i}") for i in range(1, 11)])
+    conn.executemany("INSERT INTO main_city VALUES (?, ?)", [(i, f"Город {i}") for i in range(1, 101)])
+    conn.executemany("INSERT INTO main_work VALUES (?, ?, ?)", [(i, f"Работа {i}", "") for i in range(1, 51)])
+    conn.executemany("INSERT INTO main_company VALUES (?, ?, ?, ?, ?)", [
+        (i, f"Компания {i}", None, rnd.randint(1, 10), rnd.randint(1, 100))
+        for i in range(1, counts["companies"] + 1)])
+    conn.executemany("INSERT INTO main_person VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (i, f"Имя{i}", f"Отчество{i}", f"Фамилия{i}", None, None, rnd.randint(1, counts["companies"]))
+        for i in range(1, counts["persons"] + 1)])
+    serials = [f"{i:06d}-2024" for i in range(1, counts["orders"] + 1)]
+    conn.executemany("INSERT INTO main_order VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (f"Заказ {serial}", serial, 0, rnd.randint(0, 7), rnd.randint(1, counts["companies"]), moment, None, moment,
+         100, 1, 0, 0, 10, 0, 0, 0)
+        for serial in serials])
+    conn.executemany("INSERT INTO main_order_works (order_id, work_id) VALUES (?, ?)", [
+        (rnd.choice(serials), rnd.randint(1, 50)) for _ in range(counts["order_works"])])
+
+    def person():
+        return rnd.randint(1, counts["persons"])
+
+    conn.executemany("INSERT INTO main_box_accounting VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (i, rnd.choice(serials), person(), person() if i % 3 else None, person(), person(), f"Шкаф {i}")
+        for i in range(1, counts["box_accounting"] + 1)])
+    conn.executemany("INSERT INTO main_ordercoment (text, order_id, person_id, moment_of_creation) "
+                     "VALUES (?, ?, ?, ?)", [
+                         (f"Комментарий {i}", rnd.choice(serials), person(), moment)
+                         for i in range(counts["order_comments"])])
+    conn.commit()
+    conn.close()
+    return counts
+
+
+# Прежний способ чтения: соединение на каждую функцию, справочники словарями
+
+def _legacy_query(path: str, query: str, params: tuple = ()) -> list:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def _legacy_dict_person(path: str) -> dict:
+    persons = _legacy_query(path, "SELECT id, surname, name, patronymic FROM main_person")
+    return {p[0]: p[1] + p[2] + p[3] for p in persons}
+
+
+def _legacy_persons(path: str) -> list:
+    companies = dict(_legacy_query(path, "SELECT id, name FROM main_company"))
+    return [{'name': p[1], 'patronymic': p[2], 'surname': p[3], 'phone': p[4], 'email': p[5],
+             'company': companies[p[6]]}
+            for p in _legacy_query(path, "SELECT * FROM main_person")]
+
+
+def _legacy_orders(path: str) -> list:
+    companies = dict(_legacy_query(path, "SELECT id, name FROM main_company"))
+    orders = []
+    for o in _legacy_query(path, 'SELECT serial, name, customer_id, priority, status, start_moment, dedline_moment, '
+                                 'end_moment, "materialsCost", "materialsPaid", "productsCost", "productsPaid", '
+                                 '"workCost", "workPaid", debt, "debtPaid" FROM main_order'):
+        works = dict(_legacy_query(path, "SELECT id, name FROM main_work"))
+        order_works = [works[w[0]] for w in _legacy_query(
+            path, "SELECT work_id FROM main_order_works WHERE order_id = ?", (o[0],))]
+        orders.append({'serial': o[0], 'name': o[1], 'customer': companies[o[2]], 'priority': o[3],
+                       'status': get_order_status(o[4]), 'start_moment': o[5], 'deadline_moment': o[6],
+                       'end_moment': o[7], 'works': order_works, 'materials_cost': o[8], 'materialsPaid': o[9],
+                       'products_cost': o[10], 'productsPaid': o[11], 'work_cost': o[12], 'workPaid': o[13],
+                       'debt': o[14], 'debtPaid': o[15]})
+    return orders
+
+
+def _legacy_box_accounting(path: str) -> list:
+    persons = _legacy_dict_person(path)
+    return [{'serial_num': b[0], 'name': b[1], 'order_id': b[2], 'scheme_developer': persons[b[3]],
+             'assembler': persons[b[4]], 'programmer': persons[b[5]] if b[5] else 0, 'tester': persons[b[6]]}
+            for b in _legacy_query(path, "SELECT serial_num, name, order_id, scheme_developer_id, assembler_id, "
+                                         "programmer_id, tester_id FROM main_box_accounting")]
+
+
+def _legacy_order_comments(path: str) -> list:
+    persons = _legacy_dict_person(path)
+    return [{'order_id': c[0], 'text': c[1], 'moment_of_creation': c[2], 'person': persons[c[3]]}
+            for c in _legacy_query(path, "SELECT order_id, text, moment_of_creation, person_id FROM main_ordercoment")]
+
+
+def _timed(func) -> tuple:
+    started = time.perf_counter()
+    rows = sum(1 for _ in func())
+    return rows, time.perf_counter() - started
+
+
+def _peak_memory_mb(func) -> float:
+    # Отдельный проход: tracemalloc сам заметно замедляет выполнение
+    tracemalloc.start()
+    for _ in func():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main(rows: int, fetch_size: int, skip_legacy_orders: bool) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "db.sqlite3")
+        print(Fore.CYAN + f"Создание синтетической БД КИС2 на {rows:,} строк...")
+        counts = _build_database(path, rows)
+        print(tabulate(counts.items(), headers=["Таблица", "Строк"]))
+
+        with Kis2Reader(path, fetch_size=fetch_size) as reader:
+            cases = [
+                ("Люди", lambda: _legacy_persons(path), reader.iter_persons),
+                ("Заказы", None if skip_legacy_orders else lambda: _legacy_orders(path), reader.iter_orders),
+                ("Учёт шкафов", lambda: _legacy_box_accounting(path), reader.iter_box_accounting),
+                ("Комментарии", lambda: _legacy_order_comments(path), reader.iter_order_comments),
+            ]
+            table = []
+            for name, legacy, current in cases:
+                count, reader_time = _timed(current)
+                reader_memory = f"{_peak_memory_mb(current):.1f}"
+                if legacy is None:
+                    table.append([name, count, "-", f"{reader_time:.2f}", "-", "-", reader_memory])
+                    continue
+                _, legacy_time = _timed(legacy)
+                table.append([name, count, f"{legacy_time:.2f}", f"{reader_time:.2f}",
+                              f"{legacy_time / reader_time:.1f}x", f"{_peak_memory_mb(legacy):.1f}", reader_memory])
+
+    print(Fore.CYAN + f"\nЧтение БД КИС2 ({rows:,} строк, fetchmany по {fetch_size})")
+    print(tabulate(table, headers=["Сущность", "Строк", "Прежний способ, с", "Kis2Reader, с", "Ускорение",
+                                   "Прежний способ, МБ", "Kis2Reader, МБ"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения БД КИС2")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Всего строк в синтетической БД")
+    parser.add_argument("--fetch-size", type=int, default=5000, help="Размер порции fetchmany")
+    parser.add_argument("--skip-legacy-orders", action="store_true",
+                        help="Не замерять прежнее чтение заказов (запрос работ на каждый заказ)")
+    args = parser.parse_args()
+    main(args.rows, args.fetch_size, args.skip_legacy_orders)
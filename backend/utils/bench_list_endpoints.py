@@ -0,0 +1,153 @@
+# utils/bench_list_endpoints.py
+"""
+Бенчмарк списочных эндпоинтов: строк в секунду до и после перехода на проекции колонок.
+
+"ORM"       - выборка ORM-объектов, копирование атрибутов в словари, jsonable_encoder + json.dumps
+              (так ответ формировался раньше и так его сериализует FastAPI по умолчанию).
+"Проекция"  - выборка только колонок ответа, словари из Row-кортежей, orjson (utils/projection.py).
+
+Запуск из папки backend, работает с БД из .env:
+    python utils/bench_list_endpoints.py --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from database import async_engine, async_session_maker  # noqa: E402
+from models import Person, BoxAccounting, Order, Counterparty, CounterpartyForm, Country, City, \
+    Manufacturer, Work, OrderStatus  # noqa: E402
+from schemas.person_schem import PersonCanBe  # noqa: E402
+from routers.order_router import _ORDER_READ_COLUMNS, _get_works_by_order  # noqa: E402
+from utils.counterparty_names import customer_display_name  # noqa: E402
+from utils.projection import model_columns, rows_to_dicts, dumps  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+# Простые списки: эндпоинт -> (модель, поля ответа)
+SIMPLE_CASES = {
+    "person/read": (Person, list(PersonCanBe.model_fields)),
+    "box-accounting/read": (BoxAccounting, ["serial_num", "name", "order_id", "scheme_developer_id",
+                                            "assembler_id", "programmer_id", "tester_id"]),
+    "get_all/countries": (Country, ["id", "name"]),
+    "get_all/cities": (City, ["id", "name", "country_id"]),
+    "get_all/manufacturers": (Manufacturer, ["id", "name", "country_id"]),
+    "get_all/works": (Work, ["id", "name", "description", "active"]),
+    "get_all/order_statuses": (OrderStatus, ["id", "name", "description"]),
+}
+
+
+def _make_simple_orm(model, fields):
+    async def run(session) -> int:
+        result = await session.execute(select(model))
+        items = [{field: getattr(item, field) for field in fields} for item in result.scalars().all()]
+        json.dumps(jsonable_encoder(items))
+        return len(items)
+
+    return run
+
+
+def _make_simple_projection(model, fields):
+    async def run(session) -> int:
+        result = await session.execute(select(*model_columns(model, fields)))
+        items = rows_to_dicts(result)
+        dumps(items)
+        return len(items)
+
+    return run
+
+
+async def _orders_orm(session) -> int:
+    result = await session.execute(
+        select(Order).options(selectinload(Order.customer).selectinload(Counterparty.form),
+                              selectinload(Order.works))
+    )
+    items = []
+    for order in result.scalars().all():
+        item = {column.key: getattr(order, column.key) for column in _ORDER_READ_COLUMNS}
+        item["customer"] = customer_display_name(order.customer.name if order.customer else None,
+                                                  order.customer.form.name if order.customer else None)
+        item["works"] = [{"id": w.id, "name": w.name, "description": w.description, "active": w.active}
+                         for w in order.works]
+        items.append(item)
+    json.dumps(jsonable_encoder(items))
+    return len(items)
+
+
+async def _orders_projection(session) -> int:
+    result = await session.execute(
+        select(*_ORDER_READ_COLUMNS, Counterparty.name.label("customer_name"),
+               CounterpartyForm.name.label("customer_form_name"))
+        .outerjoin(Counterparty, Order.customer_id == Counterparty.id)
+        .outerjoin(CounterpartyForm, Counterparty.form_id == CounterpartyForm.id)
+    )
+    rows = result.all()
+    works_by_order = await _get_works_by_order(session, [row.serial for row in rows])
+    items = []
+    for row in rows:
+        item = {column.key: row._mapping[column.key] for column in _ORDER_READ_COLUMNS}
+        item["customer"] = customer_display_name(row.customer_name, row.customer_form_name)
+        item["works"] = works_by_order[row.serial]
+        items.append(item)
+    dumps(items)
+    return len(items)
+
+
+def build_cases() -> dict:
+    """
+    Эндпоинт -> (вариант ORM, вариант с проекцией)
+    """
+    cases = {"order/read": (_orders_orm, _orders_projection)}
+    for name, (model, fields) in SIMPLE_CASES.items():
+        cases[name] = (_make_simple_orm(model, fields), _make_simple_projection(model, fields))
+    return cases
+
+
+async def _measure(run, repeat: int) -> float:
+    """
+    Возвращает строк в секунду. Каждый прогон - в новой сессии, чтобы identity map не кэшировала объекты
+    """
+    async with async_session_maker() as session:
+        await run(session)  # прогрев
+    rows = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        async with async_session_maker() as session:
+            rows += await run(session)
+    elapsed = time.perf_counter() - started
+    return rows / elapsed if elapsed > 0 else 0.0
+
+
+async def main(repeat: int) -> None:
+    # Логирование SQL сильно искажает замеры
+    async_engine.echo = False
+
+    table = []
+    for name, (orm_run, projection_run) in build_cases().items():
+        orm_rate = await _measure(orm_run, repeat)
+        projection_rate = await _measure(projection_run, repeat)
+        speedup = projection_rate / orm_rate if orm_rate else 0.0
+        table.append([name, f"{orm_rate:,.0f}", f"{projection_rate:,.0f}", f"x{speedup:.2f}"])
+
+    print(Fore.CYAN + f"Строк в секунду, {repeat} прогонов на вариант")
+    print(tabulate(table, headers=["Эндпоинт", "ORM", "Проекция", "Ускорение"]))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк списочных эндпоинтов")
+    parser.add_argument("--repeat", type=int, default=10, help="Количество прогонов на вариант")
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
@@ -0,0 +1,138 @@
+# utils/bench_serialization.py
+"""
+Замер времени сериализации больших ответов /order/read и /order/detail.
+
+"Было"  - модель собирается в эндпоинте, затем FastAPI повторно проверяет её по response_model
+          (model_dump -> model_validate), строит JSON-совместимый dict и кодирует его стандартным json.
+"Стало" - /order/read: словари из проекции колонок + orjson (ProjectionResponse),
+          /order/detail: одна проверка модели + model_dump_json (model_response).
+
+БД не нужна, данные генерируются. Запуск из папки backend:
+    python utils/bench_serialization.py --orders 1000 --items 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from schemas.order_schem import OrderRead, PaginatedOrderResponse, OrderDetailResponse  # noqa: E402
+from utils.projection import dumps  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+
+def _order_dict(i: int) -> dict:
+    return {
+        "serial": f"{i % 1000:03d}-01-2025",
+        "name": f"Заказ {i}",
+        "customer": "ООО Рога и копыта",
+        "customer_id": 1,
+        "priority": i % 10 + 1,
+        "status_id": 3,
+        "start_moment": datetime(2025, 1, 1, 10, 0),
+        "deadline_moment": datetime(2025, 3, 1, 10, 0),
+        "end_moment": None,
+        "materials_cost": 100000,
+        "materials_paid": False,
+        "products_cost": 50000,
+        "products_paid": True,
+        "work_cost": 70000,
+        "work_paid": False,
+        "debt": None,
+        "debt_paid": False,
+        "works": [{"id": w, "name": f"Работа {w}", "description": None, "active": True} for w in range(3)],
+    }
+
+
+def _detail_dict(items: int) -> dict:
+    person_uuid = uuid.uuid4()
+    data = _order_dict(1)
+    data["comments"] = [
+        {"id": i, "moment_of_creation": datetime(2025, 1, 2, 12, 0), "text": "Комментарий " * 5,
+         "person": "Иванов Иван Иванович"}
+        for i in range(items)
+    ]
+    data["tasks"] = [
+        {"id": i, "name": f"Задача {i}", "description": "Описание задачи", "status_id": 1, "payment_status_id": 1,
+         "executor": "Иванов Иван Иванович", "planned_duration": timedelta(hours=8),
+         "actual_duration": timedelta(hours=6), "creation_moment": datetime(2025, 1, 2, 12, 0),
+         "start_moment": None, "deadline_moment": None, "end_moment": None, "price": 1000,
+         "parent_task_id": None, "root_task_id": None}
+        for i in range(items)
+    ]
+    data["timings"] = [
+        {"id": i, "task_id": i, "executor_id": person_uuid,
+         "time": timedelta(hours=1), "timing_date": datetime(2025, 1, 3)}
+        for i in range(items)
+    ]
+    return data
+
+
+def _fastapi_double_pass(model) -> bytes:
+    """
+    Что делал FastAPI с моделью, возвращённой из эндпоинта с response_model
+    """
+    revalidated = type(model).model_validate(model.model_dump())
+    return json.dumps(revalidated.model_dump(mode="json"), ensure_ascii=False).encode("utf-8")
+
+
+def _measure(func, repeat: int) -> float:
+    """
+    Среднее время одного вызова в миллисекундах
+    """
+    func()  # прогрев
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(orders: int, items: int, repeat: int) -> None:
+    order_dicts = [_order_dict(i) for i in range(orders)]
+    detail_dict = _detail_dict(items)
+
+    def read_before():
+        page = PaginatedOrderResponse(total=orders, limit=orders, skip=0,
+                                      data=[OrderRead.model_validate(order) for order in order_dicts])
+        return _fastapi_double_pass(page)
+
+    def read_after():
+        return dumps({"total": orders, "limit": orders, "skip": 0, "data": order_dicts})
+
+    def detail_before():
+        return _fastapi_double_pass(OrderDetailResponse.model_validate(detail_dict))
+
+    def detail_after():
+        return OrderDetailResponse.model_validate(detail_dict).model_dump_json().encode("utf-8")
+
+    table = []
+    for name, before, after in (
+            (f"/order/read ({orders} заказов)", read_before, read_after),
+            (f"/order/detail ({items} задач, комментариев и таймингов)", detail_before, detail_after),
+    ):
+        before_ms = _measure(before, repeat)
+        after_ms = _measure(after, repeat)
+        table.append([name, f"{len(after()) / 1024:.0f}", f"{before_ms:.1f}", f"{after_ms:.1f}",
+                      f"x{before_ms / after_ms:.2f}"])
+
+    print(Fore.CYAN + f"Время сериализации ответа, мс (среднее по {repeat} прогонам)")
+    print(tabulate(table, headers=["Ответ", "Размер, КБ", "Было", "Стало", "Ускорение"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер сериализации больших ответов заказов")
+    parser.add_argument("--orders", type=int, default=1000, help="Количество заказов в /order/read")
+    parser.add_argument("--items", type=int, default=2000, help="Количество задач/комментариев/таймингов")
+    parser.add_argument("--repeat", type=int, default=20, help="Количество прогонов")
+    args = parser.parse_args()
+    main(args.orders, args.items, args.repeat)
@@ -0,0 +1,118 @@
+# utils/bench_task_tree.py
+"""
+Бенчмарк загрузки дерева задач: обход подзадач запросами против одного WITH RECURSIVE.
+
+"По узлам"  - дочерние задачи запрашиваются для каждого узла (так работает ленивая связь subtasks).
+"По уровням" - один запрос на уровень дерева: parent_task_id IN (id предыдущего уровня).
+"CTE"       - всё поддерево одним рекурсивным запросом и сборка за O(n) (utils/task_tree.py).
+
+Работает с БД из .env: создаёт синтетическое дерево задач без заказа и в конце удаляет его.
+Запуск из папки backend:
+    python utils/bench_task_tree.py --nodes 10000 --branching 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from database import async_engine, async_session_maker  # noqa: E402
+from models import Task  # noqa: E402
+from utils.task_tree import load_task_tree  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+
+async def _create_tree(nodes: int, branching: int) -> list:
+    """
+    Создаёт дерево из nodes задач, у каждой задачи до branching подзадач. Возвращает id всех задач.
+    """
+    async with async_session_maker() as session:
+        result = await session.execute(insert(Task).values(name="Бенчмарк 0").returning(Task.id))
+        level = [result.scalar_one()]
+        ids = list(level)
+        while len(ids) < nodes:
+            values = [
+                {"name": f"Бенчмарк {len(ids) + i}", "parent_task_id": parent_id, "root_task_id": ids[0]}
+                for i, parent_id in enumerate(
+                    parent_id for parent_id in level for _ in range(branching)
+                )
+            ][:nodes - len(ids)]
+            result = await session.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), values)
+            level = list(result.scalars().all())
+            ids.extend(level)
+        await session.commit()
+    return ids
+
+
+async def _per_node(root_id: int) -> int:
+    async with async_session_maker() as session:
+        loaded = 0
+        stack = [root_id]
+        while stack:
+            task_id = stack.pop()
+            result = await session.execute(select(Task).where(Task.parent_task_id == task_id))
+            children = result.scalars().all()
+            loaded += 1
+            stack.extend(child.id for child in children)
+        return loaded
+
+
+async def _per_level(root_id: int) -> int:
+    async with async_session_maker() as session:
+        loaded = 1
+        level = [root_id]
+        while level:
+            result = await session.execute(select(Task).where(Task.parent_task_id.in_(level)))
+            level = [task.id for task in result.scalars().all()]
+            loaded += len(level)
+        return loaded
+
+
+async def _recursive_cte(root_id: int) -> int:
+    async with async_session_maker() as session:
+        roots = await load_task_tree(session, Task.id == root_id)
+    loaded = 0
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        loaded += 1
+        stack.extend(node["subtasks"])
+    return loaded
+
+
+async def main(nodes: int, branching: int) -> None:
+    # Логирование SQL сильно искажает замеры
+    async_engine.echo = False
+    ids = await _create_tree(nodes, branching)
+    try:
+        table = []
+        for name, run in (("По узлам", _per_node), ("По уровням", _per_level), ("WITH RECURSIVE", _recursive_cte)):
+            started = time.perf_counter()
+            loaded = await run(ids[0])
+            elapsed = time.perf_counter() - started
+            table.append([name, loaded, f"{elapsed * 1000:.0f}"])
+    finally:
+        async with async_session_maker() as session:
+            await session.execute(delete(Task).where(Task.id.in_(ids)))
+            await session.commit()
+
+    print(Fore.CYAN + f"Загрузка дерева из {nodes} задач (до {branching} подзадач у задачи)")
+    print(tabulate(table, headers=["Способ", "Задач", "Время, мс"]))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк загрузки дерева задач")
+    parser.add_argument("--nodes", type=int, default=10000, help="Количество задач в дереве")
+    parser.add_argument("--branching", type=int, default=10, help="Подзадач у одной задачи")
+    args = parser.parse_args()
+    asyncio.run(main(args.nodes, args.branching))
@@ -0,0 +1,147 @@
+# utils/bench_timing_analytics.py
+"""
+Бенчмарк аналитики часов: запросы к сводке по дням (timing_daily_rollups) против суммирования таймингов.
+
+Работает с БД из .env: создаёт синтетические тайминги за несколько лет (на первый заказ и первую задачу,
+исполнители - люди из БД), пересчитывает сводку по дням, замеряет эндпоинты /analytics/hours/*
+и в конце удаляет созданные тайминги. Запускать на тестовой БД.
+
+Запуск из папки backend:
+    python utils/bench_timing_analytics.py --years 5 --people 30 --per-day 3
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from database import async_engine, async_session_maker  # noqa: E402
+from models import Order, Person, Task, Timing  # noqa: E402
+from routers.analytics_router import get_hours_by_person, get_hours_by_order, get_hours_by_work  # noqa: E402
+from utils.rollups import refresh_timing_daily_rollups  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+# Пользователь для вызова эндпоинтов напрямую
+_BENCH_USER = SimpleNamespace(username="bench")
+
+# Цель по времени ответа, мс
+TARGET_MS = 50
+
+# Сколько строк вставлять за один INSERT
+_INSERT_CHUNK = 10000
+
+
+async def _create_timings(years: int, people: int, per_day: int) -> tuple:
+    """
+    Создаёт тайминги за years лет по рабочим дням. Возвращает (id таймингов, даты)
+    """
+    async with async_session_maker() as session:
+        order_serial = (await session.execute(select(Order.serial).limit(1))).scalar()
+        task_id = (await session.execute(select(Task.id).limit(1))).scalar()
+        executors = (await session.execute(select(Person.uuid).limit(people))).scalars().all()
+    if order_serial is None or task_id is None or not executors:
+        raise SystemExit("В БД нужен хотя бы один заказ, одна задача и один человек")
+
+    start = date.today() - timedelta(days=365 * years)
+    days = [start + timedelta(days=i) for i in range(365 * years) if (start + timedelta(days=i)).weekday() < 5]
+    rows = [
+        {"order_serial": order_serial, "task_id": task_id, "executor_id": executor, "timing_date": day,
+         "time": timedelta(minutes=random.randint(15, 240))}
+        for day in days
+        for executor in executors
+        for _ in range(per_day)
+    ]
+
+    ids = []
+    async with async_session_maker() as session:
+        for i in range(0, len(rows), _INSERT_CHUNK):
+            result = await session.execute(insert(Timing).returning(Timing.id), rows[i:i + _INSERT_CHUNK])
+            ids.extend(result.scalars().all())
+        # Тайминги вставлены в обход ORM - сводку по этим датам пересчитываем явно
+        await session.run_sync(refresh_timing_daily_rollups, days)
+        await session.commit()
+    return ids, days
+
+
+async def _direct_by_person(session, period: str):
+    """
+    То же, что /analytics/hours/by-person, но суммированием всех таймингов
+    """
+    if period == "day":
+        period_start = Timing.timing_date
+    else:
+        period_start = cast(func.date_trunc(literal_column(f"'{period}'"), Timing.timing_date), Date)
+    result = await session.execute(
+        select(Timing.executor_id, period_start, func.sum(Timing.time), func.count())
+        .group_by(Timing.executor_id, period_start)
+    )
+    return result.all()
+
+
+async def _measure(run, repeat: int) -> float:
+    """
+    Медиана времени одного вызова в миллисекундах
+    """
+    timings = []
+    for _ in range(repeat + 1):
+        async with async_session_maker() as session:
+            started = time.perf_counter()
+            await run(session)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings[1:])  # первый вызов - прогрев
+
+
+async def main(years: int, people: int, per_day: int, repeat: int) -> None:
+    # Логирование SQL сильно искажает замеры
+    async_engine.echo = False
+    ids, days = await _create_timings(years, people, per_day)
+    date_from = days[-1] - timedelta(days=365)
+    try:
+        cases = [
+            ("Тайминги: по людям и месяцам", lambda s: _direct_by_person(s, "month")),
+            ("Тайминги: по людям и дням", lambda s: _direct_by_person(s, "day")),
+            ("by-person, месяцы", lambda s: get_hours_by_person("month", None, None, None, s, _BENCH_USER)),
+            ("by-person, дни", lambda s: get_hours_by_person("day", None, None, None, s, _BENCH_USER)),
+            ("by-person, недели за год", lambda s: get_hours_by_person("week", date_from, None, None, s, _BENCH_USER)),
+            ("by-order, месяцы", lambda s: get_hours_by_order("month", None, None, None, s, _BENCH_USER)),
+            ("by-work, итог", lambda s: get_hours_by_work("total", None, None, s, _BENCH_USER)),
+        ]
+        table = []
+        for name, run in cases:
+            elapsed = await _measure(run, repeat)
+            mark = Fore.GREEN + "да" if elapsed < TARGET_MS else Fore.RED + "нет"
+            table.append([name, f"{elapsed:.1f}", mark])
+    finally:
+        async with async_session_maker() as session:
+            for i in range(0, len(ids), _INSERT_CHUNK):
+                await session.execute(delete(Timing).where(Timing.id.in_(ids[i:i + _INSERT_CHUNK])))
+            await session.run_sync(refresh_timing_daily_rollups, days)
+            await session.commit()
+
+    print(Fore.CYAN + f"Аналитика часов: {len(ids)} таймингов за {years} лет, {people} исполнителей "
+                      f"(медиана по {repeat} прогонам)")
+    print(tabulate(table, headers=["Запрос", "Время, мс", f"< {TARGET_MS} мс"]))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк аналитики часов по таймингам")
+    parser.add_argument("--years", type=int, default=5, help="За сколько лет создать тайминги")
+    parser.add_argument("--people", type=int, default=30, help="Сколько исполнителей взять из БД")
+    parser.add_argument("--per-day", type=int, default=3, help="Таймингов на исполнителя в рабочий день")
+    parser.add_argument("--repeat", type=int, default=10, help="Количество прогонов")
+    args = parser.parse_args()
+    asyncio.run(main(args.years, args.people, args.per_day, args.repeat))
@@ -0,0 +1,62 @@
+# utils/box_serials.py
+"""
+Выдача серийных номеров шкафов из последовательности БД.
+
+Раньше номер считался как max(serial_num) + 1 отдельным запросом перед вставкой, и два одновременных
+создания шкафа получали один и тот же номер. Теперь номера берутся из последовательности
+box_accounting_serial_num_seq: nextval атомарен и не повторяется.
+
+Чтобы пачка шкафов (серия одинаковых шкафов) получала номера подряд, выдача идёт под
+транзакционной advisory-блокировкой: пока одна транзакция забирает N номеров, другая ждёт.
+Блокировка снимается сама при commit/rollback.
+"""
+from typing import List
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import box_serial_num_seq
+
+# Ключ advisory-блокировки для выдачи серийных номеров шкафов (произвольная константа)
+BOX_SERIAL_LOCK_KEY = 7_402_001
+
+# Выравнивание последовательности по максимальному номеру в таблице: следующий nextval вернёт
+# max(serial_num) + 1 (или 1 для пустой таблицы), но только если последовательность не ушла дальше.
+# Назад она не сдвигается: после удаления шкафов или отката allocate_box_serials номера выше max(serial_num)
+# уже были выданы и не должны повториться
+ALIGN_BOX_SERIAL_SEQUENCE_SQL = (
+    f"SELECT setval('{box_serial_num_seq.name}', GREATEST("
+    "COALESCE((SELECT MAX(serial_num) FROM box_accounting), 0) + 1, "
+    f"(SELECT last_value + CASE WHEN is_called THEN 1 ELSE 0 END FROM {box_serial_num_seq.name})"
+    "), false)"
+)
+
+
+async def lock_box_serials(db: AsyncSession) -> None:
+    """
+    Берёт блокировку выдачи номеров до конца текущей транзакции.
+    Нужна и при выдаче одного номера через default колонки, чтобы он не вклинился в номера серии.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(BOX_SERIAL_LOCK_KEY)))
+
+
+async def allocate_box_serials(db: AsyncSession, count: int = 1) -> List[int]:
+    """
+    Резервирует count последовательных серийных номеров шкафов в текущей транзакции.
+    Номера, выданные в откатившейся транзакции, не возвращаются (как у любой последовательности).
+    """
+    await lock_box_serials(db)
+    result = await db.execute(
+        select(box_serial_num_seq.next_value()).select_from(func.generate_series(1, count))
+    )
+    return sorted(result.scalars().all())
+
+
+def align_box_serial_sequence(session) -> None:
+    """
+    Выравнивает последовательность после вставки шкафов с явными номерами (импорт из КИС2).
+    Синхронная версия для скриптов импорта. Под той же блокировкой, что и выдача номеров,
+    чтобы setval не вклинился между выдачей номеров и commit другой транзакции.
+    """
+    session.execute(select(func.pg_advisory_xact_lock(BOX_SERIAL_LOCK_KEY)))
+    session.execute(text(ALIGN_BOX_SERIAL_SEQUENCE_SQL))
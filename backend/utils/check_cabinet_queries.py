@@ -0,0 +1,118 @@
+# utils/check_cabinet_queries.py
+"""
+Проверка, что список корпусов шкафов (/get_all/control_cabinets) загружается постоянным числом запросов.
+
+Шкафы создаются в SQLite в памяти (PostgreSQL не нужен), у каждого свои материал, IP и производитель -
+худший случай для ленивой загрузки связей.
+"Было"  - select(ControlCabinet) и обращение к material, ip, manufacturer и currency:
+          отдельный запрос на каждую ещё не загруженную связь.
+"Стало" - _control_cabinets_select() из routers/get_all_router.py, выполняется асинхронно, как в эндпоинте.
+          Ленивая загрузка в асинхронной сессии невозможна (MissingGreenlet), так что связи точно пришли
+          в том же запросе.
+
+Запуск из папки backend:
+    python utils/check_cabinet_queries.py                       # код возврата 1, если число запросов растёт
+    python utils/check_cabinet_queries.py --counts 1 100 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import List
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlalchemy.schema import CreateTable  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from models import Country, Manufacturer, Currency, EquipmentType, Equipment, ControlCabinetMaterial, Ip, \
+    ControlCabinet  # noqa: E402
+from routers.get_all_router import _control_cabinets_select, _control_cabinet_item  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+# Таблицы, которые нужны шкафам, в порядке внешних ключей
+_TABLES = [model.__table__ for model in (Country, Manufacturer, Currency, EquipmentType, Equipment,
+                                         ControlCabinetMaterial, Ip, ControlCabinet)]
+
+
+async def _create_catalog(engine, count: int) -> None:
+    async with engine.begin() as conn:
+        # Только таблицы: индексы каталога рассчитаны на PostgreSQL (GIN, to_tsvector)
+        for table in _TABLES:
+            await conn.execute(CreateTable(table))
+
+    async with AsyncSession(engine) as session:
+        country = Country(id=1, name="Россия")
+        equipment_type = EquipmentType(id=1, name="Корпус шкафа")
+        session.add_all([country, equipment_type])
+        for i in range(1, count + 1):
+            session.add(ControlCabinet(
+                name=f"Корпус {i}", model=f"CC-{i}", vendor_code=f"V{i}", type=equipment_type,
+                manufacturer=Manufacturer(name=f"Производитель {i}", country=country),
+                currency=Currency(name=f"{i % 1000:03d}") if i <= 1000 else None, price=1000 + i,
+                material=ControlCabinetMaterial(name=f"Материал {i}"), ip=Ip(name=f"IP{i}"),
+                height=600 + i, width=400, depth=200,
+            ))
+        await session.commit()
+
+
+def _lazy_listing(session) -> int:
+    cabinets = session.execute(select(ControlCabinet)).scalars().all()
+    return len([_control_cabinet_item(cabinet) for cabinet in cabinets])
+
+
+async def _count_queries(count: int) -> tuple:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    await _create_catalog(engine, count)
+
+    statements: List[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    # Было: связи загружаются лениво (run_sync разрешает ленивую загрузку в асинхронной сессии)
+    async with AsyncSession(engine) as session:
+        listed = await session.run_sync(_lazy_listing)
+    before = len(statements)
+
+    # Стало: как в эндпоинте
+    statements.clear()
+    async with AsyncSession(engine) as session:
+        cabinets = (await session.execute(_control_cabinets_select())).scalars().all()
+        items = [_control_cabinet_item(cabinet) for cabinet in cabinets]
+    after = len(statements)
+
+    await engine.dispose()
+    if listed != count or len(items) != count:
+        raise SystemExit(f"Ожидалось {count} шкафов, получено {listed} и {len(items)}")
+    return before, after
+
+
+async def main(counts: List[int]) -> int:
+    table = []
+    after_counts = set()
+    for count in counts:
+        before, after = await _count_queries(count)
+        after_counts.add(after)
+        table.append([count, before, after])
+
+    print(tabulate(table, headers=["Шкафов", "Запросов было", "Запросов стало"]))
+    if len(after_counts) > 1:
+        print(Fore.RED + "Число запросов списка шкафов зависит от количества шкафов")
+        return 1
+    print(Fore.GREEN + f"Список шкафов загружается за {after_counts.pop()} запрос(а) при любом количестве шкафов")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка числа запросов списка корпусов шкафов")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100, 500],
+                        help="Количества шкафов для проверки")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.counts)))
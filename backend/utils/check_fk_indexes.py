@@ -0,0 +1,102 @@
+# utils/check_fk_indexes.py
+"""
+Проверка, что у всех внешних ключей моделей есть индекс.
+
+Postgres не индексирует колонки внешних ключей сам: без индекса фильтр по заказу, JOIN к людям
+или удаление родительской записи читают всю дочернюю таблицу. Скрипт смотрит Base.metadata
+(БД не нужна) и выводит внешние ключи, колонки которых не стоят в начале ни одного индекса,
+первичного ключа или ограничения уникальности.
+
+Запуск из папки backend:
+    python utils/check_fk_indexes.py         # код возврата 1, если есть внешние ключи без индекса
+    python utils/check_fk_indexes.py --all   # показать и внешние ключи из IGNORED_FOREIGN_KEYS
+"""
+import argparse
+import os
+import sys
+from typing import List, Tuple
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from sqlalchemy import MetaData, Table, UniqueConstraint  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+from models import Base  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+# Внешние ключи, которым индекс сознательно не нужен: ссылки на маленькие справочники
+# (страны, формы, статусы задач, валюты и т.п.), по которым не фильтруют большие таблицы
+# и строки которых не удаляют. Формат: "таблица.колонка"
+IGNORED_FOREIGN_KEYS = {
+    "manufacturers.country_id",
+    "cities.country_id",
+    "counterparty.city_id",
+    "counterparty.form_id",
+    "orders_works.work_id",
+    "tasks.status_id",
+    "tasks.payment_status_id",
+    "equipment.currency_id",
+}
+
+
+def _covering_column_lists(table: Table) -> List[List[str]]:
+    """
+    Списки колонок всего, что даёт индекс: индексы, первичный ключ, ограничения уникальности
+    """
+    column_lists = [[column.name for column in index.columns] for index in table.indexes]
+    if table.primary_key.columns:
+        column_lists.append([column.name for column in table.primary_key.columns])
+    column_lists.extend(
+        [column.name for column in constraint.columns]
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    )
+    column_lists.extend([column.name] for column in table.columns if column.unique)
+    return column_lists
+
+
+def find_unindexed_foreign_keys(metadata: MetaData) -> List[Tuple[str, str, str]]:
+    """
+    Внешние ключи без индекса: [(таблица, колонки через запятую, ссылка), ...]
+
+    Индекс подходит, если колонки внешнего ключа стоят в его начале (в любом порядке):
+    индекс (order_serial, work_id) годится для order_serial, но не для work_id.
+    """
+    unindexed = []
+    for table in metadata.sorted_tables:
+        covering = _covering_column_lists(table)
+        for constraint in table.foreign_key_constraints:
+            fk_columns = [column.name for column in constraint.columns]
+            if any(set(columns[:len(fk_columns)]) == set(fk_columns) for columns in covering):
+                continue
+            unindexed.append((table.name, ", ".join(fk_columns), constraint.referred_table.name))
+    return unindexed
+
+
+def main(show_all: bool) -> int:
+    rows = []
+    for table, columns, referred in find_unindexed_foreign_keys(Base.metadata):
+        ignored = f"{table}.{columns}" in IGNORED_FOREIGN_KEYS
+        if ignored and not show_all:
+            continue
+        rows.append([table, columns, referred, "игнорируется" if ignored else Fore.RED + "нет индекса"])
+
+    missing = sum(1 for row in rows if row[3] != "игнорируется")
+    if rows:
+        print(tabulate(rows, headers=["Таблица", "Колонки", "Ссылается на", "Статус"]))
+    if missing:
+        print(Fore.RED + f"Внешних ключей без индекса: {missing}")
+        return 1
+    print(Fore.GREEN + "У всех внешних ключей есть индексы")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Поиск внешних ключей без индексов в моделях")
+    parser.add_argument("--all", action="store_true", help="Показать и игнорируемые внешние ключи")
+    args = parser.parse_args()
+    sys.exit(main(args.all))
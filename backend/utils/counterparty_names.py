@@ -0,0 +1,16 @@
+# utils/counterparty_names.py
+"""
+Имена контрагентов в ответах API
+"""
+from typing import Optional
+
+
+def customer_display_name(customer_name: Optional[str], form_name: Optional[str]) -> str:
+    """
+    Строка заказчика для ответа: 'Форма Название'
+    """
+    if customer_name is None:
+        return "Контрагент не указан"
+    if form_name:
+        return f"{form_name} {customer_name}"
+    return customer_name
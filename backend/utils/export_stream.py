@@ -0,0 +1,121 @@
+# utils/export_stream.py
+"""
+Потоковая выгрузка больших таблиц в JSON, NDJSON или CSV.
+
+Строки читаются серверным курсором (session.stream + yield_per) и отдаются клиенту частями
+через StreamingResponse: память не растёт с размером таблицы, а первые байты уходят сразу.
+
+Сессия открывается внутри генератора, а не берётся из Depends(get_async_db):
+зависимость закрывает сессию раньше, чем StreamingResponse дочитает данные.
+"""
+import csv
+import datetime
+import io
+from typing import AsyncIterator, List
+
+import orjson
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_jsonable_python
+from sqlalchemy import Select
+
+from database import async_session_maker
+from utils.projection import dumps
+
+# Поддерживаемые форматы выгрузки
+EXPORT_FORMATS = ("json", "ndjson", "csv")
+
+# Сколько строк читать из курсора за один раз
+EXPORT_YIELD_PER = 1000
+
+_MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _partitions(stmt: Select, yield_per: int) -> AsyncIterator[List[dict]]:
+    """
+    Порции строк из серверного курсора в виде списков словарей
+    """
+    async with async_session_maker() as session:
+        result = await session.stream(stmt.execution_options(yield_per=yield_per))
+        async for partition in result.partitions():
+            yield [dict(row._mapping) for row in partition]
+
+
+async def _json_chunks(list_name: str, partitions) -> AsyncIterator[bytes]:
+    """
+    {"list_name": [...]} - та же структура, что и у обычного JSON-ответа, но частями
+    """
+    yield b"{" + orjson.dumps(list_name) + b":["
+    first = True
+    async for rows in partitions:
+        if not rows:
+            continue
+        chunk = b",".join(dumps(row) for row in rows)
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]}"
+
+
+async def _ndjson_chunks(partitions) -> AsyncIterator[bytes]:
+    """
+    Одна строка JSON на запись
+    """
+    async for rows in partitions:
+        if rows:
+            yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        # ISO 8601, как в JSON
+        return to_jsonable_python(value)
+    return value
+
+
+async def _csv_chunks(header: List[str], partitions) -> AsyncIterator[bytes]:
+    """
+    CSV с заголовком из имён колонок запроса
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    async for rows in partitions:
+        for row in rows:
+            writer.writerow([_csv_value(row[key]) for key in header])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_response(stmt: Select, list_name: str, export_format: str = "json",
+                    yield_per: int = EXPORT_YIELD_PER) -> StreamingResponse:
+    """
+    Потоковый ответ с результатом запроса stmt (SELECT по нужным колонкам).
+
+    - json: {"list_name": [{...}, ...]}
+    - ndjson: по одному JSON-объекту на строку
+    - csv: заголовок из имён колонок, затем строки
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    partitions = _partitions(stmt, yield_per)
+    headers = {}
+    if export_format == "json":
+        body = _json_chunks(list_name, partitions)
+    elif export_format == "ndjson":
+        body = _ndjson_chunks(partitions)
+    else:
+        body = _csv_chunks(list(stmt.selected_columns.keys()), partitions)
+        headers["Content-Disposition"] = f'attachment; filename="{list_name}.csv"'
+
+    return StreamingResponse(body, media_type=_MEDIA_TYPES[export_format], headers=headers)
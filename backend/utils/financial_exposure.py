@@ -0,0 +1,162 @@
+# utils/financial_exposure.py
+"""
+Финансовая нагрузка по заказам: сколько ещё не оплачено за материалы, товары и работы
+и сколько нам должны заказчики - в разрезе статусов и заказчиков.
+
+Суммы считаются в БД одним запросом: неоплаченные суммы по (статус, заказчик) через FILTER,
+затем итог, статусы и заказчики сразу через GROUPING SETS. Заказы в браузер не выгружаются.
+
+Неоплаченные суммы по (статус, заказчик) также хранятся в материализованном представлении
+order_financial_exposure: оно обновляется перед commit транзакции, в которой менялись заказы,
+и позволяет не читать таблицу заказов вовсе (source=view).
+Изменения заказов в обход ORM (insert()/update() по таблице orders) событий не вызывают -
+после них нужно вызвать mark_orders_changed(session).
+"""
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, Integer, MetaData, Table, event, func, or_, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from models import Counterparty, CounterpartyForm, Order, OrderStatus
+
+# Закрытые заказы: "Выполнено в срок", "Выполнено НЕ в срок", "Не согласовано".
+# За материалы, товары и работы по ним платить уже не нужно, а долг заказчика учитывается всегда
+CLOSED_ORDER_STATUS_IDS = (5, 6, 7)
+
+EXPOSURE_VIEW_NAME = "order_financial_exposure"
+
+# Ключ в session.info, которым помечаются сессии с изменениями заказов
+_ORDERS_CHANGED_FLAG = "financial_exposure_orders_changed"
+
+# Материализованное представление (создаётся миграцией), описано отдельно от моделей,
+# чтобы Alembic не пытался создать его как таблицу
+order_financial_exposure = Table(
+    EXPOSURE_VIEW_NAME,
+    MetaData(),
+    Column("status_id", Integer),
+    Column("customer_id", Integer),
+    Column("materials", BigInteger),
+    Column("products", BigInteger),
+    Column("work", BigInteger),
+    Column("debt", BigInteger),
+    Column("orders_with_payables", BigInteger),
+    Column("orders_with_debt", BigInteger),
+)
+
+
+def _unpaid(cost, paid):
+    """
+    Неоплаченная сумма: SUM(cost) FILTER (WHERE paid IS NOT TRUE), 0 если таких нет
+    """
+    return func.coalesce(func.sum(cost).filter(paid.isnot(True)), 0)
+
+
+def unpaid_by_status_and_customer():
+    """
+    Неоплаченные суммы по (статус, заказчик) из таблицы заказов.
+    Тот же запрос лежит в основе представления order_financial_exposure.
+    """
+    has_payables = or_(
+        (Order.materials_paid.isnot(True)) & (Order.materials_cost > 0),
+        (Order.products_paid.isnot(True)) & (Order.products_cost > 0),
+        (Order.work_paid.isnot(True)) & (Order.work_cost > 0),
+    )
+    return (
+        select(
+            Order.status_id,
+            Order.customer_id,
+            _unpaid(Order.materials_cost, Order.materials_paid).label("materials"),
+            _unpaid(Order.products_cost, Order.products_paid).label("products"),
+            _unpaid(Order.work_cost, Order.work_paid).label("work"),
+            _unpaid(Order.debt, Order.debt_paid).label("debt"),
+            func.count().filter(has_payables).label("orders_with_payables"),
+            func.count().filter((Order.debt_paid.isnot(True)) & (Order.debt > 0)).label("orders_with_debt"),
+        )
+        .group_by(Order.status_id, Order.customer_id)
+        .subquery()
+    )
+
+
+def exposure_select(use_view: bool = False):
+    """
+    Итог, статусы и заказчики одним запросом (GROUPING SETS).
+    by_status/by_customer = 0 отмечают строки разреза по статусам/заказчикам, обе 1 - общий итог.
+    """
+    base = order_financial_exposure.alias("unpaid") if use_view else unpaid_by_status_and_customer()
+    is_open = base.c.status_id.not_in(CLOSED_ORDER_STATUS_IDS)
+
+    def open_sum(column):
+        return func.coalesce(func.sum(column).filter(is_open), 0)
+
+    status_key = (base.c.status_id, OrderStatus.name)
+    customer_key = (base.c.customer_id, Counterparty.name, CounterpartyForm.name)
+    return (
+        select(
+            func.grouping(base.c.status_id).label("by_status"),
+            func.grouping(base.c.customer_id).label("by_customer"),
+            base.c.status_id,
+            OrderStatus.name.label("status"),
+            base.c.customer_id,
+            Counterparty.name.label("customer_name"),
+            CounterpartyForm.name.label("form_name"),
+            open_sum(base.c.materials).label("materials"),
+            open_sum(base.c.products).label("products"),
+            open_sum(base.c.work).label("work"),
+            func.coalesce(func.sum(base.c.debt), 0).label("debt"),
+            open_sum(base.c.orders_with_payables).label("orders_with_payables"),
+            func.coalesce(func.sum(base.c.orders_with_debt), 0).label("orders_with_debt"),
+        )
+        .select_from(base)
+        .join(OrderStatus, OrderStatus.id == base.c.status_id)
+        .join(Counterparty, Counterparty.id == base.c.customer_id)
+        .outerjoin(CounterpartyForm, CounterpartyForm.id == Counterparty.form_id)
+        .group_by(func.grouping_sets(tuple_(*status_key), tuple_(*customer_key), tuple_()))
+    )
+
+
+async def load_financial_exposure(session: AsyncSession, use_view: bool = False) -> list:
+    """
+    Строки exposure_select в виде словарей
+    """
+    result = await session.execute(exposure_select(use_view))
+    return [dict(row._mapping) for row in result]
+
+
+def refresh_financial_exposure(session: Session) -> None:
+    """
+    Обновляет материализованное представление в текущей транзакции.
+    CONCURRENTLY - чтение представления не блокируется на время обновления.
+    """
+    session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {EXPOSURE_VIEW_NAME}"))
+
+
+def mark_orders_changed(session) -> None:
+    """
+    Помечает сессию (Session или AsyncSession): перед её commit представление будет обновлено
+    """
+    getattr(session, "sync_session", session).info[_ORDERS_CHANGED_FLAG] = True
+
+
+def _mark_orders_changed(mapper, connection, target) -> None:
+    session: Optional[Session] = object_session(target)
+    if session is not None:
+        mark_orders_changed(session)
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Order, _event_name, _mark_orders_changed)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session) -> None:
+    # Изменения ещё не отправлены в БД: события после flush выставят флаг
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    if session.info.pop(_ORDERS_CHANGED_FLAG, False):
+        refresh_financial_exposure(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_flag(session) -> None:
+    session.info.pop(_ORDERS_CHANGED_FLAG, None)
@@ -0,0 +1,94 @@
+# utils/import_checkpoints.py
+"""
+Порционное сохранение импорта из КИС2 с контрольной точкой (таблица import_checkpoints).
+
+Импорт заказов, задач и учёта шкафов делает commit после каждой порции из chunk_size строк, и в той же
+транзакции запоминает, сколько строк потока КИС2 уже сохранено и ключ последней из них. Сбой в конце импорта
+откатывает только текущую порцию, а блокировки держатся не дольше одной порции.
+
+Следующий запуск пропускает сохранённые строки без обращений к БД КИС3 и продолжает со следующей порции.
+Если на месте последней сохранённой строки в потоке КИС2 оказалась другая строка (данные в КИС2 изменились),
+импорт начинается сначала: он идемпотентен, поэтому уже сохранённые строки просто окажутся без изменений.
+После успешного импорта контрольная точка удаляется.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from colorama import Fore
+from sqlalchemy import delete
+
+from config import IMPORT_CHUNK_SIZE
+from models import ImportCheckpoint
+
+
+@dataclass
+class ImportProgress:
+    """
+    Сколько строк потока КИС2 импорта entity уже сохранено, key - поле строки КИС2 с её ключом
+    """
+    entity: str
+    key: str
+    chunk_size: int
+    rows_done: int = 0
+    last_key: Optional[str] = None
+    resumed_from: int = 0  # С какой строки потока продолжен импорт, 0 - с начала
+
+
+def start_import(session, entity: str, key: str, chunk_size: Optional[int] = None) -> ImportProgress:
+    """
+    Прогресс импорта entity: с контрольной точки прошлого незавершённого запуска или с начала
+    """
+    progress = ImportProgress(entity=entity, key=key, chunk_size=chunk_size or IMPORT_CHUNK_SIZE)
+    checkpoint = session.get(ImportCheckpoint, entity)
+    if checkpoint is not None:
+        progress.rows_done = progress.resumed_from = checkpoint.rows_done
+        progress.last_key = checkpoint.last_key
+    return progress
+
+
+def resume_rows(progress: ImportProgress,
+                make_rows: Callable[[], Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    Поток строк КИС2 (make_rows() - iter_*_from_kis2) без строк, сохранённых прошлым запуском
+    """
+    rows = iter(make_rows())
+    if not progress.rows_done:
+        yield from rows
+        return
+
+    skipped, last_row = 0, None
+    for last_row in islice(rows, progress.rows_done):
+        skipped += 1
+    if skipped == progress.rows_done and str(last_row.get(progress.key)) == progress.last_key:
+        print(Fore.CYAN + f"Импорт {progress.entity} продолжается с контрольной точки: "
+                          f"пропущено {skipped} сохранённых строк.")
+        yield from rows
+        return
+
+    print(Fore.YELLOW + f"Поток КИС2 не совпадает с контрольной точкой импорта {progress.entity} "
+                        f"(строка {progress.rows_done}, ключ {progress.last_key}). Импорт начинается сначала.")
+    progress.rows_done = progress.resumed_from = 0
+    progress.last_key = None
+    yield from make_rows()
+
+
+def commit_chunk(session, progress: ImportProgress, chunk: List[Dict[str, Any]]) -> None:
+    """
+    Сохраняет порцию вместе с контрольной точкой одной транзакцией
+    """
+    progress.rows_done += len(chunk)
+    progress.last_key = str(chunk[-1].get(progress.key))
+    session.merge(ImportCheckpoint(entity=progress.entity, rows_done=progress.rows_done,
+                                   last_key=progress.last_key, chunk_size=progress.chunk_size,
+                                   updated_at=datetime.now()))
+    session.commit()
+
+
+def finish_import(session, progress: ImportProgress) -> None:
+    """
+    Импорт дошёл до конца потока: контрольная точка больше не нужна
+    """
+    session.execute(delete(ImportCheckpoint).where(ImportCheckpoint.entity == progress.entity))
+    session.commit()
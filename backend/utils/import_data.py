@@ -1,22 +1,28 @@
 # utils/import_data.py
 """
 Модуль импорта данных из КИС2(БД SQlite3) в КИС3(БД PostgreSQL).
-Получение данных из КИС2(БД SQlite3) реализовано через Django Rest API.
+Получение данных из КИС2(БД SQlite3) реализовано через Django Rest API, либо напрямую из снимка БД КИС2
+(файл db.sqlite3): python utils/import_data.py --snapshot /path/to/db.sqlite3 или KIS2_SNAPSHOT_PATH в .env.
+С --dry-run (dry_run=True у import_*_from_kis2) импорт только сообщает, что изменится (utils/import_diff.py).
 """
+import argparse
 import sys
 import os
-from datetime import datetime, timedelta, timezone
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, nullcontext
+from datetime import datetime
 
 from colorama import init, Fore
-from typing import Dict, Set, Any
+from sqlalchemy.orm import selectinload
+from typing import Dict, Set, Any, Optional, Tuple
 
 # Добавляем родительскую директорию в путь поиска модулей
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from kis2.DjangoRestAPI import create_countries_set_from_kis2, create_tasks_list_dict_from_kis2, \
-    create_order_comments_list_dict_from_kis2, create_boxes_list_dict_from_kis2, \
-    create_timings_list_dict_from_kis2  # noqa: E402
-from kis2.DjangoRestAPI import create_box_accounting_list_dict_from_kis2  # noqa: E402
+from kis2.DjangoRestAPI import create_countries_set_from_kis2, iter_tasks_from_kis2, \
+    iter_order_comments_from_kis2, create_boxes_list_dict_from_kis2, iter_timings_from_kis2  # noqa: E402
+from kis2.DjangoRestAPI import iter_box_accounting_from_kis2  # noqa: E402
 from kis2.DjangoRestAPI import create_companies_list_dict_from_kis2  # noqa: E402
 from kis2.DjangoRestAPI import create_list_dict_manufacturers  # noqa: E402
 from kis2.DjangoRestAPI import create_equipment_type_set_from_kis2  # noqa: E402
@@ -25,9 +31,12 @@ from kis2.DjangoRestAPI import create_cities_set_from_kis2  # noqa: E402
 from kis2.DjangoRestAPI import create_companies_form_from_kis2  # noqa: E402
 from kis2.DjangoRestAPI import create_person_list_dict_from_kis2  # noqa: E402
 from kis2.DjangoRestAPI import create_works_list_dict_from_kis2  # noqa: E402
-from kis2.DjangoRestAPI import create_orders_list_dict_from_kis2  # noqa: E402
+from kis2.DjangoRestAPI import iter_orders_from_kis2  # noqa: E402
 
-from database import SyncSession, test_sync_connection  # noqa: E402
+from kis2.durations import parse_duration  # noqa: E402
+from kis2.snapshot import use_kis2_snapshot, active_kis2_snapshot  # noqa: E402
+from config import KIS2_SNAPSHOT_PATH  # noqa: E402
+from database import SyncSession, sync_engine, test_sync_connection  # noqa: E402
 from models import Country, TaskStatus, TaskPaymentStatus, Task, OrderComment, ControlCabinet, \
     ControlCabinetMaterial, Ip, Timing  # noqa: E402
 from models import BoxAccounting  # noqa: E402
@@ -41,10 +50,26 @@ from models import Currency  # noqa: E402
 from models import Person  # noqa: E402
 from models import Work  # noqa: E402
 from models import Order  # noqa: E402
+from utils.person_directory import format_fio  # noqa: E402
+from utils.box_serials import align_box_serial_sequence  # noqa: E402
+from utils.import_history import record_import_run, fetch_rows, fetch_batches  # noqa: E402
+from utils.import_checkpoints import start_import, resume_rows, commit_chunk, finish_import  # noqa: E402
+from utils.import_diff import diff_countries, diff_manufacturers, diff_equipment_types, diff_currencies, \
+    diff_cities, diff_counterparty_forms, diff_companies, diff_people, diff_works, diff_orders, \
+    diff_box_accounting, diff_tasks, diff_order_comments, diff_boxes, diff_timings, \
+    normalize_local_datetime  # noqa: E402
+# Сводки по задачам и заказам пересчитываются событиями при commit импорта задач и таймингов,
+# представление финансовой нагрузки - при commit импорта заказов
+import utils.rollups  # noqa: E402, F401
+import utils.financial_exposure  # noqa: E402, F401
 
 # Инициализируем colorama
 init(autoreset=True)
 
+# Сколько строк КИС2 обрабатывается за одну порцию (flush в БД после каждой). Заказы, задачи и учёт шкафов
+# сохраняются порциями по IMPORT_CHUNK_SIZE (config.py) с контрольной точкой - utils/import_checkpoints.py
+IMPORT_BATCH_SIZE = 1000
+
 
 def commit_and_summarize_import(session, result, entity_type='записей'):
     """
@@ -66,6 +91,19 @@ def commit_and_summarize_import(session, result, entity_type='записей'):
     return result
 
 
+def get_persons_by_name(session) -> Dict[str, Any]:
+    """
+    Возвращает словарь {"Фамилия Имя Отчество": uuid} для поиска людей по ФИО из КИС2.
+    Выбираются только нужные колонки, а не ORM-объекты целиком.
+    """
+    return {
+        format_fio(surname, name, patronymic): person_uuid
+        for person_uuid, name, patronymic, surname in session.query(
+            Person.uuid, Person.name, Person.patronymic, Person.surname
+        ).all()
+    }
+
+
 def get_existing_items(session, model) -> Set[str]:
     """
     Получает множество существующих элементов из базы данных по модели.
@@ -97,13 +135,16 @@ def bulk_insert_new_items(session, model, new_items: Set[str], result: Dict[str,
         result['added'] = len(new_items)
 
 
-def import_countries_from_kis2() -> Dict[str, any]:
+@record_import_run("countries")
+def import_countries_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортировать страны из КИС2 в базу данных.
     """
+    if dry_run:
+        return diff_countries()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_countries_set = create_countries_set_from_kis2(debug=False)
+        kis2_countries_set = fetch_rows(create_countries_set_from_kis2, debug=False)
         if not kis2_countries_set:
             print(Fore.YELLOW + "Не удалось получить страны из КИС2 или список пуст.")
             return result
@@ -119,19 +160,24 @@ def import_countries_from_kis2() -> Dict[str, any]:
             except Exception as db_error:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте стран: {db_error}")
+                result['error'] = str(db_error)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта стран: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_manufacturers_from_kis2() -> Dict[str, any]:
+@record_import_run("manufacturers")
+def import_manufacturers_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортировать производителей из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_manufacturers()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_manufacturers_list = create_list_dict_manufacturers(debug=False)
+        kis2_manufacturers_list = fetch_rows(create_list_dict_manufacturers, debug=False)
         if not kis2_manufacturers_list:
             print(Fore.YELLOW + "Не удалось получить производителей из КИС2 или список пуст.")
             return result
@@ -172,19 +218,24 @@ def import_manufacturers_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте производителей: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта производителей: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_equipment_types_from_kis2() -> Dict[str, any]:
+@record_import_run("equipment_types")
+def import_equipment_types_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортировать типы оборудования из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_equipment_types()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_equipment_types_set = create_equipment_type_set_from_kis2(debug=False)
+        kis2_equipment_types_set = fetch_rows(create_equipment_type_set_from_kis2, debug=False)
         if not kis2_equipment_types_set:
             print(Fore.YELLOW + "Не удалось получить типы оборудования из КИС2 или список пуст.")
             return result
@@ -201,19 +252,24 @@ def import_equipment_types_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте типов оборудования: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта типов оборудования: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_currency_from_kis2() -> Dict[str, any]:
+@record_import_run("currencies")
+def import_currency_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортировать типы валют из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_currencies()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_currencies_set = create_money_set_from_kis2(debug=False)
+        kis2_currencies_set = fetch_rows(create_money_set_from_kis2, debug=False)
         if not kis2_currencies_set:
             print(Fore.YELLOW + "Не удалось получить валюты из КИС2 или список пуст.")
             return result
@@ -230,19 +286,24 @@ def import_currency_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте валют: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта валют: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_cities_from_kis2() -> Dict[str, any]:
+@record_import_run("cities")
+def import_cities_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует названия городов из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_cities()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_cities_set = create_cities_set_from_kis2(debug=False)
+        kis2_cities_set = fetch_rows(create_cities_set_from_kis2, debug=False)
         if not kis2_cities_set:
             print(Fore.YELLOW + "Не удалось получить города из КИС2 или список пуст.")
             return result
@@ -270,19 +331,24 @@ def import_cities_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте городов: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта городов: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_counterparty_forms_from_kis2() -> Dict[str, any]:
+@record_import_run("counterparty_forms")
+def import_counterparty_forms_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует названия форм контрагентов из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_counterparty_forms()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_forms_set = create_companies_form_from_kis2(debug=False)
+        kis2_forms_set = fetch_rows(create_companies_form_from_kis2, debug=False)
         if not kis2_forms_set:
             print(Fore.YELLOW + "Не удалось получить формы контрагентов из КИС2 или список пуст.")
             return result
@@ -303,19 +369,24 @@ def import_counterparty_forms_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте форм контрагентов: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта форм контрагентов: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_companies_from_kis2() -> Dict[str, any]:
+@record_import_run("companies")
+def import_companies_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует контрагентов (компании) из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_companies()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_companies_list = create_companies_list_dict_from_kis2(debug=False)
+        kis2_companies_list = fetch_rows(create_companies_list_dict_from_kis2, debug=False)
         if not kis2_companies_list:
             print(Fore.YELLOW + "Не удалось получить компании из КИС2 или список пуст.")
             return result
@@ -374,19 +445,24 @@ def import_companies_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте компаний: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта компаний: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_people_from_kis2() -> Dict[str, any]:
+@record_import_run("people")
+def import_people_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует людей (персоны) из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_people()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_persons_list = create_person_list_dict_from_kis2(debug=False)
+        kis2_persons_list = fetch_rows(create_person_list_dict_from_kis2, debug=False)
         if not kis2_persons_list:
             print(Fore.YELLOW + "Не удалось получить людей из КИС2 или список пуст.")
             return result
@@ -448,19 +524,24 @@ def import_people_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте людей: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта людей: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_works_from_kis2() -> Dict[str, any]:
+@record_import_run("works")
+def import_works_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует работы из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_works()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_works_list = create_works_list_dict_from_kis2(debug=False)
+        kis2_works_list = fetch_rows(create_works_list_dict_from_kis2, debug=False)
         if not kis2_works_list:
             print(Fore.YELLOW + "Не удалось получить работы из КИС2 или список пуст.")
             return result
@@ -491,13 +572,15 @@ def import_works_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте работ: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта работ: {e}")
+        result['error'] = str(e)
         return result
 
 
-def ensure_order_statuses_exist() -> Dict[str, any]:
+def ensure_order_statuses_exist(dry_run: bool = False) -> Dict[str, any]:
     """
     Проверяет наличие стандартных статусов заказов в базе данных, создает отсутствующие и обновляет описания.
     """
@@ -529,6 +612,11 @@ def ensure_order_statuses_exist() -> Dict[str, any]:
                     else:
                         result['unchanged'] += 1
 
+                # Пробный запуск: только подсчёт, без записи
+                if dry_run:
+                    result.update(status="success", dry_run=True)
+                    return result
+
                 if new_statuses:
                     session.bulk_insert_mappings(OrderStatus.__mapper__, new_statuses)
                 if updates:
@@ -537,28 +625,29 @@ def ensure_order_statuses_exist() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при работе со статусами заказов: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении проверки статусов заказов: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_orders_from_kis2() -> Dict[str, any]:
+@record_import_run("orders")
+def import_orders_from_kis2(dry_run: bool = False, chunk_size: Optional[int] = None) -> Dict[str, any]:
     """
     Импортирует заказы из КИС2 в базу данных КИС3.
+    Каждая порция из chunk_size заказов сохраняется отдельно, сбойный импорт продолжится с контрольной точки.
     """
+    if dry_run:
+        return diff_orders()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
+    committed = dict(result)
     try:
-        kis2_orders_list = create_orders_list_dict_from_kis2(debug=False)
-        if not kis2_orders_list:
-            print(Fore.YELLOW + "Не удалось получить заказы из КИС2 или список пуст.")
-            return result
-
-        print(Fore.CYAN + f"Получено {len(kis2_orders_list)} заказов из КИС2.")
         with SyncSession() as session:
             try:
-                # Получаем существующие заказы
-                existing_orders = {o.serial: o for o in session.query(Order).all()}
+                progress = start_import(session, "orders", "serial", chunk_size)
+                kis2_orders = resume_rows(progress, lambda: iter_orders_from_kis2(debug=False))
                 # Получаем словари для связей
                 customers_dict = {name: id for id, name in session.query(Counterparty.id, Counterparty.name).all()}
                 works_dict = {name: id for id, name in session.query(Work.id, Work.name).all()}
@@ -567,444 +656,433 @@ def import_orders_from_kis2() -> Dict[str, any]:
                 # Проверяем наличие всех статусов заказов
                 ensure_order_statuses_exist()
 
-                for order_data in kis2_orders_list:
-                    serial = order_data['serial']
-                    name = order_data['name']
-                    customer_name = order_data['customer']
-                    priority = order_data['priority'] if order_data['priority'] > 0 and order_data[
-                        'priority'] < 11 else None
-                    # Получаем id статуса из словаря по текстовому статусу
-                    status_text = order_data['status']
-                    status_id = status_dict.get(status_text, 1)  # По умолчанию 1 (Не определён)
-
-                    # Конвертация строк дат и времени в объекты datetime
-                    # start_moment = datetime.strptime(order_data['start_moment'], "%Y-%m-%dT%H:%M:%SZ") if order_data[
-                    #     'start_moment'] else None
-                    # deadline_moment = datetime.strptime(order_data['dedline_moment'], "%Y-%m-%dT%H:%M:%SZ") if \
-                    #     order_data['dedline_moment'] else None
-                    # end_moment = datetime.strptime(order_data['end_moment'], "%Y-%m-%dT%H:%M:%SZ") if order_data[
-                    #     'end_moment'] else None
-
-                    # Конвертация строк дат и времени в объекты datetime
-                    start_moment = datetime.fromisoformat(order_data['start_moment'].replace('Z', '+00:00')) if \
-                    order_data['start_moment'] else None
-                    deadline_moment = datetime.fromisoformat(order_data['dedline_moment'].replace('Z', '+00:00')) if \
-                    order_data['dedline_moment'] else None
-                    end_moment = datetime.fromisoformat(order_data['end_moment'].replace('Z', '+00:00')) if order_data[
-                        'end_moment'] else None
-
-                    # Получаем customer_id
-                    if customer_name and customer_name in customers_dict:
-                        customer_id = customers_dict[customer_name]
-                    else:
-                        print(Fore.YELLOW + f"Не найден заказчик '{customer_name}' для заказа {serial}. Пропуск.")
-                        continue
-
-                    # Финансовые данные
-                    materials_cost = order_data.get('materialsCost', 0)
-                    materials_paid = order_data.get('materialsPaid', False)
-                    products_cost = order_data.get('productsCost', 0)
-                    products_paid = order_data.get('productsPaid', False)
-                    work_cost = order_data.get('workCost', 0)
-                    work_paid = order_data.get('workPaid', False)
-                    debt = order_data.get('debt', 0)
-                    debt_paid = order_data.get('debtPaid', False)
-
-                    # Получаем список работ
-                    order_works = order_data.get('works', [])
-
-                    # Если заказ уже существует, обновляем его
-                    if serial in existing_orders:
-                        order = existing_orders[serial]
-                        needs_update = False
-                        update_details = []
-
-                        # Проверяем изменения в основных полях
-                        if order.name != name:
-                            order.name = name
-                            needs_update = True
-                            update_details.append("название")
+                received = 0
+                for orders_batch in fetch_batches(kis2_orders, progress.chunk_size):
+                    received += len(orders_batch)
+                    # Существующие заказы только этой порции, сразу с работами
+                    existing_orders = {o.serial: o for o in session.query(Order).options(selectinload(Order.works))
+                                       .filter(Order.serial.in_([item["serial"] for item in orders_batch]))}
+                    for order_data in orders_batch:
+                        serial = order_data['serial']
+                        name = order_data['name']
+                        customer_name = order_data['customer']
+                        priority = order_data['priority'] if order_data['priority'] > 0 and order_data[
+                            'priority'] < 11 else None
+                        # Получаем id статуса из словаря по текстовому статусу
+                        status_text = order_data['status']
+                        status_id = status_dict.get(status_text, 1)  # По умолчанию 1 (Не определён)
+
+                        # Конвертация строк дат и времени в объекты datetime
+                        # start_moment = datetime.strptime(order_data['start_moment'], "%Y-%m-%dT%H:%M:%SZ") if \
+                        #     order_data['start_moment'] else None
+                        # deadline_moment = datetime.strptime(order_data['dedline_moment'], "%Y-%m-%dT%H:%M:%SZ") if \
+                        #     order_data['dedline_moment'] else None
+                        # end_moment = datetime.strptime(order_data['end_moment'], "%Y-%m-%dT%H:%M:%SZ") if order_data[
+                        #     'end_moment'] else None
+
+                        # Конвертация строк дат и времени в объекты datetime
+                        start_moment = datetime.fromisoformat(order_data['start_moment'].replace('Z', '+00:00')) if \
+                        order_data['start_moment'] else None
+                        deadline_moment = datetime.fromisoformat(order_data['dedline_moment'].replace('Z', '+00:00')) \
+                            if order_data['dedline_moment'] else None
+                        end_moment = datetime.fromisoformat(order_data['end_moment'].replace('Z', '+00:00')) if \
+                            order_data['end_moment'] else None
+
+                        # Получаем customer_id
+                        if customer_name and customer_name in customers_dict:
+                            customer_id = customers_dict[customer_name]
+                        else:
+                            print(Fore.YELLOW + f"Не найден заказчик '{customer_name}' для заказа {serial}. Пропуск.")
+                            continue
+
+                        # Финансовые данные
+                        materials_cost = order_data.get('materialsCost', 0)
+                        materials_paid = order_data.get('materialsPaid', False)
+                        products_cost = order_data.get('productsCost', 0)
+                        products_paid = order_data.get('productsPaid', False)
+                        work_cost = order_data.get('workCost', 0)
+                        work_paid = order_data.get('workPaid', False)
+                        debt = order_data.get('debt', 0)
+                        debt_paid = order_data.get('debtPaid', False)
+
+                        # Получаем список работ
+                        order_works = order_data.get('works', [])
+
+                        # Если заказ уже существует, обновляем его
+                        if serial in existing_orders:
+                            order = existing_orders[serial]
+                            needs_update = False
+                            update_details = []
+
+                            # Проверяем изменения в основных полях
+                            if order.name != name:
+                                order.name = name
+                                needs_update = True
+                                update_details.append("название")
 
-                        if order.customer_id != customer_id:
-                            order.customer_id = customer_id
-                            needs_update = True
-                            update_details.append("заказчик")
+                            if order.customer_id != customer_id:
+                                order.customer_id = customer_id
+                                needs_update = True
+                                update_details.append("заказчик")
 
-                        if order.priority != priority:
-                            order.priority = priority
-                            needs_update = True
-                            update_details.append("приоритет")
+                            if order.priority != priority:
+                                order.priority = priority
+                                needs_update = True
+                                update_details.append("приоритет")
 
-                        if order.status_id != status_id:
-                            order.status_id = status_id
-                            needs_update = True
-                            update_details.append("статус")
-
-                        # Определяем локальный часовой пояс (например, GMT+3 для Москвы и Питера,
-                        # наш сервер в Питере как раз !)
-                        LOCAL_TIMEZONE = timezone(timedelta(hours=3))
-
-                        # Функция для нормализации datetime объектов
-                        def normalize_datetime(dt):
-                            if dt is None:
-                                return None
-                            # Преобразуем к локальному часовому поясу если есть tzinfo
-                            if dt.tzinfo:
-                                return dt.astimezone(LOCAL_TIMEZONE)
-                            # Иначе предполагаем, что время в локальном часовом поясе
-                            return dt.replace(tzinfo=LOCAL_TIMEZONE)
-
-                        # Применяем для всех полей с датами
-                        for field_name in ['start_moment', 'deadline_moment', 'end_moment']:
-                            # Получаем текущее значение из БД
-                            current_value = getattr(order, field_name)
-                            # Получаем новое значение из КИС2
-                            new_value = locals().get(field_name)  # Получаем переменную по имени
-
-                            # Нормализуем оба значения
-                            normalized_current = normalize_datetime(current_value)
-                            normalized_new = normalize_datetime(new_value)
-
-                            # Если оба значения None, пропускаем
-                            if normalized_current is None and normalized_new is None:
-                                continue
-
-                            # Если одно из значений None, а другое нет - обновляем
-                            if normalized_current is None or normalized_new is None:
-                                setattr(order, field_name, new_value)
+                            if order.status_id != status_id:
+                                order.status_id = status_id
                                 needs_update = True
-                                update_details.append(f"{field_name.replace('_moment', '')}")
-                                continue
+                                update_details.append("статус")
 
-                            # Сравниваем с точностью до минут
-                            current_str = normalized_current.strftime("%Y-%m-%d %H:%M")
-                            new_str = normalized_new.strftime("%Y-%m-%d %H:%M")
+                            # Применяем для всех полей с датами
+                            for field_name in ['start_moment', 'deadline_moment', 'end_moment']:
+                                # Получаем текущее значение из БД
+                                current_value = getattr(order, field_name)
+                                # Получаем новое значение из КИС2
+                                new_value = locals().get(field_name)  # Получаем переменную по имени
 
-                            if current_str != new_str:
-                                # Для отладки
-                                print(f"Разное время {field_name}: БД={current_str}, КИС2={new_str}")
+                                # Нормализуем оба значения
+                                normalized_current = normalize_local_datetime(current_value)
+                                normalized_new = normalize_local_datetime(new_value)
 
-                                # Обновляем значение
-                                setattr(order, field_name, new_value)
-                                needs_update = True
-                                update_details.append(f"{field_name.replace('_moment', '')}")
+                                # Если оба значения None, пропускаем
+                                if normalized_current is None and normalized_new is None:
+                                    continue
 
+                                # Если одно из значений None, а другое нет - обновляем
+                                if normalized_current is None or normalized_new is None:
+                                    setattr(order, field_name, new_value)
+                                    needs_update = True
+                                    update_details.append(f"{field_name.replace('_moment', '')}")
+                                    continue
 
+                                # Сравниваем с точностью до минут
+                                current_str = normalized_current.strftime("%Y-%m-%d %H:%M")
+                                new_str = normalized_new.strftime("%Y-%m-%d %H:%M")
 
-                        # Проверяем изменения в финансовых данных
-                        if order.materials_cost != materials_cost:
-                            order.materials_cost = materials_cost
-                            needs_update = True
-                            update_details.append("стоимость материалов")
+                                if current_str != new_str:
+                                    # Для отладки
+                                    print(f"Разное время {field_name}: БД={current_str}, КИС2={new_str}")
 
-                        if order.materials_paid != materials_paid:
-                            order.materials_paid = materials_paid
-                            needs_update = True
-                            update_details.append("оплата материалов")
+                                    # Обновляем значение
+                                    setattr(order, field_name, new_value)
+                                    needs_update = True
+                                    update_details.append(f"{field_name.replace('_moment', '')}")
 
-                        if order.products_cost != products_cost:
-                            order.products_cost = products_cost
-                            needs_update = True
-                            update_details.append("стоимость товаров")
 
-                        if order.products_paid != products_paid:
-                            order.products_paid = products_paid
-                            needs_update = True
-                            update_details.append("оплата товаров")
 
-                        if order.work_cost != work_cost:
-                            order.work_cost = work_cost
-                            needs_update = True
-                            update_details.append("стоимость работ")
+                            # Проверяем изменения в финансовых данных
+                            if order.materials_cost != materials_cost:
+                                order.materials_cost = materials_cost
+                                needs_update = True
+                                update_details.append("стоимость материалов")
 
-                        if order.work_paid != work_paid:
-                            order.work_paid = work_paid
-                            needs_update = True
-                            update_details.append("оплата работ")
+                            if order.materials_paid != materials_paid:
+                                order.materials_paid = materials_paid
+                                needs_update = True
+                                update_details.append("оплата материалов")
 
-                        if order.debt != debt:
-                            order.debt = debt
-                            needs_update = True
-                            update_details.append("задолженность")
+                            if order.products_cost != products_cost:
+                                order.products_cost = products_cost
+                                needs_update = True
+                                update_details.append("стоимость товаров")
 
-                        if order.debt_paid != debt_paid:
-                            order.debt_paid = debt_paid
-                            needs_update = True
-                            update_details.append("оплата задолженности")
+                            if order.products_paid != products_paid:
+                                order.products_paid = products_paid
+                                needs_update = True
+                                update_details.append("оплата товаров")
 
-                        # Обновляем связи с работами
-                        existing_works = {work.name for work in order.works}
-                        new_works = set(order_works) - existing_works
-                        removed_works = existing_works - set(order_works)
+                            if order.work_cost != work_cost:
+                                order.work_cost = work_cost
+                                needs_update = True
+                                update_details.append("стоимость работ")
 
-                        if new_works or removed_works:
-                            needs_update = True
-                            # Удаляем работы, которых больше нет в заказе
-                            if removed_works:
-                                for work_name in removed_works:
-                                    work_to_remove = next((w for w in order.works if w.name == work_name), None)
-                                    if work_to_remove:
-                                        order.works.remove(work_to_remove)
-                                        update_details.append(f"удалена работа '{work_name}'")
-
-                            # Добавляем новые работы
-                            if new_works:
-                                for work_name in new_works:
-                                    work_id = works_dict.get(work_name)
-                                    if work_id:
-                                        work = session.get(Work, work_id)
-                                        if work:
-                                            order.works.append(work)
-                                            update_details.append(f"добавлена работа '{work_name}'")
+                            if order.work_paid != work_paid:
+                                order.work_paid = work_paid
+                                needs_update = True
+                                update_details.append("оплата работ")
 
-                        if needs_update:
-                            result['updated'] += 1
-                            print(Fore.BLUE + f"Обновлен заказ '{serial}': {', '.join(update_details)}")
-                        else:
-                            result['unchanged'] += 1
-                    else:
-                        # Создаем новый заказ
-                        new_order = Order(
-                            serial=serial,
-                            name=name,
-                            customer_id=customer_id,
-                            priority=priority,
-                            status_id=status_id,
-                            start_moment=start_moment,
-                            deadline_moment=deadline_moment,
-                            end_moment=end_moment,
-                            materials_cost=materials_cost,
-                            materials_paid=materials_paid,
-                            products_cost=products_cost,
-                            products_paid=products_paid,
-                            work_cost=work_cost,
-                            work_paid=work_paid,
-                            debt=debt,
-                            debt_paid=debt_paid
-                        )
+                            if order.debt != debt:
+                                order.debt = debt
+                                needs_update = True
+                                update_details.append("задолженность")
 
-                        # Добавляем связи с работами
-                        for work_name in order_works:
-                            work_id = works_dict.get(work_name)
-                            if work_id:
-                                work = session.get(Work, work_id)
-                                if work:
-                                    new_order.works.append(work)
+                            if order.debt_paid != debt_paid:
+                                order.debt_paid = debt_paid
+                                needs_update = True
+                                update_details.append("оплата задолженности")
 
-                        session.add(new_order)
-                        result['added'] += 1
-                        print(Fore.GREEN + f"Добавлен новый заказ: {serial} - {name}")
+                            # Обновляем связи с работами
+                            existing_works = {work.name for work in order.works}
+                            new_works = set(order_works) - existing_works
+                            removed_works = existing_works - set(order_works)
 
+                            if new_works or removed_works:
+                                needs_update = True
+                                # Удаляем работы, которых больше нет в заказе
+                                if removed_works:
+                                    for work_name in removed_works:
+                                        work_to_remove = next((w for w in order.works if w.name == work_name), None)
+                                        if work_to_remove:
+                                            order.works.remove(work_to_remove)
+                                            update_details.append(f"удалена работа '{work_name}'")
+
+                                # Добавляем новые работы
+                                if new_works:
+                                    for work_name in new_works:
+                                        work_id = works_dict.get(work_name)
+                                        if work_id:
+                                            work = session.get(Work, work_id)
+                                            if work:
+                                                order.works.append(work)
+                                                update_details.append(f"добавлена работа '{work_name}'")
+
+                            if needs_update:
+                                result['updated'] += 1
+                                print(Fore.BLUE + f"Обновлен заказ '{serial}': {', '.join(update_details)}")
+                            else:
+                                result['unchanged'] += 1
+                        else:
+                            # Создаем новый заказ
+                            new_order = Order(
+                                serial=serial,
+                                name=name,
+                                customer_id=customer_id,
+                                priority=priority,
+                                status_id=status_id,
+                                start_moment=start_moment,
+                                deadline_moment=deadline_moment,
+                                end_moment=end_moment,
+                                materials_cost=materials_cost,
+                                materials_paid=materials_paid,
+                                products_cost=products_cost,
+                                products_paid=products_paid,
+                                work_cost=work_cost,
+                                work_paid=work_paid,
+                                debt=debt,
+                                debt_paid=debt_paid
+                            )
+
+                            # Добавляем связи с работами
+                            for work_name in order_works:
+                                work_id = works_dict.get(work_name)
+                                if work_id:
+                                    work = session.get(Work, work_id)
+                                    if work:
+                                        new_order.works.append(work)
+
+                            session.add(new_order)
+                            result['added'] += 1
+                            print(Fore.GREEN + f"Добавлен новый заказ: {serial} - {name}")
+
+                    # Порция сохраняется вместе с контрольной точкой
+                    commit_chunk(session, progress, orders_batch)
+                    committed = dict(result)
+
+                if not received and not progress.resumed_from:
+                    print(Fore.YELLOW + "Не удалось получить заказы из КИС2 или список пуст.")
+                    return result
+                print(Fore.CYAN + f"Получено {received} заказов из КИС2.")
+
+                finish_import(session, progress)
+                result['resumed_from'] = progress.resumed_from
                 return commit_and_summarize_import(session, result, "заказов")
             except Exception as e:
+                # Откатывается только текущая порция, сохранённые остаются в БД и в контрольной точке
                 session.rollback()
+                result.update(committed)
                 print(Fore.RED + f"Ошибка при импорте заказов: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта заказов: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_box_accounting_from_kis2() -> Dict[str, any]:
+@record_import_run("box_accounting")
+def import_box_accounting_from_kis2(dry_run: bool = False, chunk_size: Optional[int] = None) -> Dict[str, any]:
     """
     Импортирует данные об изготовленных шкафах из КИС2 в базу данных КИС3.
+    Каждая порция из chunk_size шкафов сохраняется отдельно, сбойный импорт продолжится с контрольной точки.
     """
+    if dry_run:
+        return diff_box_accounting()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
+    committed = dict(result)
     try:
-        kis2_boxes_list = create_box_accounting_list_dict_from_kis2(debug=False)
-        if not kis2_boxes_list:
-            print(Fore.YELLOW + "Не удалось получить данные о шкафах из КИС2 или список пуст.")
-            return result
-
-        print(Fore.CYAN + f"Получено {len(kis2_boxes_list)} шкафов из КИС2.")
         with SyncSession() as session:
             try:
-                # Получаем существующие шкафы
-                existing_boxes = {b.serial_num: b for b in session.query(BoxAccounting).all()}
+                progress = start_import(session, "box_accounting", "serial_num", chunk_size)
+                kis2_boxes = resume_rows(progress, lambda: iter_box_accounting_from_kis2(debug=False))
 
                 # Создаем множество существующих заказов из КИС3
                 orders_set = set(serial[0] for serial in session.query(Order.serial).all())
 
                 # Создаем вспомогательный словарь для поиска людей
-                persons_by_name = {}
-                for person in session.query(Person).all():
-                    full_name = f"{person.surname} {person.name}"
-                    if person.patronymic:
-                        full_name += f" {person.patronymic}"
-                    persons_by_name[full_name] = person.uuid
+                persons_by_name = get_persons_by_name(session)
 
                 # Проходим по списку шкафов из КИС2
-                for box_data in kis2_boxes_list:
-                    serial_num = box_data['serial_num']
-                    name = box_data['name']
-                    order_serial = box_data['order_serial']
-                    scheme_developer_name = box_data['scheme_developer']
-                    assembler_name = box_data['assembler']
-                    programmer_name = box_data['programmer']
-                    tester_name = box_data['tester']
-
-                    # Проверяем, существует ли заказ
-                    if order_serial not in orders_set:
-                        print(Fore.YELLOW + f"Не найден заказ '{order_serial}' для шкафа {serial_num}. Пропуск.")
-                        continue
-
-                    # Ищем ID разработчика схемы
-                    scheme_developer_id = persons_by_name.get(scheme_developer_name)
-                    if not scheme_developer_id and scheme_developer_name:
-                        print(Fore.YELLOW + f"Не найден разработчик схемы '{scheme_developer_name}'"
-                                            f" для шкафа {serial_num}. Пропуск.")
-                        continue
-
-                    # Ищем ID сборщика
-                    assembler_id = persons_by_name.get(assembler_name)
-                    if not assembler_id and assembler_name:
-                        print(Fore.YELLOW + f"Не найден сборщик '{assembler_name}' для шкафа {serial_num}. Пропуск.")
-                        continue
-
-                    # Ищем ID программиста
-                    programmer_id = None
-                    if programmer_name:
-                        programmer_id = persons_by_name.get(programmer_name)
-                        if not programmer_id:
-                            print(Fore.YELLOW + f"Не найден программист '{programmer_name}' для шкафа {serial_num}."
-                                                f"Программист будет пропущен.")
-
-                    # Ищем ID тестировщика
-                    tester_id = persons_by_name.get(tester_name)
-                    if not tester_id and tester_name:
-                        print(Fore.YELLOW + f"Не найден тестировщик '{tester_name}' для шкафа {serial_num}. Пропуск.")
-                        continue
-
-                    # Если шкаф уже существует, проверяем необходимость обновления
-                    if serial_num in existing_boxes:
-                        box = existing_boxes[serial_num]
-                        needs_update = False
-                        update_details = []
-
-                        # Проверяем изменения в полях
-                        if box.name != name:
-                            box.name = name
-                            needs_update = True
-                            update_details.append("название")
+                received = 0
+                for boxes_batch in fetch_batches(kis2_boxes, progress.chunk_size):
+                    received += len(boxes_batch)
+                    # Существующие шкафы только этой порции
+                    batch_serial_nums = [item["serial_num"] for item in boxes_batch]
+                    existing_boxes = {b.serial_num: b for b in session.query(BoxAccounting)
+                                      .filter(BoxAccounting.serial_num.in_(batch_serial_nums))}
+                    for box_data in boxes_batch:
+                        serial_num = box_data['serial_num']
+                        name = box_data['name']
+                        order_serial = box_data['order_serial']
+                        scheme_developer_name = box_data['scheme_developer']
+                        assembler_name = box_data['assembler']
+                        programmer_name = box_data['programmer']
+                        tester_name = box_data['tester']
+
+                        # Проверяем, существует ли заказ
+                        if order_serial not in orders_set:
+                            print(Fore.YELLOW + f"Не найден заказ '{order_serial}' для шкафа {serial_num}. Пропуск.")
+                            continue
+
+                        # Ищем ID разработчика схемы
+                        scheme_developer_id = persons_by_name.get(scheme_developer_name)
+                        if not scheme_developer_id and scheme_developer_name:
+                            print(Fore.YELLOW + f"Не найден разработчик схемы '{scheme_developer_name}'"
+                                                f" для шкафа {serial_num}. Пропуск.")
+                            continue
+
+                        # Ищем ID сборщика
+                        assembler_id = persons_by_name.get(assembler_name)
+                        if not assembler_id and assembler_name:
+                            print(Fore.YELLOW + f"Не найден сборщик '{assembler_name}' для шкафа {serial_num}. "
+                                                f"Пропуск.")
+                            continue
+
+                        # Ищем ID программиста
+                        programmer_id = None
+                        if programmer_name:
+                            programmer_id = persons_by_name.get(programmer_name)
+                            if not programmer_id:
+                                print(Fore.YELLOW + f"Не найден программист '{programmer_name}' для шкафа {serial_num}."
+                                                    f"Программист будет пропущен.")
+
+                        # Ищем ID тестировщика
+                        tester_id = persons_by_name.get(tester_name)
+                        if not tester_id and tester_name:
+                            print(Fore.YELLOW + f"Не найден тестировщик '{tester_name}' для шкафа {serial_num}. "
+                                                f"Пропуск.")
+                            continue
+
+                        # Если шкаф уже существует, проверяем необходимость обновления
+                        if serial_num in existing_boxes:
+                            box = existing_boxes[serial_num]
+                            needs_update = False
+                            update_details = []
+
+                            # Проверяем изменения в полях
+                            if box.name != name:
+                                box.name = name
+                                needs_update = True
+                                update_details.append("название")
 
-                        if box.order_id != order_serial:
-                            box.order_id = order_serial
-                            needs_update = True
-                            update_details.append("заказ")
+                            if box.order_id != order_serial:
+                                box.order_id = order_serial
+                                needs_update = True
+                                update_details.append("заказ")
 
-                        if box.scheme_developer_id != scheme_developer_id:
-                            box.scheme_developer_id = scheme_developer_id
-                            needs_update = True
-                            update_details.append("разработчик схемы")
+                            if box.scheme_developer_id != scheme_developer_id:
+                                box.scheme_developer_id = scheme_developer_id
+                                needs_update = True
+                                update_details.append("разработчик схемы")
 
-                        if box.assembler_id != assembler_id:
-                            box.assembler_id = assembler_id
-                            needs_update = True
-                            update_details.append("сборщик")
+                            if box.assembler_id != assembler_id:
+                                box.assembler_id = assembler_id
+                                needs_update = True
+                                update_details.append("сборщик")
 
-                        if box.programmer_id != programmer_id:
-                            box.programmer_id = programmer_id
-                            needs_update = True
-                            update_details.append("программист")
+                            if box.programmer_id != programmer_id:
+                                box.programmer_id = programmer_id
+                                needs_update = True
+                                update_details.append("программист")
 
-                        if box.tester_id != tester_id:
-                            box.tester_id = tester_id
-                            needs_update = True
-                            update_details.append("тестировщик")
+                            if box.tester_id != tester_id:
+                                box.tester_id = tester_id
+                                needs_update = True
+                                update_details.append("тестировщик")
 
-                        if needs_update:
-                            result['updated'] += 1
-                            print(Fore.BLUE + f"Обновлен шкаф '{serial_num}': {', '.join(update_details)}")
+                            if needs_update:
+                                result['updated'] += 1
+                                print(Fore.BLUE + f"Обновлен шкаф '{serial_num}': {', '.join(update_details)}")
+                            else:
+                                result['unchanged'] += 1
                         else:
-                            result['unchanged'] += 1
-                    else:
-                        # Создаем новый шкаф
-                        new_box = BoxAccounting(
-                            serial_num=serial_num,
-                            name=name,
-                            order_id=order_serial,
-                            scheme_developer_id=scheme_developer_id,
-                            assembler_id=assembler_id,
-                            programmer_id=programmer_id,
-                            tester_id=tester_id
-                        )
-                        session.add(new_box)
-                        result['added'] += 1
-                        print(Fore.GREEN + f"Добавлен новый шкаф: {serial_num} - {name}")
-
+                            # Создаем новый шкаф
+                            new_box = BoxAccounting(
+                                serial_num=serial_num,
+                                name=name,
+                                order_id=order_serial,
+                                scheme_developer_id=scheme_developer_id,
+                                assembler_id=assembler_id,
+                                programmer_id=programmer_id,
+                                tester_id=tester_id
+                            )
+                            session.add(new_box)
+                            result['added'] += 1
+                            print(Fore.GREEN + f"Добавлен новый шкаф: {serial_num} - {name}")
+
+                    # Шкафы вставлены с явными номерами из КИС2 - последовательность номеров выравнивается
+                    # в транзакции порции: сохранённые порции не оставляют её позади номеров в таблице
+                    if result['added'] > committed['added']:
+                        align_box_serial_sequence(session)
+
+                    # Порция сохраняется вместе с контрольной точкой
+                    commit_chunk(session, progress, boxes_batch)
+                    committed = dict(result)
+
+                if not received and not progress.resumed_from:
+                    print(Fore.YELLOW + "Не удалось получить данные о шкафах из КИС2 или список пуст.")
+                    return result
+                print(Fore.CYAN + f"Получено {received} шкафов из КИС2.")
+
+                finish_import(session, progress)
+                result['resumed_from'] = progress.resumed_from
                 return commit_and_summarize_import(session, result, "записи о серийных номерах шкафов")
             except Exception as e:
+                # Откатывается только текущая порция, сохранённые остаются в БД и в контрольной точке
                 session.rollback()
+                result.update(committed)
                 print(Fore.RED + f"Ошибка при импорте шкафов: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта шкафов: {e}")
+        result['error'] = str(e)
         return result
 
 
-def parse_iso_duration(duration_str: str) -> timedelta | None:
-    """
-    Преобразует строку длительности в формате ISO 8601 (например, 'P0DT01H00M00S') в timedelta.
-    """
-    if not duration_str or not duration_str.startswith('P'):
-        return None
-
-    days = 0
-    hours = 0
-    minutes = 0
-    seconds = 0
-
-    # Убираем 'P' и разделяем на части до и после 'T'
-    duration_str = duration_str[1:]  # Убираем 'P'
-    if 'T' in duration_str:
-        days_part, time_part = duration_str.split('T')
-    else:
-        days_part = duration_str
-        time_part = ''
-
-    # Парсим дни
-    if 'D' in days_part:
-        days = int(days_part.split('D')[0])
-
-    # Парсим время
-    if 'H' in time_part:
-        hours_part = time_part.split('H')[0]
-        hours = int(hours_part[-2:]) if hours_part else 0
-        time_part = time_part.split('H')[1]
-
-    if 'M' in time_part:
-        minutes_part = time_part.split('M')[0]
-        minutes = int(minutes_part[-2:]) if minutes_part else 0
-        time_part = time_part.split('M')[1]
-
-    if 'S' in time_part:
-        seconds = int(time_part.split('S')[0])
-
-    return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
-
-
-def import_tasks_from_kis2() -> Dict[str, any]:
+@record_import_run("tasks")
+def import_tasks_from_kis2(dry_run: bool = False, chunk_size: Optional[int] = None) -> Dict[str, any]:
     """
     Импортирует задачи из КИС2 в базу данных КИС3, используя id из КИС2 как первичный ключ.
+    Каждая порция из chunk_size задач сохраняется отдельно, сбойный импорт продолжится с контрольной точки.
     """
+    if dry_run:
+        return diff_tasks()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
+    committed = dict(result)
     try:
-        kis2_tasks_list = create_tasks_list_dict_from_kis2(debug=False)
-        if not kis2_tasks_list:
-            print(Fore.YELLOW + "Не удалось получить задачи из КИС2 или список пуст.")
-            return result
-
-        print(Fore.CYAN + f"Получено {len(kis2_tasks_list)} задач из КИС2.")
         with SyncSession() as session:
             try:
+                progress = start_import(session, "tasks", "id", chunk_size)
+                kis2_tasks = resume_rows(progress, lambda: iter_tasks_from_kis2(debug=False))
+
                 # Проверим и создадим стандартные статусы задач
                 ensure_task_statuses_exist(session)
 
                 # Проверим и создадим стандартные статусы оплаты
                 ensure_payment_statuses_exist(session)
 
-                # Получаем существующие задачи по id
-                existing_tasks = {t.id: t for t in session.query(Task).all()}
 
                 # Создаем словари для связей
                 task_statuses_dict = {}
@@ -1016,160 +1094,177 @@ def import_tasks_from_kis2() -> Dict[str, any]:
                     payment_statuses_dict[name] = id
 
                 # Получаем словарь персон для связи с исполнителями задач
-                persons_by_name = {}
-                for person in session.query(Person).all():
-                    full_name = f"{person.surname} {person.name}"
-                    if person.patronymic:
-                        full_name += f" {person.patronymic}"
-                    persons_by_name[full_name] = person.uuid
+                persons_by_name = get_persons_by_name(session)
 
                 # Обрабатываем каждую задачу из КИС2
-                for task_data in kis2_tasks_list:
-                    kis2_id = task_data.get('id')
-                    if kis2_id is None:
-                        print(Fore.YELLOW + f"Пропущена задача '{task_data['name']}' без ID из КИС2.")
-                        continue  # Пропускаем задачи без ID
-
-                    name = task_data['name']
-                    description = task_data.get('description') or ""
-
-                    # Получаем ID исполнителя
-                    executor_id = None
-                    if task_data['executor']:
-                        executor_uuid = persons_by_name.get(task_data['executor'])
-                        if not executor_uuid:
-                            print(Fore.YELLOW + f"Не найден исполнитель '{task_data['executor']}' для задачи '{name}'.")
-
-                    # Получаем ID статуса задачи
-                    status_id = task_statuses_dict.get(task_data['status'], 1)  # "Не начата" по умолчанию
-
-                    # Получаем ID статуса оплаты, "Нет оплаты" по умолчанию
-                    payment_status_id = payment_statuses_dict.get(task_data['payment_status'], 1)
-
-                    # Преобразование строк дат в объекты datetime
-                    if 'creation_moment' in task_data:
-                        creation_moment = datetime.strptime(task_data['creation_moment'], "%Y-%m-%dT%H:%M:%SZ")
-                    else:
-                        creation_moment = None
+                received = 0
+                for tasks_batch in fetch_batches(kis2_tasks, progress.chunk_size):
+                    received += len(tasks_batch)
+                    # Существующие задачи только этой порции
+                    batch_ids = [item["id"] for item in tasks_batch if item.get("id") is not None]
+                    existing_tasks = {t.id: t for t in session.query(Task).filter(Task.id.in_(batch_ids))}
+                    for task_data in tasks_batch:
+                        kis2_id = task_data.get('id')
+                        if kis2_id is None:
+                            print(Fore.YELLOW + f"Пропущена задача '{task_data['name']}' без ID из КИС2.")
+                            continue  # Пропускаем задачи без ID
+
+                        name = task_data['name']
+                        description = task_data.get('description') or ""
+
+                        # Получаем ID исполнителя
+                        executor_uuid = None
+                        if task_data['executor']:
+                            executor_uuid = persons_by_name.get(task_data['executor'])
+                            if not executor_uuid:
+                                print(Fore.YELLOW + f"Не найден исполнитель '{task_data['executor']}' "
+                                                    f"для задачи '{name}'.")
+
+                        # Получаем ID статуса задачи
+                        status_id = task_statuses_dict.get(task_data['status'], 1)  # "Не начата" по умолчанию
+
+                        # Получаем ID статуса оплаты, "Нет оплаты" по умолчанию
+                        payment_status_id = payment_statuses_dict.get(task_data['payment_status'], 1)
+
+                        # Преобразование строк дат в объекты datetime
+                        if 'creation_moment' in task_data:
+                            creation_moment = datetime.strptime(task_data['creation_moment'], "%Y-%m-%dT%H:%M:%SZ")
+                        else:
+                            creation_moment = None
 
-                    if 'start_moment' in task_data:
-                        start_moment = datetime.strptime(task_data['start_moment'], "%Y-%m-%dT%H:%M:%SZ")
-                    else:
-                        start_moment = None
+                        if 'start_moment' in task_data:
+                            start_moment = datetime.strptime(task_data['start_moment'], "%Y-%m-%dT%H:%M:%SZ")
+                        else:
+                            start_moment = None
 
-                    if 'end_moment' in task_data:
-                        end_moment = datetime.strptime(task_data['end_moment'], "%Y-%m-%dT%H:%M:%SZ")
-                    else:
-                        end_moment = None
+                        if 'end_moment' in task_data:
+                            end_moment = datetime.strptime(task_data['end_moment'], "%Y-%m-%dT%H:%M:%SZ")
+                        else:
+                            end_moment = None
 
-                    # Преобразование длительностей из строки в timedelta
-                    planned_duration = parse_iso_duration(task_data.get('planned_duration'))
-                    print(task_data.get('planned_duration'), planned_duration)
-                    actual_duration = parse_iso_duration(task_data.get('actual_duration'))
+                        # Длительности приходят из КИС2 уже в timedelta
+                        planned_duration = parse_duration(task_data.get('planned_duration'))
+                        actual_duration = parse_duration(task_data.get('actual_duration'))
 
-                    # Получаем ссылки на родительскую и корневую задачи
-                    parent_task_id = task_data.get('parent_task_id')
-                    root_task_id = task_data.get('root_task_id')
+                        # Получаем ссылки на родительскую и корневую задачи
+                        parent_task_id = task_data.get('parent_task_id')
+                        root_task_id = task_data.get('root_task_id')
 
-                    # Проверяем существование задачи в КИС3 по ID из КИС2
-                    if kis2_id in existing_tasks:
-                        # Обновляем существующую задачу
-                        task = existing_tasks[kis2_id]
-                        needs_update = False
-                        update_details = []
+                        # Проверяем существование задачи в КИС3 по ID из КИС2
+                        if kis2_id in existing_tasks:
+                            # Обновляем существующую задачу
+                            task = existing_tasks[kis2_id]
+                            needs_update = False
+                            update_details = []
 
-                        if task.name != name:
-                            task.name = name
-                            needs_update = True
-                            update_details.append("название")
-                        if task.description != description:
-                            task.description = description
-                            needs_update = True
-                            update_details.append("описание")
-                        if task.executor_uuid != executor_uuid:
-                            task.executor_uuid = executor_uuid
-                            needs_update = True
-                            update_details.append("исполнитель")
-                        if task.status_id != status_id:
-                            task.status_id = status_id
-                            needs_update = True
-                            update_details.append("статус")
-                        if task.payment_status_id != payment_status_id:
-                            task.payment_status_id = payment_status_id
-                            needs_update = True
-                            update_details.append("статус оплаты")
-                        if task.planned_duration != planned_duration:
-                            task.planned_duration = planned_duration
-                            needs_update = True
-                            update_details.append("планируемая длительность")
-                        if task.actual_duration != actual_duration:
-                            task.actual_duration = actual_duration
-                            needs_update = True
-                            update_details.append("фактическая длительность")
-                        if task.creation_moment != creation_moment:
-                            task.creation_moment = creation_moment
-                            needs_update = True
-                            update_details.append("дата создания")
-                        if task.start_moment != start_moment:
-                            task.start_moment = start_moment
-                            needs_update = True
-                            update_details.append("дата начала")
-                        if task.end_moment != end_moment:
-                            task.end_moment = end_moment
-                            needs_update = True
-                            update_details.append("дата завершения")
-                        if task.price != task_data.get('cost'):
-                            task.price = task_data.get('cost')
-                            needs_update = True
-                            update_details.append("стоимость")
-                        if task.order_serial != task_data.get('order_id'):
-                            task.order_serial = task_data.get('order_id')
-                            needs_update = True
-                            update_details.append("заказ")
-                        if task.parent_task_id != parent_task_id:
-                            task.parent_task_id = parent_task_id
-                            needs_update = True
-                            update_details.append("родительская задача")
-                        if task.root_task_id != root_task_id:
-                            task.root_task_id = root_task_id
-                            needs_update = True
-                            update_details.append("корневая задача")
-
-                        if needs_update:
-                            result['updated'] += 1
-                            print(Fore.BLUE + f"Обновлена задача ID={kis2_id} ('{name}'): {', '.join(update_details)}")
+                            if task.name != name:
+                                task.name = name
+                                needs_update = True
+                                update_details.append("название")
+                            if task.description != description:
+                                task.description = description
+                                needs_update = True
+                                update_details.append("описание")
+                            if task.executor_uuid != executor_uuid:
+                                task.executor_uuid = executor_uuid
+                                needs_update = True
+                                update_details.append("исполнитель")
+                            if task.status_id != status_id:
+                                task.status_id = status_id
+                                needs_update = True
+                                update_details.append("статус")
+                            if task.payment_status_id != payment_status_id:
+                                task.payment_status_id = payment_status_id
+                                needs_update = True
+                                update_details.append("статус оплаты")
+                            if task.planned_duration != planned_duration:
+                                task.planned_duration = planned_duration
+                                needs_update = True
+                                update_details.append("планируемая длительность")
+                            if task.actual_duration != actual_duration:
+                                task.actual_duration = actual_duration
+                                needs_update = True
+                                update_details.append("фактическая длительность")
+                            if task.creation_moment != creation_moment:
+                                task.creation_moment = creation_moment
+                                needs_update = True
+                                update_details.append("дата создания")
+                            if task.start_moment != start_moment:
+                                task.start_moment = start_moment
+                                needs_update = True
+                                update_details.append("дата начала")
+                            if task.end_moment != end_moment:
+                                task.end_moment = end_moment
+                                needs_update = True
+                                update_details.append("дата завершения")
+                            if task.price != task_data.get('cost'):
+                                task.price = task_data.get('cost')
+                                needs_update = True
+                                update_details.append("стоимость")
+                            if task.order_serial != task_data.get('order_id'):
+                                task.order_serial = task_data.get('order_id')
+                                needs_update = True
+                                update_details.append("заказ")
+                            if task.parent_task_id != parent_task_id:
+                                task.parent_task_id = parent_task_id
+                                needs_update = True
+                                update_details.append("родительская задача")
+                            if task.root_task_id != root_task_id:
+                                task.root_task_id = root_task_id
+                                needs_update = True
+                                update_details.append("корневая задача")
+
+                            if needs_update:
+                                result['updated'] += 1
+                                print(Fore.BLUE + f"Обновлена задача ID={kis2_id} ('{name}'): "
+                                                  f"{', '.join(update_details)}")
+                            else:
+                                result['unchanged'] += 1
                         else:
-                            result['unchanged'] += 1
-                    else:
-                        # Создаем новую задачу с ID из КИС2
-                        new_task = Task(
-                            id=kis2_id,  # Используем ID из КИС2
-                            name=name,
-                            description=description,
-                            executor_uuid=executor_uuid,
-                            status_id=status_id,
-                            payment_status_id=payment_status_id,
-                            planned_duration=planned_duration,
-                            actual_duration=actual_duration,
-                            creation_moment=creation_moment,
-                            start_moment=start_moment,
-                            deadline_moment=end_moment,
-                            price=task_data.get('cost'),
-                            order_serial=task_data.get('order_id'),
-                            parent_task_id=parent_task_id,
-                            root_task_id=root_task_id
-                        )
-                        session.add(new_task)
-                        result['added'] += 1
-                        print(Fore.GREEN + f"Добавлена новая задача ID={kis2_id} ('{name}')")
-
+                            # Создаем новую задачу с ID из КИС2
+                            new_task = Task(
+                                id=kis2_id,  # Используем ID из КИС2
+                                name=name,
+                                description=description,
+                                executor_uuid=executor_uuid,
+                                status_id=status_id,
+                                payment_status_id=payment_status_id,
+                                planned_duration=planned_duration,
+                                actual_duration=actual_duration,
+                                creation_moment=creation_moment,
+                                start_moment=start_moment,
+                                deadline_moment=end_moment,
+                                price=task_data.get('cost'),
+                                order_serial=task_data.get('order_id'),
+                                parent_task_id=parent_task_id,
+                                root_task_id=root_task_id
+                            )
+                            session.add(new_task)
+                            result['added'] += 1
+                            print(Fore.GREEN + f"Добавлена новая задача ID={kis2_id} ('{name}')")
+
+                    # Порция сохраняется вместе с контрольной точкой
+                    commit_chunk(session, progress, tasks_batch)
+                    committed = dict(result)
+
+                if not received and not progress.resumed_from:
+                    print(Fore.YELLOW + "Не удалось получить задачи из КИС2 или список пуст.")
+                    return result
+                print(Fore.CYAN + f"Получено {received} задач из КИС2.")
+
+                finish_import(session, progress)
+                result['resumed_from'] = progress.resumed_from
                 return commit_and_summarize_import(session, result, "задач")
             except Exception as e:
+                # Откатывается только текущая порция, сохранённые остаются в БД и в контрольной точке
                 session.rollback()
+                result.update(committed)
                 print(Fore.RED + f"Ошибка при импорте задач: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта задач: {e}")
+        result['error'] = str(e)
         return result
 
 
@@ -1222,107 +1317,115 @@ def ensure_payment_statuses_exist(session) -> None:
     session.commit()
 
 
-def import_order_comments_from_kis2() -> Dict[str, any]:
+@record_import_run("order_comments")
+def import_order_comments_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует комментарии к заказам из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_order_comments()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_comments_list = create_order_comments_list_dict_from_kis2(debug=False)
-        if not kis2_comments_list:
-            print(Fore.YELLOW + "Не удалось получить комментарии к заказам из КИС2 или список пуст.")
-            return result
-
-        print(Fore.CYAN + f"Получено {len(kis2_comments_list)} комментариев к заказам из КИС2.")
+        kis2_comments = iter_order_comments_from_kis2(debug=False)
         with SyncSession() as session:
             try:
                 # Создаем словарь для поиска людей по полному имени
-                persons_by_name = {}
-                for person in session.query(Person).all():
-                    full_name = f"{person.surname} {person.name}"
-                    if person.patronymic:
-                        full_name += f" {person.patronymic}"
-                    persons_by_name[full_name] = person.uuid
-
-                # Получаем все записи из таблицы OrderComment
-                comments = session.query(OrderComment).all()
+                persons_by_name = get_persons_by_name(session)
 
                 # Формируем множество уникальных значений момента создания заказа
+                # (только колонка, без загрузки объектов OrderComment)
                 existing_comments_moment_of_creation_set = {
-                    comment.moment_of_creation for comment in comments
+                    moment for moment, in session.query(OrderComment.moment_of_creation)
                 }
 
-                existing_orders_set = {order.serial for order in session.query(Order).all()}
+                existing_orders_set = {serial for serial, in session.query(Order.serial)}
 
                 # Обрабатываем каждый комментарий из КИС2
-                for comment_data in kis2_comments_list:
-                    order_serial = comment_data.get('order_serial')
-                    person_name = comment_data.get('person')
-                    text = comment_data.get('text', "")
-                    moment_str = comment_data.get('moment_of_creation')
-
-                    # Проверяем обязательные поля
-                    if not order_serial or not person_name:
-                        print(Fore.YELLOW + f"Пропущен комментарий с неполными данными: {comment_data}")
-                        continue
-
-                    # Проверяем существование заказа
-                    if order_serial not in existing_orders_set:
-                        print(Fore.YELLOW + f"Не найден заказ '{order_serial}' для комментария. Пропуск.")
-                        continue
+                received = 0
+                for comments_batch in fetch_batches(kis2_comments, IMPORT_BATCH_SIZE):
+                    received += len(comments_batch)
+                    for comment_data in comments_batch:
+                        order_serial = comment_data.get('order_serial')
+                        person_name = comment_data.get('person')
+                        text = comment_data.get('text', "")
+                        moment_str = comment_data.get('moment_of_creation')
+
+                        # Проверяем обязательные поля
+                        if not order_serial or not person_name:
+                            print(Fore.YELLOW + f"Пропущен комментарий с неполными данными: {comment_data}")
+                            continue
+
+                        # Проверяем существование заказа
+                        if order_serial not in existing_orders_set:
+                            print(Fore.YELLOW + f"Не найден заказ '{order_serial}' для комментария. Пропуск.")
+                            continue
+
+                        # Ищем автора комментария
+                        person_uuid = persons_by_name.get(person_name)
+                        if not person_uuid:
+                            print(Fore.YELLOW + f"Не найден человек '{person_name}' в базе данных. "
+                                                f"Пропуск комментария.")
+                            continue
+
+                        # Преобразуем строку даты в объект datetime
+                        if moment_str:
+                            try:
+                                moment_of_creation = datetime.strptime(moment_str, "%Y-%m-%dT%H:%M:%SZ")
+                            except ValueError:
+                                print(Fore.YELLOW + f"Неверный формат даты '{moment_str}'. Используется текущее время.")
+                                moment_of_creation = datetime.now()
+                        else:
+                            moment_of_creation = None
+
+                        # Создаем ключ для проверки наличия комментария
+                        comment_key = moment_of_creation
+
+                        # Проверяем существование комментария
+                        if comment_key not in existing_comments_moment_of_creation_set:
+                            # Создаем новый комментарий
+                            new_comment = OrderComment(
+                                order_id=order_serial,
+                                person_uuid=person_uuid,
+                                text=text,
+                                moment_of_creation=moment_of_creation
+                            )
+                            session.add(new_comment)
+                            result['added'] += 1
+                            print(Fore.GREEN + f"Добавлен новый комментарий от {person_name} к заказу {order_serial}")
+                        else:
+                            result['unchanged'] += 1
 
-                    # Ищем автора комментария
-                    person_uuid = persons_by_name.get(person_name)
-                    if not person_uuid:
-                        print(Fore.YELLOW + f"Не найден человек '{person_name}' в базе данных. Пропуск комментария.")
-                        continue
+                    # Изменения порции уходят в БД, сессия больше не держит объекты порции
+                    session.flush()
 
-                    # Преобразуем строку даты в объект datetime
-                    if moment_str:
-                        try:
-                            moment_of_creation = datetime.strptime(moment_str, "%Y-%m-%dT%H:%M:%SZ")
-                        except ValueError:
-                            print(Fore.YELLOW + f"Неверный формат даты '{moment_str}'. Используется текущее время.")
-                            moment_of_creation = datetime.now()
-                    else:
-                        moment_of_creation = None
-
-                    # Создаем ключ для проверки наличия комментария
-                    comment_key = moment_of_creation
-
-                    # Проверяем существование комментария
-                    if comment_key not in existing_comments_moment_of_creation_set:
-                        # Создаем новый комментарий
-                        new_comment = OrderComment(
-                            order_id=order_serial,
-                            person_uuid=person_uuid,
-                            text=text,
-                            moment_of_creation=moment_of_creation
-                        )
-                        session.add(new_comment)
-                        result['added'] += 1
-                        print(Fore.GREEN + f"Добавлен новый комментарий от {person_name} к заказу {order_serial}")
-                    else:
-                        result['unchanged'] += 1
+                if not received:
+                    print(Fore.YELLOW + "Не удалось получить комментарии к заказам из КИС2 или список пуст.")
+                    return result
+                print(Fore.CYAN + f"Получено {received} комментариев к заказам из КИС2.")
 
                 return commit_and_summarize_import(session, result, "комментариев к заказам")
 
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте комментариев к заказам: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта комментариев к заказам: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_boxes_from_kis2() -> Dict[str, any]:
+@record_import_run("boxes")
+def import_boxes_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует корпуса шкафов из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_boxes()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_boxes_list = create_boxes_list_dict_from_kis2(debug=False)
+        kis2_boxes_list = fetch_rows(create_boxes_list_dict_from_kis2, debug=False)
         if not kis2_boxes_list:
             print(Fore.YELLOW + "Не удалось получить корпуса шкафов из КИС2 или список пуст.")
             return result
@@ -1524,134 +1627,190 @@ def import_boxes_from_kis2() -> Dict[str, any]:
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте корпусов шкафов: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта корпусов шкафов: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_timings_from_kis2() -> Dict[str, any]:
+@record_import_run("timings")
+def import_timings_from_kis2(dry_run: bool = False) -> Dict[str, any]:
     """
     Импортирует данные о затраченном времени (таймингах) из КИС2 в базу данных КИС3.
     """
+    if dry_run:
+        return diff_timings()
     result = {"status": "error", "added": 0, "updated": 0, "unchanged": 0}
     try:
-        kis2_timings_list = create_timings_list_dict_from_kis2(debug=False)
-        if not kis2_timings_list:
-            print(Fore.YELLOW + "Не удалось получить данные о таймингах из КИС2 или список пуст.")
-            return result
-
-        print(Fore.CYAN + f"Получено {len(kis2_timings_list)} записей о таймингах из КИС2.")
+        kis2_timings = iter_timings_from_kis2(debug=False)
         with SyncSession() as session:
             try:
                 # Создаем словарь для поиска людей по полному имени
-                persons_by_name = {}
-                for person in session.query(Person).all():
-                    full_name = f"{person.surname} {person.name}"
-                    if person.patronymic:
-                        full_name += f" {person.patronymic}"
-                    persons_by_name[full_name] = person.uuid
+                persons_by_name = get_persons_by_name(session)
 
                 # Проверяем существование заказов и задач
                 existing_orders = set(serial[0] for serial in session.query(Order.serial).all())
                 existing_tasks = set(id[0] for id in session.query(Task.id).all())
 
-                # Получаем существующие тайминги для проверки дубликатов
-                existing_timings = []
-                for timing in session.query(Timing.order_serial, Timing.task_id, Timing.executor_id, Timing.timing_date).all():
-                    existing_timings.append({
-                        'order_serial': timing[0],
-                        'task_id': timing[1],
-                        'executor_id': timing[2],
-                        'timing_date': timing[3]
-                    })
-
                 # Обрабатываем каждый тайминг из КИС2
-                for timing_data in kis2_timings_list:
-                    order_serial = timing_data.get('order_serial')
-                    task_id = timing_data.get('task_id')
-                    executor_name = timing_data.get('executor')
-                    time_str = timing_data.get('time')
-                    date_str = timing_data.get('date')
-
-                    # Проверяем обязательные поля
-                    if not order_serial or not task_id or not time_str:
-                        print(Fore.YELLOW + f"Пропущен тайминг с неполными данными: {timing_data}")
-                        continue
-
-                    # Проверяем существование заказа
-                    if order_serial not in existing_orders:
-                        print(Fore.YELLOW + f"Не найден заказ '{order_serial}' для тайминга. Пропуск.")
-                        continue
-
-                    # Проверяем существование задачи
-                    if task_id not in existing_tasks:
-                        print(Fore.YELLOW + f"Не найдена задача с ID={task_id} для тайминга. Пропуск.")
-                        continue
-
-                    # Поиск исполнителя по имени
-                    executor_id = None
-                    if executor_name:
-                        executor_id = persons_by_name.get(executor_name)
-                        if not executor_id:
-                            print(Fore.YELLOW + f"Не найден исполнитель '{executor_name}' в базе данных. "
-                                                f"Тайминг будет привязан без исполнителя.")
-
-                    # Преобразуем строку времени в timedelta
-                    time_delta = parse_iso_duration(time_str)
-                    if not time_delta:
-                        print(Fore.YELLOW + f"Неверный формат времени '{time_str}' для тайминга. Пропуск.")
-                        continue
-
-                    # Преобразуем строку даты в объект date
-                    timing_date = None
-                    if date_str:
-                        try:
-                            timing_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                        except ValueError:
-                            print(Fore.YELLOW + f"Неверный формат даты '{date_str}' для тайминга. Используем None.")
-
-                    # Проверяем, существует ли тайминг с такими же параметрами
-                    is_duplicate = False
-                    for existing in existing_timings:
-                        if (existing['order_serial'] == order_serial and
-                            existing['task_id'] == task_id and
-                            existing['executor_id'] == executor_id and
-                            existing['timing_date'] == timing_date):
-                            is_duplicate = True
+                received = 0
+                for timings_batch in fetch_batches(kis2_timings, IMPORT_BATCH_SIZE):
+                    received += len(timings_batch)
+                    # Существующие тайминги задач этой порции, ключ - (заказ, задача, исполнитель, дата)
+                    batch_task_ids = {item.get("task_id") for item in timings_batch}
+                    existing_timings = set(session.query(Timing.order_serial, Timing.task_id, Timing.executor_id,
+                                                         Timing.timing_date).filter(Timing.task_id.in_(batch_task_ids)))
+                    for timing_data in timings_batch:
+                        order_serial = timing_data.get('order_serial')
+                        task_id = timing_data.get('task_id')
+                        executor_name = timing_data.get('executor')
+                        time_str = timing_data.get('time')
+                        date_str = timing_data.get('date')
+
+                        # Проверяем обязательные поля
+                        if not order_serial or not task_id or time_str is None:
+                            print(Fore.YELLOW + f"Пропущен тайминг с неполными данными: {timing_data}")
+                            continue
+
+                        # Проверяем существование заказа
+                        if order_serial not in existing_orders:
+                            print(Fore.YELLOW + f"Не найден заказ '{order_serial}' для тайминга. Пропуск.")
+                            continue
+
+                        # Проверяем существование задачи
+                        if task_id not in existing_tasks:
+                            print(Fore.YELLOW + f"Не найдена задача с ID={task_id} для тайминга. Пропуск.")
+                            continue
+
+                        # Поиск исполнителя по имени
+                        executor_id = None
+                        if executor_name:
+                            executor_id = persons_by_name.get(executor_name)
+                            if not executor_id:
+                                print(Fore.YELLOW + f"Не найден исполнитель '{executor_name}' в базе данных. "
+                                                    f"Тайминг будет привязан без исполнителя.")
+
+                        # Время приходит из КИС2 уже в timedelta, нулевое не импортируем
+                        time_delta = parse_duration(time_str)
+                        if not time_delta:
+                            print(Fore.YELLOW + f"Неверный формат времени '{time_str}' для тайминга. Пропуск.")
+                            continue
+
+                        # Преобразуем строку даты в объект date
+                        timing_date = None
+                        if date_str:
+                            try:
+                                timing_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+                            except ValueError:
+                                print(Fore.YELLOW + f"Неверный формат даты '{date_str}' для тайминга. Используем None.")
+
+                        # Проверяем, существует ли тайминг с такими же параметрами
+                        timing_key = (order_serial, task_id, executor_id, timing_date)
+                        if timing_key in existing_timings:
                             result['unchanged'] += 1
-                            break
-
-                    if not is_duplicate:
-                        # Создаем новый тайминг
-                        new_timing = Timing(
-                            order_serial=order_serial,
-                            task_id=task_id,
-                            executor_id=executor_id,
-                            time=time_delta,
-                            timing_date=timing_date
-                        )
-                        session.add(new_timing)
-                        result['added'] += 1
-                        print(Fore.GREEN + f"Добавлен новый тайминг: Заказ {order_serial}, Задача {task_id}, "
-                                           f"Исполнитель {executor_name}, Время {time_str}, Дата {date_str}")
+                        else:
+                            # Создаем новый тайминг
+                            new_timing = Timing(
+                                order_serial=order_serial,
+                                task_id=task_id,
+                                executor_id=executor_id,
+                                time=time_delta,
+                                timing_date=timing_date
+                            )
+                            session.add(new_timing)
+                            existing_timings.add(timing_key)
+                            result['added'] += 1
+                            print(Fore.GREEN + f"Добавлен новый тайминг: Заказ {order_serial}, Задача {task_id}, "
+                                               f"Исполнитель {executor_name}, Время {time_str}, Дата {date_str}")
+
+                    # Изменения порции уходят в БД, сессия больше не держит объекты порции
+                    session.flush()
+
+                if not received:
+                    print(Fore.YELLOW + "Не удалось получить данные о таймингах из КИС2 или список пуст.")
+                    return result
+                print(Fore.CYAN + f"Получено {received} записей о таймингах из КИС2.")
 
                 return commit_and_summarize_import(session, result, "записей о затраченном времени")
             except Exception as e:
                 session.rollback()
                 print(Fore.RED + f"Ошибка при импорте таймингов: {e}")
+                result['error'] = str(e)
                 return result
     except Exception as e:
         print(Fore.RED + f"Ошибка при выполнении импорта таймингов: {e}")
+        result['error'] = str(e)
         return result
 
 
-def import_all_from_kis2() -> Dict[str, any]:
+# Импорты, которые сохраняются порциями с контрольной точкой и принимают chunk_size
+CHUNKED_IMPORTS = (import_orders_from_kis2, import_box_accounting_from_kis2, import_tasks_from_kis2)
+
+# Этапы полного импорта волнами: этап зависит только от этапов предыдущих волн,
+# поэтому этапы одной волны можно выполнять параллельно (import_all_from_kis2 с workers > 1)
+IMPORT_WAVES = [
+    [
+        ("Страны", import_countries_from_kis2),
+        ("Валюты", import_currency_from_kis2),
+        ("Типы оборудования", import_equipment_types_from_kis2),
+        ("Формы контрагентов", import_counterparty_forms_from_kis2),
+        ("Работы", import_works_from_kis2),
+        ("Статусы заказов", ensure_order_statuses_exist),
+    ],
+    # Города создают страну "Россия", если её нет, - после стран
+    [("Города", import_cities_from_kis2), ("Производители", import_manufacturers_from_kis2)],
+    [("Компании", import_companies_from_kis2), ("Корпуса шкафов", import_boxes_from_kis2)],
+    [("Люди", import_people_from_kis2)],
+    [("Заказы", import_orders_from_kis2)],
+    [
+        ("Комментарии к заказам", import_order_comments_from_kis2),
+        ("Учет шкафов", import_box_accounting_from_kis2),
+        ("Задачи", import_tasks_from_kis2),
+    ],
+    [("Тайминги", import_timings_from_kis2)],
+]
+
+# Ресурсы процесса-исполнителя параллельного импорта (снимок КИС2), живут до завершения процесса
+_worker_resources = ExitStack()
+
+
+def _init_import_worker(snapshot_path: Optional[str]) -> None:
+    """
+    Подготовка процесса-исполнителя: свои соединения с БД КИС3 и своё соединение со снимком КИС2
+    """
+    # Соединения, унаследованные от родителя при fork, остаются ему: процесс откроет свои
+    sync_engine.dispose(close=False)
+    if snapshot_path:
+        _worker_resources.enter_context(use_kis2_snapshot(snapshot_path))
+
+
+def _run_import_stage(import_func, dry_run: bool, chunk_size: Optional[int]) -> Tuple[Dict[str, Any], float]:
+    """
+    Выполняет этап импорта и возвращает его результат и время выполнения в секундах
+    """
+    started = time.perf_counter()
+    if import_func in CHUNKED_IMPORTS:
+        result = import_func(dry_run=dry_run, chunk_size=chunk_size)
+    else:
+        result = import_func(dry_run=dry_run)
+    return result, time.perf_counter() - started
+
+
+def import_all_from_kis2(dry_run: bool = False, chunk_size: Optional[int] = None,
+                         workers: int = 1) -> Dict[str, any]:
     """
     Последовательно выполняет все функции импорта данных из КИС2 в КИС3
     и возвращает обобщенный результат.
+    При dry_run=True каждый этап только сравнивается с текущей БД: строки, которые зависят от ещё
+    не добавленных предыдущими этапами (например, заказы нового заказчика), попадут в skipped.
+    chunk_size - размер сохраняемой порции для CHUNKED_IMPORTS, None - IMPORT_CHUNK_SIZE из config.py.
+    При workers > 1 этапы одной волны IMPORT_WAVES выполняются параллельно в пуле из workers процессов,
+    у каждого свои соединения с БД. В timing результата - общее время, сумма времени этапов и их отношение
+    (сколько этапов в среднем шло одновременно). Ускорение относительно workers=1 - utils/bench_import_parallel.py.
     """
-    print(Fore.CYAN + "=== Запуск полного импорта данных из КИС2 ===")
+    print(Fore.CYAN + f"=== Запуск {'пробного' if dry_run else 'полного'} импорта данных из КИС2 ===")
 
     if not test_sync_connection():
         print(Fore.RED + "Операции с данными не выполнены: нет подключения к базе данных.")
@@ -1662,79 +1821,95 @@ def import_all_from_kis2() -> Dict[str, any]:
         "total_added": 0,
         "total_updated": 0,
         "total_unchanged": 0,
+        "dry_run": dry_run,
         "details": {}
     }
 
-    # Список всех функций импорта в порядке выполнения
-    import_functions = [
-        ("Страны", import_countries_from_kis2),
-        ("Города", import_cities_from_kis2),
-        ("Валюты", import_currency_from_kis2),
-        ("Типы оборудования", import_equipment_types_from_kis2),
-        ("Формы контрагентов", import_counterparty_forms_from_kis2),
-        ("Производители", import_manufacturers_from_kis2),
-        ("Компании", import_companies_from_kis2),
-        ("Люди", import_people_from_kis2),
-        ("Работы", import_works_from_kis2),
-        ("Статусы заказов", ensure_order_statuses_exist),
-        ("Заказы", import_orders_from_kis2),
-        ("Комментарии к заказам", import_order_comments_from_kis2),
-        ("Корпуса шкафов", import_boxes_from_kis2),
-        ("Учет шкафов", import_box_accounting_from_kis2),
-        ("Задачи", import_tasks_from_kis2),
-        ("Тайминги", import_timings_from_kis2)
-    ]
-
-    # Выполняем каждую функцию импорта
-    for entity_name, import_func in import_functions:
-        print(Fore.CYAN + f"\n=== Импорт: {entity_name} ===")
-        try:
-            result = import_func()
-
-            # Собираем статистику
-            if result["status"] == "success":
-                total_result["total_added"] += result.get("added", 0)
-                total_result["total_updated"] += result.get("updated", 0)
-                total_result["total_unchanged"] += result.get("unchanged", 0)
-
-                # Сохраняем детальную информацию по каждому типу данных
-                total_result["details"][entity_name] = {
-                    "added": result.get("added", 0),
-                    "updated": result.get("updated", 0),
-                    "unchanged": result.get("unchanged", 0)
-                }
-
-                # Выводим результат для текущей операции
-                added = result.get("added", 0)
-                updated = result.get("updated", 0)
-                unchanged = result.get("unchanged", 0)
-                total = added + updated + unchanged
-
-                result_messages = []
-                if added > 0:
-                    result_messages.append(f"добавлено: {added}")
-                if updated > 0:
-                    result_messages.append(f"обновлено: {updated}")
-                if unchanged > 0:
-                    result_messages.append(f"без изменений: {unchanged}")
-
-                if added > 0 or updated > 0:
-                    print(Fore.GREEN + f"Результат импорта {entity_name} ({total}): {', '.join(result_messages)}")
-                else:
-                    print(Fore.YELLOW + f"{entity_name} обработаны ({total}): {', '.join(result_messages)}")
+    executor = None
+    if workers > 1:
+        snapshot = active_kis2_snapshot()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_import_worker,
+                                       initargs=(str(snapshot.path) if snapshot else None,))
+    started = time.perf_counter()
+    stages_seconds = 0.0
+
+    with executor or nullcontext():
+        # Выполняем волны по очереди, этапы внутри волны - в пуле процессов или друг за другом
+        for wave in IMPORT_WAVES:
+            if executor is not None:
+                stages = [(entity_name, executor.submit(_run_import_stage, import_func, dry_run, chunk_size))
+                          for entity_name, import_func in wave]
             else:
-                print(Fore.RED + f"Ошибка при импорте {entity_name}.")
-                total_result["details"][entity_name] = {"status": "error"}
-        except Exception as e:
-            error_message = f"Ошибка при выполнении импорта {entity_name}: {str(e)}"
-            print(Fore.RED + error_message)
-            total_result["details"][entity_name] = {"status": "error", "message": str(e)}
+                stages = wave
+
+            for entity_name, stage in stages:
+                print(Fore.CYAN + f"\n=== Импорт: {entity_name} ===")
+                try:
+                    if executor is not None:
+                        result, seconds = stage.result()
+                    else:
+                        result, seconds = _run_import_stage(stage, dry_run, chunk_size)
+                    stages_seconds += seconds
+
+                    # Собираем статистику
+                    if result["status"] == "success":
+                        total_result["total_added"] += result.get("added", 0)
+                        total_result["total_updated"] += result.get("updated", 0)
+                        total_result["total_unchanged"] += result.get("unchanged", 0)
+
+                        # Сохраняем детальную информацию по каждому типу данных
+                        total_result["details"][entity_name] = {
+                            "added": result.get("added", 0),
+                            "updated": result.get("updated", 0),
+                            "unchanged": result.get("unchanged", 0)
+                        }
+                        if dry_run:
+                            total_result["details"][entity_name].update(orphaned=result.get("orphaned", 0),
+                                                                        skipped=result.get("skipped", 0))
+
+                        # Выводим результат для текущей операции
+                        added = result.get("added", 0)
+                        updated = result.get("updated", 0)
+                        unchanged = result.get("unchanged", 0)
+                        total = added + updated + unchanged
+
+                        result_messages = []
+                        if added > 0:
+                            result_messages.append(f"добавлено: {added}")
+                        if updated > 0:
+                            result_messages.append(f"обновлено: {updated}")
+                        if unchanged > 0:
+                            result_messages.append(f"без изменений: {unchanged}")
+
+                        if added > 0 or updated > 0:
+                            print(Fore.GREEN + f"Результат импорта {entity_name} ({total}): "
+                                               f"{', '.join(result_messages)}")
+                        else:
+                            print(Fore.YELLOW + f"{entity_name} обработаны ({total}): {', '.join(result_messages)}")
+                    else:
+                        print(Fore.RED + f"Ошибка при импорте {entity_name}.")
+                        total_result["details"][entity_name] = {"status": "error"}
+                except Exception as e:
+                    error_message = f"Ошибка при выполнении импорта {entity_name}: {str(e)}"
+                    print(Fore.RED + error_message)
+                    total_result["details"][entity_name] = {"status": "error", "message": str(e)}
+
+    wall_seconds = time.perf_counter() - started
+    total_result["timing"] = {
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 3),
+        "stages_seconds": round(stages_seconds, 3),
+        "parallelism": round(stages_seconds / wall_seconds, 2) if wall_seconds > 0 else None,
+    }
 
     # Выводим итоговую статистику
     print(Fore.CYAN + "\n=== Итоги полного импорта данных ===")
     print(Fore.GREEN + f"Всего добавлено: {total_result['total_added']}")
     print(Fore.BLUE + f"Всего обновлено: {total_result['total_updated']}")
     print(Fore.YELLOW + f"Без изменений: {total_result['total_unchanged']}")
+    print(Fore.CYAN + f"Время импорта: {wall_seconds:.1f} с, сумма времени этапов: {stages_seconds:.1f} с, "
+                      f"в среднем этапов одновременно: {total_result['timing']['parallelism']} "
+                      f"(процессов: {workers})")
     print(
         Fore.CYAN + f"Всего обработано: {total_result['total_added'] + total_result['total_updated'] + total_result['total_unchanged']}")
 
@@ -1763,61 +1938,87 @@ if __name__ == "__main__":
             print(Fore.RED + f"Ошибка при импорте {entity_name}.")
 
 
+    parser = argparse.ArgumentParser(description="Импорт данных из КИС2 в КИС3")
+    parser.add_argument("--snapshot", default=KIS2_SNAPSHOT_PATH,
+                        help="Файл db.sqlite3 КИС2: читать данные из него, а не через REST API")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Пробный импорт: только отчёт о том, что изменится, без записи в БД")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Строк в сохраняемой порции импорта заказов, задач и учёта шкафов "
+                             "(по умолчанию IMPORT_CHUNK_SIZE)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Процессов для независимых этапов импорта всех данных (99), 1 - этапы друг за другом")
+    args = parser.parse_args()
+
+    # Одно соединение со снимком на весь запуск
+    source = use_kis2_snapshot(args.snapshot) if args.snapshot else nullcontext()
+    if args.snapshot:
+        print(Fore.CYAN + f"Источник данных КИС2: снимок БД {args.snapshot}")
+
     answer = ""
-    while answer != "e":
-        print("\nChange action:")
-        print("e - exit")
-        print("1 - copy countries from KIS2")
-        print("2 - copy manufacturers from KIS2")
-        print("3 - copy equipment types from KIS2")
-        print("4 - copy currencies from KIS2")
-        print("5 - copy cities from KIS2")
-        print("6 - copy counterparty forms from KIS2")
-        print("7 - copy companies from KIS2")
-        print("8 - copy people from KIS2")
-        print("9 - copy works from KIS2")
-        print("10 - ensure order statuses exist")
-        print("11 - import orders from KIS2")
-        print("12 - import box accounting from KIS2")
-        print("13 - import tasks from KIS2")
-        print("14 - import order comments from KIS2")
-        print("15 - import box from KIS2")
-        print("16 - import timings from KIS2")
-        print("99 - import all")
-        answer = input()
-
-        operations = {
-            "1": ("Импорт стран из КИС2", import_countries_from_kis2, "стран"),
-            "2": ("Импорт производителей из КИС2", import_manufacturers_from_kis2, "производителей"),
-            "3": ("Импорт типов оборудования из КИС2", import_equipment_types_from_kis2, "типов оборудования"),
-            "4": ("Импорт валют из КИС2", import_currency_from_kis2, "валют"),
-            "5": ("Импорт городов из КИС2", import_cities_from_kis2, "городов"),
-            "6": ("Импорт форм контрагентов из КИС2", import_counterparty_forms_from_kis2, "форм контрагентов"),
-            "7": ("Импорт компаний из КИС2", import_companies_from_kis2, "компаний"),
-            "8": ("Импорт людей из КИС2", import_people_from_kis2, "людей"),
-            "9": ("Импорт работ из КИС2", import_works_from_kis2, "работ"),
-            "10": ("Проверка и создание стандартных статусов заказов", ensure_order_statuses_exist, "статусов заказов"),
-            "11": ("Импорт заказов из КИС2", import_orders_from_kis2, "заказов"),
-            "12": ("Импорт учёта шкафов из КИС2", import_box_accounting_from_kis2, "учёта шкафов"),
-            "13": ("Импорт задач из КИС2", import_tasks_from_kis2, "задач"),
-            "14": ("Импорт комментариев заказов из КИС2", import_order_comments_from_kis2, "комментариев к заказам"),
-            "15": ("Импорт корпусов шкафов из КИС2", import_boxes_from_kis2, "корпусов шкафов"),
-            "16": ("Импорт расписаний из КИС2", import_timings_from_kis2, "таймингов"),
-            "99": ("Импорт всех данных из КИС2", import_all_from_kis2, "всех данных"),
-        }
-
-        if answer in operations:
-            if test_sync_connection():
-                try:
-                    title, func, entity_name = operations[answer]
-                    print(Fore.CYAN + f"=== {title} ===")
-                    import_result = func()
-                    print_import_results(import_result, entity_name)
-                except Exception as e:
-                    print(Fore.RED + f"Ошибка при выполнении операции: {e}")
-            else:
-                print(Fore.RED + "Операции с данными не выполнены: нет подключения к базе данных.")
-        elif answer != "e":
-            print(Fore.RED + "Неверный ввод. Повторите попытку.")
+    with source:
+        while answer != "e":
+            print("\nChange action:")
+            print("e - exit")
+            print("1 - copy countries from KIS2")
+            print("2 - copy manufacturers from KIS2")
+            print("3 - copy equipment types from KIS2")
+            print("4 - copy currencies from KIS2")
+            print("5 - copy cities from KIS2")
+            print("6 - copy counterparty forms from KIS2")
+            print("7 - copy companies from KIS2")
+            print("8 - copy people from KIS2")
+            print("9 - copy works from KIS2")
+            print("10 - ensure order statuses exist")
+            print("11 - import orders from KIS2")
+            print("12 - import box accounting from KIS2")
+            print("13 - import tasks from KIS2")
+            print("14 - import order comments from KIS2")
+            print("15 - import box from KIS2")
+            print("16 - import timings from KIS2")
+            print("99 - import all")
+            answer = input()
+
+            operations = {
+                "1": ("Импорт стран из КИС2", import_countries_from_kis2, "стран"),
+                "2": ("Импорт производителей из КИС2", import_manufacturers_from_kis2, "производителей"),
+                "3": ("Импорт типов оборудования из КИС2", import_equipment_types_from_kis2, "типов оборудования"),
+                "4": ("Импорт валют из КИС2", import_currency_from_kis2, "валют"),
+                "5": ("Импорт городов из КИС2", import_cities_from_kis2, "городов"),
+                "6": ("Импорт форм контрагентов из КИС2", import_counterparty_forms_from_kis2, "форм контрагентов"),
+                "7": ("Импорт компаний из КИС2", import_companies_from_kis2, "компаний"),
+                "8": ("Импорт людей из КИС2", import_people_from_kis2, "людей"),
+                "9": ("Импорт работ из КИС2", import_works_from_kis2, "работ"),
+                "10": ("Проверка и создание стандартных статусов заказов", ensure_order_statuses_exist,
+                       "статусов заказов"),
+                "11": ("Импорт заказов из КИС2", import_orders_from_kis2, "заказов"),
+                "12": ("Импорт учёта шкафов из КИС2", import_box_accounting_from_kis2, "учёта шкафов"),
+                "13": ("Импорт задач из КИС2", import_tasks_from_kis2, "задач"),
+                "14": ("Импорт комментариев заказов из КИС2", import_order_comments_from_kis2,
+                       "комментариев к заказам"),
+                "15": ("Импорт корпусов шкафов из КИС2", import_boxes_from_kis2, "корпусов шкафов"),
+                "16": ("Импорт расписаний из КИС2", import_timings_from_kis2, "таймингов"),
+                "99": ("Импорт всех данных из КИС2", import_all_from_kis2, "всех данных"),
+            }
+
+            if answer in operations:
+                if test_sync_connection():
+                    try:
+                        title, func, entity_name = operations[answer]
+                        print(Fore.CYAN + f"=== {title} ===")
+                        if func is import_all_from_kis2:
+                            import_result = func(dry_run=args.dry_run, chunk_size=args.chunk_size,
+                                                 workers=args.workers)
+                        elif func in CHUNKED_IMPORTS:
+                            import_result = func(dry_run=args.dry_run, chunk_size=args.chunk_size)
+                        else:
+                            import_result = func(dry_run=args.dry_run)
+                        print_import_results(import_result, entity_name)
+                    except Exception as e:
+                        print(Fore.RED + f"Ошибка при выполнении операции: {e}")
+                else:
+                    print(Fore.RED + "Операции с данными не выполнены: нет подключения к базе данных.")
+            elif answer != "e":
+                print(Fore.RED + "Неверный ввод. Повторите попытку.")
 
     print("Goodbye!")
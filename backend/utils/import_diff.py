@@ -0,0 +1,382 @@
+# utils/import_diff.py
+"""
+Пробный импорт (dry run): что изменил бы import_*_from_kis2, без записи в БД и без загрузки ORM-объектов.
+
+Каждая строка с обеих сторон сводится к ключу и отпечатку - hash кортежа тех полей, которые сравнивает
+импорт. Строки КИС2 проходят через те же построители и справочники, что и при импорте, строки КИС3
+читаются запросом только нужных колонок. Дальше только операции над множествами:
+    added     - ключ есть в КИС2, нет в КИС3
+    updated   - ключ общий, отпечатки разные
+    unchanged - ключ общий, отпечатки совпадают
+    orphaned  - ключ есть в КИС3, нет в КИС2 (импорт такие строки не трогает)
+    skipped   - строки КИС2, которые импорт пропустит (не найден заказ, человек и т.п.)
+"""
+import heapq
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+from colorama import Fore
+
+from kis2.DjangoRestAPI import create_boxes_list_dict_from_kis2, create_cities_set_from_kis2, \
+    create_companies_form_from_kis2, create_companies_list_dict_from_kis2, create_countries_set_from_kis2, \
+    create_equipment_type_set_from_kis2, create_list_dict_manufacturers, create_money_set_from_kis2, \
+    create_person_list_dict_from_kis2, create_works_list_dict_from_kis2, iter_box_accounting_from_kis2, \
+    iter_order_comments_from_kis2, iter_orders_from_kis2, iter_tasks_from_kis2, iter_timings_from_kis2
+from kis2.durations import parse_duration
+from database import SyncSession
+from models import BoxAccounting, City, ControlCabinet, ControlCabinetMaterial, Counterparty, CounterpartyForm, \
+    Country, Currency, EquipmentType, Ip, Manufacturer, Order, OrderComment, OrderStatus, Person, Task, \
+    TaskPaymentStatus, TaskStatus, Timing, Work
+from utils.person_directory import format_fio
+
+# Сколько ключей каждого вида показывать в отчёте
+DIFF_SAMPLE_SIZE = 20
+
+# Часовой пояс, в котором импорт сравнивает даты заказов (сервер в Питере, GMT+3)
+LOCAL_TIMEZONE = timezone(timedelta(hours=3))
+
+# Строка КИС2 для сравнения: (ключ, значения полей) или (ключ, None) - импорт её пропустит
+DiffRow = Tuple[Hashable, Optional[tuple]]
+
+
+def normalize_local_datetime(dt: Optional[datetime]) -> Optional[datetime]:
+    """
+    Дата и время в LOCAL_TIMEZONE: с tzinfo - переводится, без tzinfo - считается местным временем
+    """
+    if dt is None:
+        return None
+    if dt.tzinfo:
+        return dt.astimezone(LOCAL_TIMEZONE)
+    return dt.replace(tzinfo=LOCAL_TIMEZONE)
+
+
+def fingerprint(values: tuple) -> int:
+    # Встроенный hash кортежа: отпечатки обеих сторон считаются в одном процессе, хранить их не нужно
+    return hash(values)
+
+
+def _sample(keys: Iterable[Hashable], size: int) -> list:
+    # Первые size ключей в порядке строкового представления, без сортировки всего множества
+    return heapq.nsmallest(size, keys, key=str)
+
+
+def diff_report(kis2_rows: Iterable[DiffRow], db_rows: Iterable[Tuple[Hashable, tuple]],
+                sample_size: int = DIFF_SAMPLE_SIZE) -> Dict[str, Any]:
+    """
+    Отчёт пробного импорта по строкам КИС2 и КИС3 (см. описание модуля).
+    Ключи, повторяющиеся в КИС2, считаются один раз.
+    """
+    skipped = 0
+    kis2 = {}
+    for key, values in kis2_rows:
+        if values is None:
+            skipped += 1
+        else:
+            kis2[key] = fingerprint(values)
+    db = {key: fingerprint(values) for key, values in db_rows}
+
+    added = kis2.keys() - db.keys()
+    orphaned = db.keys() - kis2.keys()
+    updated = {key for key, _ in kis2.items() - db.items()} - added
+    return {
+        "status": "success",
+        "dry_run": True,
+        "added": len(added),
+        "updated": len(updated),
+        "unchanged": len(kis2) - len(added) - len(updated),
+        "orphaned": len(orphaned),
+        "skipped": skipped,
+        "samples": {
+            "added": _sample(added, sample_size),
+            "updated": _sample(updated, sample_size),
+            "orphaned": _sample(orphaned, sample_size),
+        },
+    }
+
+
+def _run_diff(entity_type: str, kis2_rows: Callable, db_rows: Callable) -> Dict[str, Any]:
+    """
+    Пробный импорт в одной сессии только на чтение: kis2_rows(session) и db_rows(session) - строки для diff_report
+    """
+    try:
+        with SyncSession() as session:
+            report = diff_report(kis2_rows(session), db_rows(session))
+            session.rollback()
+        print(Fore.CYAN + f"Пробный импорт {entity_type}: добавится {report['added']}, "
+                          f"обновится {report['updated']}, без изменений {report['unchanged']}, "
+                          f"нет в КИС2 {report['orphaned']}, пропустится {report['skipped']}")
+        return report
+    except Exception as e:
+        print(Fore.RED + f"Ошибка пробного импорта {entity_type}: {e}")
+        return {"status": "error", "dry_run": True, "added": 0, "updated": 0, "unchanged": 0}
+
+
+def _names_diff(entity_type: str, kis2_names: Callable[[], Iterable[str]], model) -> Dict[str, Any]:
+    # Справочники, которые импорт только дополняет по имени
+    return _run_diff(entity_type,
+                     lambda session: ((name, ()) for name in kis2_names() or ()),
+                     lambda session: ((name, ()) for name, in session.query(model.name)))
+
+
+def diff_countries() -> Dict[str, Any]:
+    return _names_diff("стран", lambda: create_countries_set_from_kis2(debug=False), Country)
+
+
+def diff_manufacturers() -> Dict[str, Any]:
+    return _names_diff("производителей",
+                       lambda: (item['name'] for item in create_list_dict_manufacturers(debug=False) or ()),
+                       Manufacturer)
+
+
+def diff_equipment_types() -> Dict[str, Any]:
+    return _names_diff("типов оборудования", lambda: create_equipment_type_set_from_kis2(debug=False),
+                       EquipmentType)
+
+
+def diff_currencies() -> Dict[str, Any]:
+    return _names_diff("валют", lambda: create_money_set_from_kis2(debug=False), Currency)
+
+
+def diff_cities() -> Dict[str, Any]:
+    return _names_diff("городов", lambda: create_cities_set_from_kis2(debug=False), City)
+
+
+def diff_counterparty_forms() -> Dict[str, Any]:
+    return _names_diff("форм контрагентов", lambda: create_companies_form_from_kis2(debug=False),
+                       CounterpartyForm)
+
+
+def _ids_by_name(session, model) -> Dict[str, Any]:
+    return {name: id for id, name in session.query(model.id, model.name)}
+
+
+def diff_companies() -> Dict[str, Any]:
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        forms = _ids_by_name(session, CounterpartyForm)
+        cities = _ids_by_name(session, City)
+        for company in create_companies_list_dict_from_kis2(debug=False) or ():
+            form_id = forms.get(company['form'])
+            city_id = cities.get(company['city']) if company['city'] else None
+            yield company['name'], (form_id, city_id, company['note']) if form_id else None
+
+    def db_rows(session):
+        for name, form_id, city_id, note in session.query(Counterparty.name, Counterparty.form_id,
+                                                          Counterparty.city_id, Counterparty.note):
+            yield name, (form_id, city_id, note)
+
+    return _run_diff("компаний", kis2_rows, db_rows)
+
+
+def diff_people() -> Dict[str, Any]:
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        companies = _ids_by_name(session, Counterparty)
+        for person in create_person_list_dict_from_kis2(debug=False) or ():
+            company_id = companies.get(person['company']) if person['company'] else None
+            key = f"{person['surname']}|{person['name']}|{person['patronymic'] or ''}"
+            yield key, (person['phone'], person['email'], company_id)
+
+    def db_rows(session):
+        for name, patronymic, surname, phone, email, company_id in session.query(
+                Person.name, Person.patronymic, Person.surname, Person.phone, Person.email, Person.counterparty_id):
+            yield f"{surname}|{name}|{patronymic or ''}", (phone, email, company_id)
+
+    return _run_diff("людей", kis2_rows, db_rows)
+
+
+def diff_works() -> Dict[str, Any]:
+    return _run_diff(
+        "работ",
+        lambda session: ((work['name'], (work.get('description', ""),))
+                         for work in create_works_list_dict_from_kis2(debug=False) or ()),
+        lambda session: ((name, (description,)) for name, description in session.query(Work.name, Work.description)))
+
+
+def _kis2_moment(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+def _order_moment(value: Optional[datetime]) -> Optional[str]:
+    # Импорт сравнивает даты заказов в местном времени с точностью до минуты
+    value = normalize_local_datetime(value)
+    return value.strftime("%Y-%m-%d %H:%M") if value else None
+
+
+def diff_orders() -> Dict[str, Any]:
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        customers = _ids_by_name(session, Counterparty)
+        statuses = _ids_by_name(session, OrderStatus)
+        for order in iter_orders_from_kis2(debug=False):
+            customer_id = customers.get(order['customer']) if order['customer'] else None
+            if not customer_id:
+                yield order['serial'], None
+                continue
+            priority = order['priority'] if 0 < order['priority'] < 11 else None
+            yield order['serial'], (
+                order['name'], customer_id, priority, statuses.get(order['status'], 1),
+                _order_moment(_kis2_moment(order['start_moment'])),
+                _order_moment(_kis2_moment(order['dedline_moment'])),
+                _order_moment(_kis2_moment(order['end_moment'])),
+                order.get('materialsCost', 0), order.get('materialsPaid', False),
+                order.get('productsCost', 0), order.get('productsPaid', False),
+                order.get('workCost', 0), order.get('workPaid', False),
+                order.get('debt', 0), order.get('debtPaid', False),
+                frozenset(order.get('works', [])),
+            )
+
+    def db_rows(session):
+        works: Dict[str, set] = {}
+        for serial, work_name in session.query(Order.serial, Work.name).join(Order.works):
+            works.setdefault(serial, set()).add(work_name)
+        for row in session.query(Order.serial, Order.name, Order.customer_id, Order.priority, Order.status_id,
+                                 Order.start_moment, Order.deadline_moment, Order.end_moment,
+                                 Order.materials_cost, Order.materials_paid, Order.products_cost,
+                                 Order.products_paid, Order.work_cost, Order.work_paid, Order.debt, Order.debt_paid):
+            serial = row[0]
+            yield serial, (*row[1:5], *(_order_moment(moment) for moment in row[5:8]), *row[8:],
+                           frozenset(works.get(serial, ())))
+
+    return _run_diff("заказов", kis2_rows, db_rows)
+
+
+def _persons_by_name(session) -> Dict[str, Any]:
+    return {format_fio(surname, name, patronymic): person_uuid
+            for person_uuid, name, patronymic, surname in session.query(
+                Person.uuid, Person.name, Person.patronymic, Person.surname)}
+
+
+def diff_box_accounting() -> Dict[str, Any]:
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        orders = {serial for serial, in session.query(Order.serial)}
+        persons = _persons_by_name(session)
+        for box in iter_box_accounting_from_kis2(debug=False):
+            people = {role: persons.get(box[role]) for role in ('scheme_developer', 'assembler', 'tester')}
+            if box['order_serial'] not in orders or any(not people[role] and box[role] for role in people):
+                yield box['serial_num'], None
+                continue
+            programmer_id = persons.get(box['programmer']) if box['programmer'] else None
+            yield box['serial_num'], (box['name'], box['order_serial'], people['scheme_developer'],
+                                      people['assembler'], programmer_id, people['tester'])
+
+    def db_rows(session):
+        for serial_num, *values in session.query(
+                BoxAccounting.serial_num, BoxAccounting.name, BoxAccounting.order_id,
+                BoxAccounting.scheme_developer_id, BoxAccounting.assembler_id, BoxAccounting.programmer_id,
+                BoxAccounting.tester_id):
+            yield serial_num, tuple(values)
+
+    return _run_diff("учёта шкафов", kis2_rows, db_rows)
+
+
+def _task_moment(value: Optional[str]) -> Optional[datetime]:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ") if value else None
+
+
+def diff_tasks() -> Dict[str, Any]:
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        persons = _persons_by_name(session)
+        statuses = _ids_by_name(session, TaskStatus)
+        payment_statuses = _ids_by_name(session, TaskPaymentStatus)
+        for task in iter_tasks_from_kis2(debug=False):
+            if task.get('id') is None:
+                yield None, None
+                continue
+            yield task['id'], (
+                task['name'], task.get('description') or "",
+                persons.get(task['executor']) if task['executor'] else None,
+                statuses.get(task['status'], 1), payment_statuses.get(task['payment_status'], 1),
+                parse_duration(task.get('planned_duration')), parse_duration(task.get('actual_duration')),
+                _task_moment(task.get('creation_moment')), _task_moment(task.get('start_moment')),
+                _task_moment(task.get('end_moment')),
+                task.get('cost'), task.get('order_id'), task.get('parent_task_id'), task.get('root_task_id'),
+            )
+
+    def db_rows(session):
+        for task_id, *values in session.query(
+                Task.id, Task.name, Task.description, Task.executor_uuid, Task.status_id, Task.payment_status_id,
+                Task.planned_duration, Task.actual_duration, Task.creation_moment, Task.start_moment,
+                Task.end_moment, Task.price, Task.order_serial, Task.parent_task_id, Task.root_task_id):
+            yield task_id, tuple(values)
+
+    return _run_diff("задач", kis2_rows, db_rows)
+
+
+def diff_order_comments() -> Dict[str, Any]:
+    # Импорт узнаёт комментарий по моменту создания, других полей не сравнивает
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        orders = {serial for serial, in session.query(Order.serial)}
+        persons = _persons_by_name(session)
+        for comment in iter_order_comments_from_kis2(debug=False):
+            moment = _task_moment(comment.get('moment_of_creation'))
+            if comment.get('order_serial') not in orders or not persons.get(comment.get('person')):
+                yield moment, None
+            else:
+                yield moment, ()
+
+    return _run_diff("комментариев к заказам", kis2_rows,
+                     lambda session: ((moment, ()) for moment, in session.query(OrderComment.moment_of_creation)))
+
+
+def diff_boxes() -> Dict[str, Any]:
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        manufacturers = _ids_by_name(session, Manufacturer)
+        currencies = _ids_by_name(session, Currency)
+        materials = _ids_by_name(session, ControlCabinetMaterial)
+        ips = _ids_by_name(session, Ip)
+        for box in create_boxes_list_dict_from_kis2(debug=False) or ():
+            vendor_code = box.get('vendor_code')
+            # Недостающие материалы и степени защиты импорт создаёт, такие корпуса попадут в added/updated
+            if not vendor_code or not box.get('material') or not box.get('ip'):
+                yield vendor_code, None
+                continue
+            price_date = box.get('price_date')
+            if price_date:
+                try:
+                    price_date = datetime.strptime(price_date, "%Y-%m-%d").date()
+                except ValueError:
+                    pass
+            yield vendor_code, (
+                box['equipment_name'], box.get('equipment_model'), box.get('description', ''),
+                manufacturers.get(box.get('manufacturer')), box.get('price'), currencies.get(box.get('currency')),
+                box.get('relevance', True), price_date,
+                materials.get(box['material'], box['material']), ips.get(box['ip'], box['ip']),
+                box.get('height'), box.get('width'), box.get('depth'),
+            )
+
+    def db_rows(session):
+        for vendor_code, *values in session.query(
+                ControlCabinet.vendor_code, ControlCabinet.name, ControlCabinet.model, ControlCabinet.description,
+                ControlCabinet.manufacturer_id, ControlCabinet.price, ControlCabinet.currency_id,
+                ControlCabinet.relevance, ControlCabinet.price_date, ControlCabinet.material_id, ControlCabinet.ip_id,
+                ControlCabinet.height, ControlCabinet.width, ControlCabinet.depth
+        ).filter(ControlCabinet.vendor_code.isnot(None)):
+            yield vendor_code, tuple(values)
+
+    return _run_diff("корпусов шкафов", kis2_rows, db_rows)
+
+
+def _timing_date(value: Optional[str]) -> Optional[date]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
+
+
+def diff_timings() -> Dict[str, Any]:
+    # Импорт узнаёт тайминг по заказу, задаче, исполнителю и дате
+    def kis2_rows(session) -> Iterator[DiffRow]:
+        orders = {serial for serial, in session.query(Order.serial)}
+        tasks = {task_id for task_id, in session.query(Task.id)}
+        persons = _persons_by_name(session)
+        for timing in iter_timings_from_kis2(debug=False):
+            executor_id = persons.get(timing['executor']) if timing['executor'] else None
+            timing_date = _timing_date(timing.get('date'))
+            key = (timing.get('order_serial'), timing.get('task_id'), executor_id, timing_date)
+            if key[0] not in orders or key[1] not in tasks or not parse_duration(timing.get('time')):
+                yield key, None
+            else:
+                yield key, ()
+
+    return _run_diff("записей о затраченном времени", kis2_rows,
+                     lambda session: ((tuple(key), ()) for key in session.query(
+                         Timing.order_serial, Timing.task_id, Timing.executor_id, Timing.timing_date)))
+
@@ -0,0 +1,130 @@
+# utils/import_history.py
+"""
+История запусков импорта из КИС2 (таблица import_runs).
+
+@record_import_run("orders") вокруг import_*_from_kis2 засекает весь запуск, а fetch_rows и fetch_batches -
+время получения данных из КИС2 (REST API или снимок БД). Остальное время запуска считается работой с БД КИС3.
+По этим строкам видно, как меняется скорость импорта от запуска к запуску и от размера порции.
+
+Строка истории пишется отдельной сессией после завершения импорта, поэтому не зависит от его commit/rollback.
+Если записать историю не удалось, импорт всё равно возвращает свой результат.
+"""
+import functools
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from colorama import Fore
+
+from database import SyncSession
+from kis2.DjangoRestAPI import batched
+from kis2.snapshot import active_kis2_snapshot
+from models import ImportRun
+
+
+@dataclass
+class ImportRunStats:
+    """
+    Замеры текущего запуска, которые копят fetch_rows и fetch_batches
+    """
+    fetched: int = 0
+    fetch_seconds: float = 0.0
+    batch_size: Optional[int] = None
+
+
+# Замеры запуска, который сейчас выполняется (None - вне record_import_run)
+_current_run: ContextVar[Optional[ImportRunStats]] = ContextVar("current_import_run", default=None)
+
+
+def fetch_rows(builder: Callable, *args, **kwargs):
+    """
+    Вызывает построитель списка/множества из КИС2 (create_*_from_kis2), засекая время получения
+    """
+    stats = _current_run.get()
+    started = time.perf_counter()
+    rows = builder(*args, **kwargs)
+    if stats is not None:
+        stats.fetch_seconds += time.perf_counter() - started
+        stats.fetched += len(rows) if rows else 0
+    return rows
+
+
+def fetch_batches(rows: Iterable, size: int) -> Iterator[List]:
+    """
+    Порции по size строк из потока КИС2 (iter_*_from_kis2), время получения каждой порции засекается
+    """
+    stats = _current_run.get()
+    if stats is not None:
+        stats.batch_size = size
+    batches = batched(rows, size)
+    while True:
+        started = time.perf_counter()
+        batch = next(batches, None)
+        if stats is not None:
+            stats.fetch_seconds += time.perf_counter() - started
+            stats.fetched += len(batch) if batch else 0
+        if batch is None:
+            return
+        yield batch
+
+
+def _save_run(entity: str, stats: ImportRunStats, started_at: datetime, duration: float,
+              result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+    result = result or {}
+    added, updated, unchanged = (result.get(key, 0) for key in ("added", "updated", "unchanged"))
+    fetch_seconds = min(stats.fetch_seconds, duration)
+    run = ImportRun(
+        entity=entity,
+        source="snapshot" if active_kis2_snapshot() else "rest",
+        status=result.get("status", "error"),
+        started_at=started_at,
+        finished_at=datetime.now(),
+        fetched=stats.fetched,
+        added=added,
+        updated=updated,
+        unchanged=unchanged,
+        skipped=max(stats.fetched - added - updated - unchanged, 0),
+        batch_size=stats.batch_size,
+        fetch_seconds=fetch_seconds,
+        db_seconds=duration - fetch_seconds,
+        rows_per_second=stats.fetched / duration if duration > 0 else None,
+        error=error or result.get("error"),
+    )
+    try:
+        with SyncSession() as session:
+            session.add(run)
+            session.commit()
+    except Exception as e:
+        print(Fore.YELLOW + f"Не удалось записать историю импорта {entity}: {e}")
+
+
+def record_import_run(entity: str) -> Callable:
+    """
+    Декоратор import_*_from_kis2: после каждого запуска (кроме пробного, dry_run=True) пишет строку в import_runs
+    """
+    def decorator(func: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        @functools.wraps(func)
+        def wrapper(*args, dry_run: bool = False, **kwargs) -> Dict[str, Any]:
+            if dry_run:
+                return func(*args, dry_run=True, **kwargs)
+
+            stats = ImportRunStats()
+            token = _current_run.set(stats)
+            started_at = datetime.now()
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                _current_run.reset(token)
+                _save_run(entity, stats, started_at, time.perf_counter() - started, result, error)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,148 @@
+# utils/person_directory.py
+"""
+Кэш справочника людей в памяти процесса: uuid -> ФИО, роли (can_be_*), активность.
+
+Людей немного (сотрудники и представители заказчиков), а ФИО нужно почти в каждом ответе:
+детали заказа, комментарии, учёт шкафов. Поэтому справочник целиком загружается одним запросом,
+а дальше ФИО берутся из памяти без запросов к таблице people.
+
+Кэш сбрасывается:
+- после commit любой сессии, в которой изменялись люди (события SQLAlchemy, работает и для импорта из КИС2);
+- по истечении TTL - на случай изменений из другого процесса.
+Если запрошен uuid, которого нет в кэше, он догружается из БД точечным запросом.
+"""
+import asyncio
+import time
+import uuid
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from models import Person
+from schemas.person_schem import PersonCanBe
+
+# Время жизни кэша, секунды
+PERSON_DIRECTORY_TTL = 300
+
+# Ключ в session.info, которым помечаются сессии с изменениями людей
+_DIRTY_FLAG = "person_directory_dirty"
+
+# Колонки, которые нужны справочнику (без телефонов, email, примечаний и т.д.)
+_PERSON_COLUMNS = (
+    Person.uuid,
+    Person.name,
+    Person.patronymic,
+    Person.surname,
+    Person.active,
+    Person.can_be_scheme_developer,
+    Person.can_be_assembler,
+    Person.can_be_programmer,
+    Person.can_be_tester,
+)
+
+
+def format_fio(surname: Optional[str], name: Optional[str], patronymic: Optional[str] = None,
+               default: str = "") -> str:
+    """
+    Собирает ФИО одной строкой "Фамилия Имя Отчество", пропуская пустые части.
+    Единый формат для ответов API, импорта из КИС2 и сопоставления людей по ФИО.
+    """
+    full_name_parts = [part for part in (surname, name, patronymic) if part]
+    return " ".join(full_name_parts) if full_name_parts else default
+
+
+class PersonDirectory:
+    """
+    Справочник людей, кэшированный в памяти.
+    """
+
+    def __init__(self, ttl_seconds: int = PERSON_DIRECTORY_TTL):
+        self._ttl_seconds = ttl_seconds
+        self._entries: Dict[uuid.UUID, PersonCanBe] = {}
+        self._fio: Dict[uuid.UUID, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Сбрасывает кэш, следующий запрос перечитает справочник из БД"""
+        self._entries = {}
+        self._fio = {}
+        self._loaded_at = None
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self._ttl_seconds
+
+    def _put(self, row) -> None:
+        # Данные пришли из БД, поэтому валидацию Pydantic не выполняем
+        entry = PersonCanBe.model_construct(**row._mapping)
+        self._entries[entry.uuid] = entry
+        self._fio[entry.uuid] = format_fio(entry.surname, entry.name, entry.patronymic)
+
+    async def _load_all(self, session: AsyncSession) -> None:
+        result = await session.execute(select(*_PERSON_COLUMNS))
+        self._entries = {}
+        self._fio = {}
+        for row in result:
+            self._put(row)
+        self._loaded_at = time.monotonic()
+
+    async def get_many(self, session: AsyncSession, person_uuids: Iterable) -> Dict[uuid.UUID, PersonCanBe]:
+        """
+        Возвращает словарь {uuid: PersonCanBe} для переданных uuid.
+        Отсутствующих в БД людей в словаре не будет.
+        """
+        wanted = {person_uuid for person_uuid in person_uuids if person_uuid}
+        if not wanted:
+            return {}
+
+        async with self._lock:
+            if not self._is_fresh():
+                await self._load_all(session)
+
+            missing = wanted - self._entries.keys()
+            if missing:
+                result = await session.execute(select(*_PERSON_COLUMNS).where(Person.uuid.in_(missing)))
+                for row in result:
+                    self._put(row)
+
+        return {person_uuid: self._entries[person_uuid] for person_uuid in wanted if person_uuid in self._entries}
+
+    async def get(self, session: AsyncSession, person_uuid) -> Optional[PersonCanBe]:
+        """Возвращает одного человека или None"""
+        return (await self.get_many(session, [person_uuid])).get(person_uuid)
+
+    async def get_fio_map(self, session: AsyncSession, person_uuids: Iterable) -> Dict[uuid.UUID, str]:
+        """
+        Возвращает словарь {uuid: "Фамилия Имя Отчество"}
+        """
+        entries = await self.get_many(session, person_uuids)
+        return {person_uuid: self._fio[person_uuid] for person_uuid in entries}
+
+
+# Глобальный справочник процесса
+person_directory = PersonDirectory()
+
+
+# --- Сброс кэша при изменении людей ---
+
+def _mark_session_dirty(mapper, connection, target) -> None:  # noqa
+    session = object_session(target)
+    if session is not None:
+        session.info[_DIRTY_FLAG] = True
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Person, _event_name, _mark_session_dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    if session.info.pop(_DIRTY_FLAG, False):
+        person_directory.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_dirty_flag(session) -> None:
+    session.info.pop(_DIRTY_FLAG, None)
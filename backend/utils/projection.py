@@ -0,0 +1,87 @@
+# utils/projection.py
+"""
+Чтение списков без построения ORM-объектов.
+
+Списочные эндпоинты выбирают только колонки ответа (Row-кортежи), превращают строки в словари
+и сериализуют их сразу в JSON через orjson. ORM-объекты не создаются, а Pydantic не проверяет
+данные повторно - они пришли из БД и уже соответствуют схеме ответа.
+
+Для эндпоинтов, которые сами собирают Pydantic-модель ответа, есть model_response:
+модель сериализуется pydantic-core без повторной проверки по response_model.
+"""
+import datetime
+import decimal
+from typing import Any, Iterable, List
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def model_columns(model, fields: Iterable[str]) -> tuple:
+    """
+    Колонки модели по именам атрибутов, например model_columns(Person, ["uuid", "name"])
+    """
+    return tuple(getattr(model, field) for field in fields)
+
+
+def rows_to_dicts(rows) -> List[dict]:
+    """
+    Превращает Row-кортежи результата в словари {имя колонки: значение}
+    """
+    return [dict(row._mapping) for row in rows]
+
+
+async def fetch_projection(session: AsyncSession, columns, *where, order_by=()) -> List[dict]:
+    """
+    Выполняет SELECT только по переданным колонкам и возвращает список словарей
+    """
+    stmt = select(*columns)
+    if where:
+        stmt = stmt.where(*where)
+    if order_by:
+        stmt = stmt.order_by(*order_by)
+    result = await session.execute(stmt)
+    return rows_to_dicts(result)
+
+
+def _orjson_default(value: Any):
+    """
+    Типы, которые orjson не умеет сериализовать сам
+    """
+    if isinstance(value, datetime.timedelta):
+        # ISO 8601 (PT8H), как в model_dump_json: формат длительностей не зависит от эндпоинта
+        return to_jsonable_python(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Сериализация в JSON: UUID, datetime и date orjson обрабатывает сам
+    """
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ProjectionResponse(ORJSONResponse):
+    """
+    Ответ со списком словарей, сериализованный orjson без jsonable_encoder и response_model.
+    response_model эндпоинта при этом остаётся в OpenAPI-документации.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """
+    Ответ из уже собранной и проверенной Pydantic-модели.
+    FastAPI возвращает Response как есть, поэтому модель не валидируется второй раз по response_model
+    и не проходит через jsonable_encoder - JSON строит pydantic-core одним вызовом.
+    """
+    return Response(content=model.model_dump_json(), status_code=status_code, media_type="application/json")
@@ -0,0 +1,62 @@
+# utils/reference_check.py
+"""
+Проверка существования связанных записей одним запросом.
+
+Вместо отдельного SELECT на каждый внешний ключ (заказ, разработчик, сборщик, ...) все проверки
+собираются в один UNION ALL: каждая часть возвращает найденные id своей таблицы с меткой.
+"""
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Set, Tuple
+
+from sqlalchemy import String, cast, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _normalize(value: Any) -> str:
+    # UUID в разных БД приводится к строке по-разному (с дефисами и без)
+    if isinstance(value, uuid.UUID):
+        return value.hex
+    return str(value)
+
+
+async def find_missing_references(
+        session: AsyncSession,
+        references: Dict[str, Tuple[Any, Iterable]]
+) -> Dict[str, Set]:
+    """
+    Проверяет существование id сразу в нескольких таблицах одним запросом.
+
+    references: {"метка": (колонка, [id, ...])}, например
+        {"order": (Order.serial, ["001-01-2025"]), "person": (Person.uuid, [uuid1, uuid2])}
+    None среди id пропускаются.
+
+    Возвращает: {"метка": {отсутствующие id}} только для меток, где чего-то не хватает.
+    """
+    wanted = {
+        label: {value for value in values if value is not None}
+        for label, (_, values) in references.items()
+    }
+
+    parts = [
+        select(literal(label).label("ref"), cast(column, String).label("value")).where(column.in_(wanted[label]))
+        for label, (column, _) in references.items()
+        if wanted[label]
+    ]
+    if not parts:
+        return {}
+
+    result = await session.execute(union_all(*parts))
+    found = defaultdict(set)
+    for ref, value in result:
+        found[ref].add(value)
+
+    missing = {}
+    for label, values in wanted.items():
+        # Приводим найденные значения к тому же виду, что и искомые
+        is_uuid = any(isinstance(value, uuid.UUID) for value in values)
+        found_keys = {uuid.UUID(value).hex if is_uuid else value for value in found[label]}
+        lost = {value for value in values if _normalize(value) not in found_keys}
+        if lost:
+            missing[label] = lost
+    return missing
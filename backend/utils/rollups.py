@@ -0,0 +1,336 @@
+# utils/rollups.py
+"""
+Сводки по времени и стоимости задач и заказов (таблицы task_rollups и order_rollups)
+и тайминги по дням (timing_daily_rollups) для аналитики часов.
+
+Чтобы узнать, сколько времени ушло на заказ или на задачу со всеми подзадачами, раньше нужно было
+суммировать тайминги и задачи всего поддерева. Теперь суммы хранятся готовыми и читаются одной строкой.
+
+Сводки обновляются инкрементально: события SQLAlchemy запоминают, какие задачи и заказы затронуты
+изменениями задач и таймингов (работает и для API, и для импорта из КИС2), и перед commit
+пересчитываются только они и их родительские задачи - в той же транзакции.
+Тайминги по дням пересчитываются за затронутые даты (удалить и вставить заново) под транзакционной
+advisory-блокировкой: иначе две транзакции, изменившие тайминги одного дня, вставили бы строки дважды.
+При большом числе затронутых задач (массовый импорт) сводки пересобираются целиком.
+
+Изменения в обход ORM (insert()/update() по таблицам tasks и timings) событий не вызывают -
+после них нужно вызвать refresh_* для затронутых записей или пересборку:
+    python utils/rollups.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Iterable, Tuple
+
+# Добавляем родительскую директорию в путь поиска модулей
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import init, Fore  # noqa: E402
+from sqlalchemy import Interval, Select, case, delete, event, func, inspect  # noqa: E402
+from sqlalchemy import literal, literal_column, or_, select, true  # noqa: E402
+from sqlalchemy.dialects.postgresql import insert as pg_insert  # noqa: E402
+from sqlalchemy.orm import Session, aliased, object_session  # noqa: E402
+
+from models import Order, OrderRollup, Task, TaskRollup, Timing, TimingDailyRollup  # noqa: E402
+from utils.task_tree import MAX_TASK_TREE_DEPTH  # noqa: E402
+
+# Инициализируем colorama
+init(autoreset=True)
+
+# Ключ advisory-блокировки пересчёта таймингов по дням (произвольная константа, см. BOX_SERIAL_LOCK_KEY)
+TIMING_DAILY_ROLLUPS_LOCK_KEY = 7_402_002
+
+# Начиная с этого числа затронутых задач или заказов сводки пересобираются целиком
+ROLLUP_FULL_REBUILD_THRESHOLD = 2000
+
+# Ключи в session.info с затронутыми задачами и заказами
+_PENDING_TASKS = "rollups_pending_tasks"
+_PENDING_ORDERS = "rollups_pending_orders"
+_PENDING_TIMING_DATES = "rollups_pending_timing_dates"
+
+_ZERO_INTERVAL = literal(timedelta(0), Interval)
+
+
+def _task_ancestors_select(task_ids: Iterable[int]) -> Select:
+    """
+    id задач и всех их родительских задач вверх до корня
+    """
+    anchor = (
+        select(Task.id, Task.parent_task_id, literal_column("0").label("depth"))
+        .where(Task.id.in_(list(task_ids)))
+        .cte("task_ancestors", recursive=True)
+    )
+    parent = aliased(Task)
+    ancestors = anchor.union_all(
+        select(parent.id, parent.parent_task_id, (anchor.c.depth + 1).label("depth"))
+        .join(anchor, parent.id == anchor.c.parent_task_id)
+        .where(anchor.c.depth < MAX_TASK_TREE_DEPTH)
+    )
+    return select(ancestors.c.id).distinct()
+
+
+def _task_rollup_select(task_ids=None) -> Select:
+    """
+    Сводки по поддеревьям задач task_ids (None - всех задач), колонки как у TaskRollup
+    """
+    anchor = (
+        select(Task.id.label("ancestor_id"), Task.id.label("task_id"), literal_column("0").label("depth"))
+        .where(Task.id.in_(list(task_ids)) if task_ids is not None else true())
+        .cte("task_descendants", recursive=True)
+    )
+    child = aliased(Task)
+    descendants = anchor.union_all(
+        select(anchor.c.ancestor_id, child.id, (anchor.c.depth + 1).label("depth"))
+        .join(anchor, child.parent_task_id == anchor.c.task_id)
+        .where(anchor.c.depth < MAX_TASK_TREE_DEPTH)
+    )
+    # Тайминги суммируются по задаче заранее, чтобы JOIN не размножал строки задач
+    timing_totals = (
+        select(Timing.task_id, func.sum(Timing.time).label("time"))
+        .where(Timing.task_id.in_(select(descendants.c.task_id)))
+        .group_by(Timing.task_id)
+        .subquery()
+    )
+    return (
+        select(
+            descendants.c.ancestor_id.label("task_id"),
+            func.coalesce(func.sum(case((descendants.c.depth == 0, timing_totals.c.time))), _ZERO_INTERVAL)
+            .label("logged_time"),
+            func.coalesce(func.sum(timing_totals.c.time), _ZERO_INTERVAL).label("subtree_logged_time"),
+            func.sum(Task.planned_duration).label("subtree_planned_duration"),
+            func.sum(Task.actual_duration).label("subtree_actual_duration"),
+            func.sum(Task.price).label("subtree_price"),
+            func.count().label("subtree_tasks"),
+            func.now().label("updated_at"),
+        )
+        .select_from(descendants)
+        .join(Task, Task.id == descendants.c.task_id)
+        .outerjoin(timing_totals, timing_totals.c.task_id == descendants.c.task_id)
+        .group_by(descendants.c.ancestor_id)
+    )
+
+
+def _order_rollup_select(serials=None) -> Select:
+    """
+    Сводки по заказам serials (None - всех заказов), колонки как у OrderRollup
+    """
+    task_totals = select(
+        Task.order_serial,
+        func.sum(Task.planned_duration).label("planned_duration"),
+        func.sum(Task.actual_duration).label("actual_duration"),
+        func.sum(Task.price).label("price"),
+        func.count().label("tasks_count"),
+    ).group_by(Task.order_serial)
+    timing_totals = select(
+        Timing.order_serial,
+        func.sum(Timing.time).label("logged_time"),
+        func.count().label("timings_count"),
+    ).group_by(Timing.order_serial)
+    orders = select(Order.serial)
+    if serials is not None:
+        serials = list(serials)
+        task_totals = task_totals.where(Task.order_serial.in_(serials))
+        timing_totals = timing_totals.where(Timing.order_serial.in_(serials))
+        orders = orders.where(Order.serial.in_(serials))
+    task_totals = task_totals.subquery()
+    timing_totals = timing_totals.subquery()
+    orders = orders.subquery()
+
+    return (
+        select(
+            orders.c.serial.label("order_serial"),
+            func.coalesce(timing_totals.c.logged_time, _ZERO_INTERVAL).label("logged_time"),
+            task_totals.c.planned_duration,
+            task_totals.c.actual_duration,
+            task_totals.c.price,
+            func.coalesce(task_totals.c.tasks_count, 0).label("tasks_count"),
+            func.coalesce(timing_totals.c.timings_count, 0).label("timings_count"),
+            func.now().label("updated_at"),
+        )
+        .select_from(orders)
+        .outerjoin(task_totals, task_totals.c.order_serial == orders.c.serial)
+        .outerjoin(timing_totals, timing_totals.c.order_serial == orders.c.serial)
+    )
+
+
+def _upsert(session: Session, model, key: str, rollup_select: Select) -> None:
+    """
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE: записывает пересчитанные сводки
+    """
+    columns = list(rollup_select.selected_columns.keys())
+    stmt = pg_insert(model).from_select(columns, rollup_select)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={column: stmt.excluded[column] for column in columns if column != key},
+    )
+    session.execute(stmt)
+
+
+def refresh_task_rollups(session: Session, task_ids: Iterable[int]) -> None:
+    """
+    Пересчитывает сводки задач task_ids и всех их родительских задач
+    """
+    task_ids = {task_id for task_id in task_ids if task_id is not None}
+    if not task_ids:
+        return
+    affected = session.execute(_task_ancestors_select(task_ids)).scalars().all()
+    if affected:
+        _upsert(session, TaskRollup, "task_id", _task_rollup_select(affected))
+
+
+def refresh_order_rollups(session: Session, serials: Iterable[str]) -> None:
+    """
+    Пересчитывает сводки заказов serials
+    """
+    serials = {serial for serial in serials if serial is not None}
+    if serials:
+        _upsert(session, OrderRollup, "order_serial", _order_rollup_select(serials))
+
+
+def _timing_dates_condition(column, timing_dates: set):
+    """
+    column IN (даты), с учётом таймингов без даты (None)
+    """
+    dates = [timing_date for timing_date in timing_dates if timing_date is not None]
+    conditions = [column.in_(dates)] if dates else []
+    if None in timing_dates:
+        conditions.append(column.is_(None))
+    return or_(*conditions)
+
+
+def _timing_daily_select(timing_dates=None) -> Select:
+    """
+    Тайминги, сложенные по исполнителю, заказу и дате (None - за все даты)
+    """
+    stmt = select(
+        Timing.timing_date,
+        Timing.executor_id,
+        Timing.order_serial,
+        func.sum(Timing.time).label("total_time"),
+        func.count().label("timings_count"),
+    ).group_by(Timing.timing_date, Timing.executor_id, Timing.order_serial)
+    if timing_dates is not None:
+        stmt = stmt.where(_timing_dates_condition(Timing.timing_date, timing_dates))
+    return stmt
+
+
+def _lock_timing_daily_rollups(session: Session) -> None:
+    """
+    Блокировка пересчёта таймингов по дням до конца транзакции.
+    Следующая транзакция ждёт commit текущей и уже видит её тайминги и строки сводки.
+    """
+    session.execute(select(func.pg_advisory_xact_lock(TIMING_DAILY_ROLLUPS_LOCK_KEY)))
+
+
+def refresh_timing_daily_rollups(session: Session, timing_dates: Iterable) -> None:
+    """
+    Пересчитывает тайминги по дням за даты timing_dates (None среди дат - тайминги без даты)
+    """
+    timing_dates = set(timing_dates)
+    if not timing_dates:
+        return
+    _lock_timing_daily_rollups(session)
+    session.execute(
+        delete(TimingDailyRollup).where(_timing_dates_condition(TimingDailyRollup.timing_date, timing_dates))
+    )
+    daily = _timing_daily_select(timing_dates)
+    session.execute(
+        TimingDailyRollup.__table__.insert().from_select(list(daily.selected_columns.keys()), daily)
+    )
+
+
+def rebuild_rollups(session: Session) -> Tuple[int, int, int]:
+    """
+    Пересобирает все сводки с нуля (сверка).
+    Возвращает количество сводок задач, заказов и строк таймингов по дням.
+    """
+    _lock_timing_daily_rollups(session)
+    session.execute(delete(TaskRollup))
+    session.execute(delete(OrderRollup))
+    session.execute(delete(TimingDailyRollup))
+    _upsert(session, TaskRollup, "task_id", _task_rollup_select())
+    _upsert(session, OrderRollup, "order_serial", _order_rollup_select())
+    daily = _timing_daily_select()
+    session.execute(
+        TimingDailyRollup.__table__.insert().from_select(list(daily.selected_columns.keys()), daily)
+    )
+    return tuple(
+        session.execute(select(func.count()).select_from(model)).scalar()
+        for model in (TaskRollup, OrderRollup, TimingDailyRollup)
+    )
+
+
+def _attribute_values(target, key: str) -> set:
+    """
+    Текущее и предыдущее (до изменения в этой транзакции) значения атрибута без запросов к БД
+    """
+    state = inspect(target)
+    values = set(state.attrs[key].history.deleted)
+    values.add(state.dict.get(key))
+    values.discard(None)
+    return values
+
+
+def _collect_affected(mapper, connection, target) -> None:
+    """
+    Запоминает в сессии задачи и заказы, сводки которых нужно пересчитать
+    """
+    session = object_session(target)
+    if session is None:
+        return
+    tasks = session.info.setdefault(_PENDING_TASKS, set())
+    orders = session.info.setdefault(_PENDING_ORDERS, set())
+    if isinstance(target, Task):
+        tasks.update(_attribute_values(target, "id"))
+        # Родители (прежний и новый) - их поддерево изменилось
+        tasks.update(_attribute_values(target, "parent_task_id"))
+    else:
+        tasks.update(_attribute_values(target, "task_id"))
+        # Даты (прежняя и новая) - тайминг без даты тоже попадает в сводку, поэтому None не отбрасывается
+        state = inspect(target)
+        session.info.setdefault(_PENDING_TIMING_DATES, set()).update(
+            {*state.attrs.timing_date.history.deleted, state.dict.get("timing_date")}
+        )
+    orders.update(_attribute_values(target, "order_serial"))
+
+
+for _model in (Task, Timing):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _collect_affected)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session) -> None:
+    # Изменения ещё не отправлены в БД: события после flush заполнят списки затронутых записей
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    tasks = session.info.pop(_PENDING_TASKS, set())
+    orders = session.info.pop(_PENDING_ORDERS, set())
+    timing_dates = session.info.pop(_PENDING_TIMING_DATES, set())
+    if not tasks and not orders and not timing_dates:
+        return
+    if max(len(tasks), len(orders), len(timing_dates)) >= ROLLUP_FULL_REBUILD_THRESHOLD:
+        rebuild_rollups(session)
+    else:
+        refresh_task_rollups(session, tasks)
+        refresh_order_rollups(session, orders)
+        refresh_timing_daily_rollups(session, timing_dates)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_pending(session) -> None:
+    session.info.pop(_PENDING_TASKS, None)
+    session.info.pop(_PENDING_ORDERS, None)
+    session.info.pop(_PENDING_TIMING_DATES, None)
+
+
+if __name__ == "__main__":
+    # Сверка: пересборка всех сводок с нуля, например после изменений в обход ORM
+    from database import SyncSession
+
+    started = datetime.now()
+    with SyncSession() as sync_session:
+        tasks_count, orders_count, daily_count = rebuild_rollups(sync_session)
+        sync_session.commit()
+    print(Fore.GREEN + f"Сводки пересобраны за {(datetime.now() - started).total_seconds():.1f} с: "
+                       f"задач {tasks_count}, заказов {orders_count}, таймингов по дням {daily_count}")
@@ -0,0 +1,100 @@
+# utils/task_tree.py
+"""
+Загрузка дерева задач одним запросом WITH RECURSIVE.
+
+Подзадачи связаны через parent_task_id. Вместо обхода связи subtasks (запрос на каждый узел или
+на каждый уровень) всё поддерево выбирается одним рекурсивным CTE, а вложенная структура
+собирается в Python за один проход по строкам через словарь {id: узел}.
+"""
+from typing import Dict, List
+
+from sqlalchemy import Select, and_, exists, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from models import Task
+from schemas.task_schem import TaskSchema
+from utils.person_directory import person_directory
+from utils.projection import model_columns
+
+# Ограничение глубины рекурсии: защита от циклов в parent_task_id (например, после импорта)
+MAX_TASK_TREE_DEPTH = 64
+
+# Текст для задач без исполнителя (как в задачах заказа)
+NO_EXECUTOR = "Исполнитель не назначен"
+
+# Колонки задачи для ответа: поля TaskSchema, вместо ФИО исполнителя - его uuid
+_TASK_FIELDS = [field for field in TaskSchema.model_fields if field != "executor"] + ["executor_uuid"]
+
+
+def task_subtree_select(*anchor_where) -> Select:
+    """
+    SELECT задач, подходящих под anchor_where, и всех их потомков.
+    depth - глубина от исходной задачи (у исходных задач 0).
+    """
+    anchor = (
+        select(*model_columns(Task, _TASK_FIELDS), literal_column("0").label("depth"))
+        .where(*anchor_where)
+        .cte("task_tree", recursive=True)
+    )
+    child = aliased(Task)
+    tree = anchor.union_all(
+        select(*model_columns(child, _TASK_FIELDS), (anchor.c.depth + 1).label("depth"))
+        .join(anchor, child.parent_task_id == anchor.c.id)
+        .where(anchor.c.depth < MAX_TASK_TREE_DEPTH)
+    )
+    # При цикле задача встречается несколько раз - первой идёт строка с наименьшей глубиной
+    return select(tree).order_by(tree.c.id, tree.c.depth)
+
+
+def order_task_roots_condition(serial: str):
+    """
+    Задачи верхнего уровня заказа: без родителя или с родителем из другого заказа
+    """
+    parent = aliased(Task)
+    return and_(
+        Task.order_serial == serial,
+        ~exists().where(parent.id == Task.parent_task_id, parent.order_serial == serial),
+    )
+
+
+def assemble_task_tree(rows) -> List[dict]:
+    """
+    Собирает вложенные узлы из плоских строк task_subtree_select за O(n).
+    Возвращает исходные задачи (depth = 0), у каждого узла список subtasks упорядочен по id.
+    """
+    nodes: Dict[int, dict] = {}
+    for row in rows:
+        if row["id"] in nodes:
+            continue
+        node = dict(row)
+        node["subtasks"] = []
+        nodes[node["id"]] = node
+
+    roots = []
+    for node in nodes.values():
+        if node.pop("depth") == 0:
+            roots.append(node)
+        else:
+            nodes[node["parent_task_id"]]["subtasks"].append(node)
+    return roots
+
+
+async def load_task_tree(session: AsyncSession, *anchor_where) -> List[dict]:
+    """
+    Дерево задач со словарями в формате TaskTreeNode (с ФИО исполнителя).
+    Пустой список, если под anchor_where не подошла ни одна задача.
+    """
+    result = await session.execute(task_subtree_select(*anchor_where))
+    rows = result.mappings().all()
+
+    executors = await person_directory.get_fio_map(session, (row["executor_uuid"] for row in rows))
+    roots = assemble_task_tree(rows)
+
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        executor_uuid = node.pop("executor_uuid")
+        node["executor"] = executors.get(executor_uuid, NO_EXECUTOR) if executor_uuid else NO_EXECUTOR
+        stack.extend(node["subtasks"])
+    return roots